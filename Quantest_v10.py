@@ -1,17 +1,44 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import sys
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import matplotlib.ticker as mtick
+import matplotlib.dates as mdates
 from matplotlib.patches import Patch
 from matplotlib import font_manager, rc
 import numpy as np
 import os
-import pickle
+import io
+import multiprocessing
 import plotly.express as px
+import plotly.graph_objects as go
+import warnings
 from datetime import datetime, date
+from collections import OrderedDict
+from quantest_engine import (
+    BacktestError, BacktestPipeline,
+    get_canary_chart_series, get_regime_segments, is_dca_only_change, apply_dca_scenario,
+    calculate_asset_contributions, summarize_asset_contributions,
+    get_price_data as engine_get_price_data,
+)
+from quantest_sweep import SWEEP_METRICS, expand_grid, load_sweep_prices, run_sweep
+from quantest_walkforward import WALK_FORWARD_OBJECTIVES, run_walk_forward
+from quantest_analytics import (
+    MONTE_CARLO_METRICS, run_monte_carlo, summarize_monte_carlo, build_comparison_panel,
+    get_chart_max_points, downsample_panel, downsample_series, build_holdings_table, calculate_rolling_metrics,
+)
+from quantest_metrics import get_periods_per_year
+from quantest_periods import calculate_period_returns, monthly_return_grid
+from quantest_results import (
+    RESULT_FILE_EXTENSION, RESULT_FILE_EXTENSIONS, dump_result_bytes, load_result_bytes, load_result_file, result_fingerprint,
+)
+from quantest_symbols import SymbolRegistry
+from quantest_catalog import CATALOG_SORT_COLUMNS, get_catalog_options, query_catalog, save_result, sync_catalog
+
+# --- [추가] 실행 파일로 묶인 경우, 파라미터 스윕의 작업 프로세스(ProcessPoolExecutor)가 앱 대신 작업 코드를 실행하도록 합니다 ---
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
 
 
 # --- session_state 초기화 ---
@@ -79,36 +106,48 @@ def load_Stock_list():
         st.error(f"Stock_list.csv 파일을 읽는 중 오류 발생: {e}")
         return None
 
+# --- [추가] 종목 색인 (티커 → 이름 조회, 종목 검색) ---
+# 목록이 수만 행이어도 재실행마다 표를 훑거나 전체 목록을 위젯에 보내지 않도록, 색인은 한 번만 만들어 공유합니다.
+@st.cache_resource
+def load_symbol_registry():
+    """Stock_list.csv로 종목 색인을 만드는 함수 (목록 파일을 수정한 뒤에는 clear_symbol_cache 호출)"""
+    return SymbolRegistry(load_Stock_list())
+
+def clear_symbol_cache():
+    """목록 파일을 수정한 뒤 목록과 색인 캐시를 함께 비우는 함수"""
+    load_Stock_list.clear()
+    load_symbol_registry.clear()
+
+def symbol_picker(label, key, registry, search_label="검색 (티커 또는 이름)"):
+    """검색어에 맞는 종목만 선택지로 보내는 다중 선택 위젯 (이미 선택한 항목은 항상 선택지에 포함)"""
+    query = st.text_input(search_label, key=f"{key}_query")
+    options = list(dict.fromkeys(st.session_state.get(key, []) + registry.search(query)))
+    return st.multiselect(label, options, key=key)
+
 # --- [추가] .pkl 파일 로드 시 사이드바 상태를 업데이트하는 로직 ---
 # st.rerun() 후 스크립트가 다시 시작될 때 이 부분이 먼저 실행됩니다.
 if 'config_to_load' in st.session_state:
     loaded_config = st.session_state.config_to_load
     
-    # Stock_list.csv에서 전체 display 리스트를 임시로 가져옴
-    etf_df_for_update = load_Stock_list()
-    if etf_df_for_update is not None:
-        full_display_list = etf_df_for_update['display'].tolist()
-
+    # 종목 색인으로 불러온 티커를 '티커 - 이름' 형식으로 바꿉니다.
+    symbols_for_update = load_symbol_registry()
+    if symbols_for_update.frame is not None:
         # 불러온 티커 목록을 '티커 - 이름' 형식으로 변환하여 session_state에 직접 저장
         if 'tickers' in loaded_config:
             loaded_tickers = loaded_config['tickers']
-            st.session_state.selected_canary = [item for item in full_display_list if item.split(' - ')[0] in loaded_tickers.get('CANARY', [])]
-            st.session_state.selected_aggressive = [item for item in full_display_list if item.split(' - ')[0] in loaded_tickers.get('AGGRESSIVE', [])]
-            st.session_state.selected_defensive = [item for item in full_display_list if item.split(' - ')[0] in loaded_tickers.get('DEFENSIVE', [])]
+            st.session_state.selected_canary = symbols_for_update.displays_for(loaded_tickers.get('CANARY', []))
+            st.session_state.selected_aggressive = symbols_for_update.displays_for(loaded_tickers.get('AGGRESSIVE', []))
+            st.session_state.selected_defensive = symbols_for_update.displays_for(loaded_tickers.get('DEFENSIVE', []))
         
-        # 벤치마크 정보 업데이트
-        if 'benchmark' in loaded_config:
-            benchmark_ticker = loaded_config['benchmark']
-            # 불러온 벤치마크 티커에 해당하는 '티커 - 이름' 형식의 전체 이름을 찾습니다.
-            match = etf_df_for_update[etf_df_for_update['Ticker'] == benchmark_ticker]
-            if not match.empty:
-                # 찾은 이름을 session_state에 저장합니다.
-                st.session_state.sidebar_benchmark_display = match.iloc[0]['display']
+        # 벤치마크 정보 업데이트 (불러온 벤치마크 티커에 해당하는 '티커 - 이름'을 session_state에 저장)
+        if 'benchmark' in loaded_config and loaded_config['benchmark'] in symbols_for_update:
+            st.session_state.sidebar_benchmark_display = symbols_for_update.display(loaded_config['benchmark'])
        
     # 한 번 사용한 임시 변수는 즉시 삭제
     del st.session_state.config_to_load
 
-etf_df = load_Stock_list()
+symbols = load_symbol_registry()
+etf_df = symbols.frame
 
 st.sidebar.title("⚙️ 백테스트 설정")
 st.sidebar.header("1. 기본 설정")
@@ -152,20 +191,16 @@ st.sidebar.markdown(f"<p style='text-align: right; color: #555; margin-top: -10p
 
 
 if etf_df is not None:
-    benchmark_options = etf_df['display'].tolist()
-    
-    # --- [수정] 벤치마크 위젯을 session_state와 연동 ---
+    # --- [수정] 벤치마크 위젯을 session_state와 연동하고, 전체 목록 대신 검색 결과만 선택지로 사용 ---
     # 1. session_state에 저장된 값이 있으면 그것을 기본값으로 사용하고, 없으면 'SPY'를 찾습니다.
-    default_benchmark_display = st.session_state.get(
-        'sidebar_benchmark_display', 
-        next((opt for opt in benchmark_options if 'SPY' in opt), benchmark_options[0])
+    default_benchmark_display = st.session_state.get('sidebar_benchmark_display') or next(
+        iter(symbols.search('SPY', 1) or symbols.search('', 1)), None
     )
-    
-    # 2. 기본값의 인덱스를 찾습니다. (값이 목록에 없을 경우를 대비하여 예외 처리)
-    try:
-        default_index = benchmark_options.index(default_benchmark_display)
-    except ValueError:
-        default_index = 0 # 목록에 없으면 첫 번째 항목을 기본값으로 사용
+    benchmark_query = st.sidebar.text_input("벤치마크 검색 (티커 또는 이름)", key='sidebar_benchmark_query')
+    benchmark_options = list(dict.fromkeys(([default_benchmark_display] if default_benchmark_display else []) + symbols.search(benchmark_query)))
+
+    # 2. 기본값의 인덱스를 찾습니다. (선택지의 첫 항목이 항상 현재 값)
+    default_index = 0
     
     # 3. selectbox에 key와 동적 index를 할당합니다.
     st.sidebar.selectbox(
@@ -285,7 +320,7 @@ with st.sidebar.expander("티커 관리"):
                             writer.writerow([new_ticker, new_name])
                         
                         st.success(f"'{new_name}' ({new_ticker}) 추가 완료!")
-                        load_Stock_list.clear()
+                        clear_symbol_cache()
                         # --- [추가] 새로고침 직전, 현재 선택값을 임시 저장 ---
                         st.session_state.temp_selection_agg = st.session_state.selected_aggressive
                         st.session_state.temp_selection_def = st.session_state.selected_defensive
@@ -303,10 +338,9 @@ with st.sidebar.expander("티커 관리"):
         st.markdown("---")
         st.markdown("###### 기존 티커 삭제")
         
-        tickers_to_delete = st.multiselect(
-            "삭제할 티커를 선택하세요.",
-            options=current_stocks_df['Ticker'].tolist()
-        )
+        tickers_to_delete = [
+            d.split(' - ')[0] for d in symbol_picker("삭제할 티커를 선택하세요.", 'tickers_to_delete', symbols, "삭제할 티커 검색")
+        ]
         
         if st.button("티커 삭제하기"):
             if tickers_to_delete:
@@ -322,7 +356,7 @@ with st.sidebar.expander("티커 관리"):
                     updated_df.to_csv(csv_path, index=False, encoding='utf-8')
                     
                     st.success(f"{len(tickers_to_delete)}개의 티커를 삭제했습니다!")                  
-                    load_Stock_list.clear()
+                    clear_symbol_cache()
                     # --- [추가] 새로고침 직전, 현재 선택값을 임시 저장 ---
                     st.session_state.temp_selection_agg = st.session_state.selected_aggressive
                     st.session_state.temp_selection_def = st.session_state.selected_defensive
@@ -336,13 +370,11 @@ with st.sidebar.expander("티커 관리"):
 
 st.sidebar.header("3. 자산군 설정")
 if etf_df is not None:
-    display_list = etf_df['display'].tolist()
-
     # --- [수정] session_state 초기화 및 위젯 생성 ---
-    # 기본값 목록 정의
-    default_canary_list = [d for d in ['TIP - iShares TIPS Bond ETF'] if d in display_list]
-    default_aggressive_list = [d for d in ['SPY - SPDR S&P 500 ETF Trust', 'IWM - iShares Russell 2000 ETF', 'EFA - iShares MSCI EAFE ETF', 'VWO - Vanguard FTSE Emerging Markets ETF', 'VNQ - Vanguard Real Estate ETF', 'DBC - Invesco DB Commodity Index Tracking Fund', 'IEF - iShares 7-10 Year Treasury Bond ETF', 'TLT - iShares 20+ Year Treasury Bond ETF'] if d in display_list]
-    default_defensive_list = [d for d in ['BIL - SPDR Bloomberg 1-3 Month T-Bill ETF', 'IEF - iShares 7-10 Year Treasury Bond ETF'] if d in display_list]
+    # 기본값 목록 정의 (목록에 있는 티커만)
+    default_canary_list = symbols.displays_for(['TIP'])
+    default_aggressive_list = symbols.displays_for(['SPY', 'IWM', 'EFA', 'VWO', 'VNQ', 'DBC', 'IEF', 'TLT'])
+    default_defensive_list = symbols.displays_for(['BIL', 'IEF'])
 
     # 앱 첫 실행 시에만 기본값으로 session_state를 초기화
     if 'selected_canary' not in st.session_state:
@@ -353,12 +385,13 @@ if etf_df is not None:
         st.session_state.selected_defensive = default_defensive_list
 
     # 위젯은 key를 통해 session_state와 자동으로 동기화됨 (default 인자 불필요)
+    # --- [수정] 전체 목록 대신 검색어에 맞는 항목만 선택지로 보냅니다 ---
     with st.sidebar.popover("카나리아 자산 선택하기", use_container_width=True):
-        st.multiselect("카나리아 자산 검색", display_list, key='selected_canary')
+        symbol_picker("카나리아 자산 검색", 'selected_canary', symbols)
     with st.sidebar.popover("공격 자산 선택하기", use_container_width=True):
-        st.multiselect("공격 자산 검색", display_list, key='selected_aggressive')
+        symbol_picker("공격 자산 검색", 'selected_aggressive', symbols)
     with st.sidebar.popover("방어 자산 선택하기", use_container_width=True):
-        st.multiselect("방어 자산 검색", display_list, key='selected_defensive')
+        symbol_picker("방어 자산 검색", 'selected_defensive', symbols)
     
     # session_state에서 값을 읽어옴
     aggressive_tickers = [s.split(' - ')[0] for s in st.session_state.selected_aggressive]
@@ -400,6 +433,18 @@ top_n_aggressive = st.sidebar.number_input("공격 자산 Top N", min_value=1, m
 top_n_defensive = st.sidebar.number_input("방어 자산 Top N", min_value=1, max_value=10, value=1, help="방어 자산군에서 모멘텀 순위가 높은 상위 N개의 자산을 선택합니다.")
 weighting_scheme = st.sidebar.selectbox("자산 배분 방식", ('동일 비중 (Equal Weight)',), help="선택된 자산들에 어떤 비중으로 투자할지 결정합니다. (추후 확장 가능)")
 
+# --- [추가] 그래프 표시 설정 (백테스트 결과와 무관하므로 gather_current_config에는 넣지 않습니다) ---
+st.sidebar.header("6. 그래프 표시 설정")
+chart_width_px = st.sidebar.select_slider(
+    "그래프 가로 해상도 (픽셀)", options=[600, 800, 1200, 1600, 2400], value=1200,
+    help="시계열 그래프는 선 하나당 가로 1픽셀에 2개 정도의 점만 남겨 그립니다. 기간이 길수록 화면 전송과 그리기가 빨라집니다."
+)
+chart_full_resolution = st.sidebar.toggle(
+    "전체 해상도로 그리기", value=False,
+    help="그래프를 확대해서 세부 움직임을 볼 때 켭니다. 모든 점을 그리므로 일별 데이터가 길면 느려질 수 있습니다."
+)
+chart_max_points = None if chart_full_resolution else get_chart_max_points(chart_width_px)
+
 # 모멘텀 기간 문자열을 숫자리스트로 변환하는 로직을 사이드바 영역으로 이동
 try:
     momentum_periods = [int(p.strip()) for p in momentum_periods_str.split(',')]
@@ -421,219 +466,27 @@ def gather_current_config():
                              'weighting': weighting_scheme}
     }
 
-# 앱이 재실행될 때마다 현재 설정을 가져옴
-current_config = gather_current_config()
-
-# 마지막 실행 설정이 있고, 현재 설정과 다를 경우 '변경됨' 플래그를 True로 설정
-if 'last_run_config' in st.session_state:
-    settings_are_different = (st.session_state.last_run_config != current_config)
-    st.session_state.settings_changed = settings_are_different
-
-    # 설정이 변경되었고, 아직 토스트 알림을 보여주지 않았다면
-    if settings_are_different and not st.session_state.get('toast_shown', False):
-        st.toast("⚙️ 설정이 변경되었습니다!", icon="💡")
-        st.session_state.toast_shown = True # 알림을 보여줬다고 기록
-else:
-    st.session_state.settings_changed = False
-
-# --- 사이드바 설정 변경 감지 로직 끝 ---
 
 # -----------------------------------------------------------------------------
 # 2. 백엔드 로직 (데이터 처리 및 백테스트)
 # -----------------------------------------------------------------------------
+
+# --- [수정] 계산 로직은 quantest_engine.py(Streamlit 없이 동작하는 엔진)로 분리되었습니다 ---
+# 여기서는 엔진의 가격 로딩 함수를 Streamlit 캐시와 화면 메시지로 감싸기만 합니다.
 @st.cache_data(ttl=3600)
 def get_price_data(tickers, start, end, user_start_date):
     try:
-        # --- [수정] auto_adjust=False 옵션을 추가합니다 ---
-        raw_data = yf.download(
-            tickers, 
-            start=start, 
-            end=end, 
-            progress=False,
-            auto_adjust=False  # 이 옵션을 추가하면 'Adj Close' 컬럼이 포함됩니다.
-        )
-        
-        if raw_data.empty: 
-            st.error("데이터를 다운로드하지 못했습니다."); 
-            return None, None, None
-
-        # 'Adj Close'가 있는지 먼저 확인하고, 없으면 'Close'를 사용하는 로직
-        if 'Adj Close' in raw_data.columns:
-            prices = raw_data['Adj Close'].copy()
-        else:
-            st.warning("'수정 종가(Adj Close)' 데이터를 일부 티커에서 찾을 수 없어, '종가(Close)'를 기준으로 계산합니다.")
-            prices = raw_data['Close'].copy()
-        
-        prices.dropna(axis=0, how='all', inplace=True)
-        
-        successful_tickers = [t for t in tickers if t in prices.columns and not prices[t].isnull().all()]
-        failed_tickers = [t for t in tickers if t not in successful_tickers]
-
-        # --- [수정] 가장 늦게 시작하는 '핵심 원인' 티커 목록을 찾는 로직 ---
-        if not successful_tickers:
-            return pd.DataFrame(), failed_tickers, []
-
-        start_dates = {ticker: prices[ticker].first_valid_index() for ticker in successful_tickers}
-        
-        valid_start_dates = [d for d in start_dates.values() if pd.notna(d)]
-        if not valid_start_dates:
-            return prices[successful_tickers].dropna(axis=0, how='any'), failed_tickers, []
-
-        actual_latest_start = max(valid_start_dates)
-        
-        # 가장 늦은 날짜에 시작하는 모든 티커를 찾습니다.
-        culprit_tickers = [ticker for ticker, date in start_dates.items() if date == actual_latest_start]
-        
-        # 사용자가 요청한 진짜 시작일보다 실제 데이터 시작일이 늦은 경우에만 "culprit"으로 간주합니다.
-        if actual_latest_start <= pd.to_datetime(user_start_date):
-            culprit_tickers = [] # 워밍업 기간에 해당하는 경우는 원인 제공자가 없는 것으로 처리
-        
-        final_prices = prices[successful_tickers].dropna(axis=0, how='any')
-
-        return final_prices, failed_tickers, culprit_tickers
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            price_data = engine_get_price_data(tickers, start, end, user_start_date)
+        for w in caught_warnings:
+            st.warning(str(w.message))
+        return price_data
+    except BacktestError as e:
+        st.error(str(e)); return None, None, None
     except Exception as e:
         st.error(f"데이터 다운로드 중 오류 발생: {e}"); return None, None, None
 
-def calculate_cumulative_returns_with_dca(returns_series, initial_capital, monthly_contribution, contribution_dates):
-    """적립식 투자를 반영하여 누적 자산 가치를 계산하는 함수"""
-    portfolio_values = []
-    current_capital = initial_capital
-
-    # 기여금 날짜를 빠르게 조회하기 위해 set으로 변환
-    contribution_dates_set = set(contribution_dates)
-
-    for date, ret in returns_series.items():
-        # 수익률에 따라 자산 가치 업데이트
-        current_capital *= (1 + ret)
-        
-        # 추가 투자일인 경우, 해당 월의 추가 투자금 입금
-        if date in contribution_dates_set and monthly_contribution > 0:
-            current_capital += monthly_contribution
-            
-        portfolio_values.append(current_capital)
-    
-    return pd.Series(portfolio_values, index=returns_series.index)
-
-# --- 👇 [신규 추가] 그래프용 전체 기간 모멘텀 계산 함수 ---
-def calculate_full_momentum(prices, config):
-    """그래프 표시를 위해 전체 기간에 대한 모멘텀 점수를 계산하는 함수"""
-    mom_type = config['momentum_params']['type']
-    
-    if mom_type == '13612U':
-        mom_periods = [1, 3, 6, 12]
-    else:
-        mom_periods = config['momentum_params'].get('periods', [1, 3, 6, 12])
-
-    # 각 기간별 수익률을 계산 (근사치: 1개월 ≈ 21 거래일)
-    returns_dfs = []
-    for month in mom_periods:
-        # shift를 사용하여 과거 가격 대비 수익률 계산
-        returns_dfs.append(prices.pct_change(periods=month * 21).fillna(0))
-        
-    # 모든 기간의 수익률을 합산하여 평균
-    if not returns_dfs:
-        return pd.DataFrame(0, index=prices.index, columns=prices.columns)
-        
-    full_momentum_scores = sum(returns_dfs) / len(returns_dfs)
-    return full_momentum_scores
-
-def calculate_signals(prices, config):
-    prices_copy = prices.copy()
-    day_option = 'last' if config['rebalance_day'] == '월말' else 'first'
-    if config['rebalance_freq'] == '분기별':
-        prices_copy['year_quarter'] = prices_copy.index.to_period('Q').strftime('%Y-Q%q')
-        rebal_dates = prices_copy.drop_duplicates('year_quarter', keep=day_option).index
-    else: # 월별
-        prices_copy['year_month'] = prices_copy.index.strftime('%Y-%m')
-        rebal_dates = prices_copy.drop_duplicates('year_month', keep=day_option).index
-
-    momentum_scores = pd.DataFrame(index=rebal_dates, columns=prices.columns)
-    mom_type = config['momentum_params']['type']
-
-    # --- CHANGED: '13612U' 선택 시 기간을 고정하도록 수정 ---
-    if mom_type == '13612U':
-        mom_periods = [1, 3, 6, 12]
-    else:
-        mom_periods = config['momentum_params']['periods']
-
-    # --- CHANGED: '13612U'와 '평균 모멘텀' 로직 통합 및 '절대 모멘텀' 삭제 ---
-    if mom_type in ['13612U', '평균 모멘텀']:
-        for date in rebal_dates:
-            returns = []
-            for month in mom_periods:
-                past_date = date - pd.DateOffset(months=month)
-                if past_date < prices.index[0]:
-                    returns.append(pd.Series(0.0, index=prices.columns))
-                    continue
-                past_price_idx = prices.index.get_indexer([past_date], method='nearest')[0]
-                returns.append(prices.loc[date] / prices.iloc[past_price_idx] - 1)
-            if returns:
-                valid_returns = [r for r in returns if not r.empty]
-                if valid_returns: momentum_scores.loc[date] = sum(valid_returns) / len(valid_returns)
-                else: momentum_scores.loc[date] = 0.0
-    
-    elif mom_type == '상대 모멘텀':
-        if not mom_periods: st.error("모멘텀 기간이 설정되지 않았습니다."); return pd.DataFrame()
-        period_days = mom_periods[0] * 21 
-        momentum_scores = prices.pct_change(periods=period_days)
-        momentum_scores = momentum_scores.loc[rebal_dates].fillna(0)
-            
-    return momentum_scores.astype(float)
-
-def construct_portfolio(momentum_scores, config, successful_tickers):
-    canary_assets = [t for t in config['tickers']['CANARY'] if t in successful_tickers]
-    aggressive_assets = [t for t in config['tickers']['AGGRESSIVE'] if t in successful_tickers]
-    defensive_assets = [t for t in config['tickers']['DEFENSIVE'] if t in successful_tickers]
-    params = config['portfolio_params']
-    target_weights = pd.DataFrame(index=momentum_scores.index, columns=momentum_scores.columns).fillna(0.0)
-    investment_mode = pd.Series(index=momentum_scores.index, dtype=str)
-
-    for date in momentum_scores.index:
-        best_defensive_assets = []
-        if defensive_assets:
-            best_defensive_scores = momentum_scores.loc[date, defensive_assets].dropna()
-            if not best_defensive_scores.empty:
-                best_defensive_assets = best_defensive_scores.nlargest(params['top_n_defensive']).index.tolist()
-        
-        is_risk_on = True
-        if params['use_canary'] and canary_assets:
-            canary_score = momentum_scores.loc[date, canary_assets].mean()
-            if canary_score <= 0: is_risk_on = False
-
-        if is_risk_on:
-            investment_mode.loc[date] = 'Aggressive'
-            top_aggressive_assets = momentum_scores.loc[date, aggressive_assets].dropna().nlargest(params['top_n_aggressive'])
-            if not top_aggressive_assets.empty:
-                weight_per_asset = 1.0 / len(top_aggressive_assets)
-                for asset in top_aggressive_assets.index:
-                    if params['use_hybrid_protection'] and momentum_scores.loc[date, asset] <= 0:
-                        if best_defensive_assets:
-                            for def_asset in best_defensive_assets:
-                                target_weights.loc[date, def_asset] += weight_per_asset / len(best_defensive_assets)
-                    else:
-                        target_weights.loc[date, asset] = weight_per_asset
-            else: 
-                investment_mode.loc[date] = 'Defensive'
-                if best_defensive_assets:
-                    for def_asset in best_defensive_assets:
-                        target_weights.loc[date, def_asset] = 1.0 / len(best_defensive_assets)
-        else:
-            investment_mode.loc[date] = 'Defensive'
-            if best_defensive_assets:
-                for def_asset in best_defensive_assets:
-                    target_weights.loc[date, def_asset] = 1.0 / len(best_defensive_assets)
-                
-    return target_weights, investment_mode
-
-def get_mdd_details(series):
-    rolling_max = series.cummax()
-    drawdown = (series - rolling_max) / rolling_max
-    mdd_value = drawdown.min()
-    mdd_end_date = drawdown.idxmin()
-    pre_trough_series = series.loc[:mdd_end_date]
-    mdd_start_date = pre_trough_series.idxmax()
-    return mdd_value, mdd_start_date, mdd_end_date
-
 def format_large_number(num, symbol='$'):
     """금액의 크기에 따라 K, M, B 단위를 붙여주는 함수"""
     if abs(num) >= 1_000_000_000:
@@ -646,26 +499,117 @@ def format_large_number(num, symbol='$'):
         return f"{symbol}{num:,.0f}"
     
 
-def get_saved_results(directory="backtest_results"):
-    """저장된 결과 파일 목록과 표시용 이름을 반환하는 함수"""
-    if not os.path.exists(directory) or not os.listdir(directory):
-        return {} # 반환값을 딕셔너리로 통일
-        
-    file_list = [f for f in os.listdir(directory) if f.endswith('.pkl')]
-    
-    results_map = {}
-    for f in sorted(file_list, reverse=True):
-        try:
-            # --- 이 부분을 수정합니다 (날짜 포맷 일치) ---
-            parts = f.replace('.pkl', '').split('_', 1)
-            date_str = datetime.strptime(parts[0], '%Y%m%d%H%M%S').strftime('%Y-%m-%d')
-            name = parts[1]
-            display_name = f"{name} ({date_str})"
-            results_map[f] = display_name
-        except (IndexError, ValueError):
-            continue
-            
-    return results_map
+# --- [수정] 보관함 폴더 (목록은 SQLite 카탈로그(quantest_catalog)에서 조회하며, 동기화는 탭2에서 세션마다 한 번) ---
+RESULTS_DIR = "backtest_results"
+
+# --- [추가] 결과 파일(.qtr) 바이트 캐시 ---
+# 다운로드 버튼은 화면이 다시 그려질 때마다 데이터를 요구하므로, 같은 결과 객체는 한 번만 변환합니다.
+def get_result_file_bytes(results):
+    """결과를 .qtr 바이트로 변환하는 함수 (같은 결과 객체는 session_state에 캐시된 값 사용)"""
+    cached = st.session_state.get('result_file_cache')
+    if cached is None or cached[0] is not results:
+        cached = (results, dump_result_bytes(results))
+        st.session_state.result_file_cache = cached
+    return cached[1]
+
+# --- [추가] 렌더링된 그래프 캐시 ---
+# 저장 이름 입력 등 결과와 무관한 위젯 조작으로 화면이 다시 그려질 때, 그래프를 새로 그리지 않고
+# (결과 지문 + 그래프 설정)을 키로 저장해 둔 PNG 바이트(matplotlib) 또는 Figure(Plotly)를 재사용합니다.
+# 결과마다 한 번 만들면 되는 화면용 표(이름을 붙인 보유 내역 등)도 같은 캐시에 보관합니다.
+FIGURE_CACHE_MAX_ITEMS = 64
+
+def get_result_fingerprint(results):
+    """결과 지문을 반환하는 함수 (같은 결과 객체는 session_state에 캐시된 값 사용)"""
+    cached = st.session_state.get('result_fingerprint_cache')
+    if cached is None or cached[0] is not results:
+        cached = (results, result_fingerprint(results))
+        st.session_state.result_fingerprint_cache = cached
+    return cached[1]
+
+def cached_figure(key, render):
+    """key에 해당하는 렌더링 결과가 있으면 재사용하고, 없으면 render()로 만들어 저장하는 함수"""
+    if 'figure_cache' not in st.session_state:
+        st.session_state.figure_cache = OrderedDict()
+    cache = st.session_state.figure_cache
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    cache[key] = render()
+    while len(cache) > FIGURE_CACHE_MAX_ITEMS:
+        cache.popitem(last=False)
+    return cache[key]
+
+def shade_regime_segments(ax, segments, colors, alpha=0.3):
+    """구간 표(start/end/value)에서 colors에 있는 값의 구간을 값마다 하나의 컬렉션으로 배경 음영 처리하는 함수"""
+    starts = mdates.date2num(segments['start'])
+    widths = mdates.date2num(segments['end']) - starts
+    values = segments['value'].to_numpy()
+    for value, color in colors.items():
+        mask = values == value
+        if mask.any():
+            # y 범위는 축 비율(0~1)로 지정하여 axvspan처럼 세로 전체를 칠합니다.
+            ax.broken_barh(np.column_stack([starts[mask], widths[mask]]), (0, 1), transform=ax.get_xaxis_transform(),
+                           facecolor=color, alpha=alpha, linewidth=0)
+
+def figure_to_png(fig):
+    """matplotlib 그래프를 st.pyplot과 같은 설정의 PNG 바이트로 변환하고 닫는 함수"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=200)
+    plt.close(fig)
+    return buffer.getvalue()
+
+# --- [추가] 긴 표를 기간 필터 + 페이지 단위로 표시 ---
+# 전체 기간 표를 한 번에 그리거나 스타일을 입히지 않고, 선택한 기간의 한 페이지만 화면에 보냅니다.
+def show_paginated_table(table, key, style=None, page_sizes=(12, 24, 60, 120)):
+    """날짜 인덱스 표를 기간으로 거르고 현재 페이지만 표시하는 함수 (style은 페이지 표에만 적용할 함수)"""
+    if table.empty:
+        st.dataframe(table)
+        return
+    first_date, last_date = table.index.min().date(), table.index.max().date()
+    col_range, col_size, col_page = st.columns([2, 1, 1])
+    date_range = col_range.date_input(
+        "조회 기간", value=(first_date, last_date), min_value=first_date, max_value=last_date, key=f"{key}_range"
+    )
+    # 기간의 끝을 아직 고르지 않은 경우에는 시작일만 적용합니다.
+    range_start, range_end = (date_range + (last_date,))[:2] if isinstance(date_range, tuple) else (date_range, last_date)
+    dates = table.index.normalize()
+    filtered = table[(dates >= pd.Timestamp(range_start)) & (dates <= pd.Timestamp(range_end))]
+
+    page_size = col_size.selectbox("페이지당 행 수", page_sizes, index=1, key=f"{key}_page_size")
+    pages = max(1, -(-len(filtered) // page_size))
+    page_no = col_page.number_input(f"페이지 (전체 {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    page = filtered.iloc[(min(page_no, pages) - 1) * page_size:min(page_no, pages) * page_size]
+    st.dataframe(style(page) if style is not None and not page.empty else page, use_container_width=True)
+    st.caption(f"조회 기간의 {len(filtered)}행 중 {len(page)}행 표시")
+
+# 앱이 재실행될 때마다 현재 설정을 가져옴
+current_config = gather_current_config()
+
+# --- [추가] 초기 투자금/월별 추가 투자금만 바뀐 경우, 백테스트 재실행 없이 결과를 즉시 갱신 ---
+if st.session_state.get('results') and 'dca_units' in st.session_state['results']:
+    results_config = st.session_state['results'].get('config', {})
+    if results_config != current_config and is_dca_only_change(results_config, current_config):
+        st.session_state['results'] = apply_dca_scenario(
+            st.session_state['results'], current_config['initial_capital'], current_config['monthly_contribution']
+        )
+        # 마지막 실행 설정도 함께 갱신하여 '설정 변경' 알림이 뜨지 않도록 합니다.
+        if st.session_state.get('last_run_config') == results_config:
+            st.session_state.last_run_config = current_config
+
+
+# 마지막 실행 설정이 있고, 현재 설정과 다를 경우 '변경됨' 플래그를 True로 설정
+if 'last_run_config' in st.session_state:
+    settings_are_different = (st.session_state.last_run_config != current_config)
+    st.session_state.settings_changed = settings_are_different
+
+    # 설정이 변경되었고, 아직 토스트 알림을 보여주지 않았다면
+    if settings_are_different and not st.session_state.get('toast_shown', False):
+        st.toast("⚙️ 설정이 변경되었습니다!", icon="💡")
+        st.session_state.toast_shown = True # 알림을 보여줬다고 기록
+else:
+    st.session_state.settings_changed = False
+
+# --- 사이드바 설정 변경 감지 로직 끝 ---
 
 # -----------------------------------------------------------------------------
 # 3. 메인 화면 구성 및 백테스트 실행
@@ -704,131 +648,19 @@ if run_button_clicked:
     # config 변수를 current_config로 대체하거나 그대로 사용
     config = current_config 
     
-    all_tickers = sorted(list(set(aggressive_tickers + defensive_tickers + canary_tickers + [benchmark_ticker])))
-    
-    if any(ticker.endswith('.KS') for ticker in all_tickers):
-        currency_symbol = '₩'
-    else:
-        currency_symbol = '$'
-    
+    # --- [수정] 단계별 파이프라인을 세션에 보관하여, 바뀐 설정에 해당하는 단계부터만 다시 계산합니다 ---
+    # (예: 거래 비용만 바꾸면 수익률/성과만, 공격 자산 개수만 바꾸면 데이터 다운로드와 시그널 계산은 건너뜀)
+    if 'backtest_pipeline' not in st.session_state:
+        st.session_state.backtest_pipeline = BacktestPipeline(price_loader=get_price_data)
     
     with st.spinner('데이터 로딩 및 백테스트 실행 중...'):
-        # 1. 실제 데이터 요청 시작일을 동적으로 계산
-        # 모멘텀 계산에 필요한 최대 기간을 확인합니다.
-        mom_type = config['momentum_params']['type']
-        mom_periods = config['momentum_params']['periods']
-
-        if mom_type == '13612U':
-            # 13612U는 최대 12개월 수익률을 사용합니다.
-            max_momentum_period = 12
-        elif mom_periods:
-            # '평균 모멘텀' 또는 '상대 모멘텀'의 경우, 설정된 기간 중 가장 긴 값을 사용합니다.
-            max_momentum_period = max(mom_periods)
-        else:
-            # 예외적인 경우 (기간이 설정되지 않음)를 대비해 기본값 12개월을 사용합니다.
-            max_momentum_period = 12
-
-        # 백테스트 시작일로부터 최대 모멘텀 기간만큼 이전 날짜를 데이터 요청 시작일로 설정합니다.
-        data_fetch_start_date = pd.to_datetime(config['start_date']) - pd.DateOffset(months=max_momentum_period)
-        
-        # 2. 계산된 시작일로 데이터를 요청합니다.
-        prices, failed_tickers, culprit_tickers = get_price_data(all_tickers, data_fetch_start_date, config['end_date'], config['start_date'])
-                
-        if prices is None:
-            st.error("데이터 로딩에 실패하여 백테스트를 중단합니다.")
-            st.stop()
-
-        momentum_scores = calculate_signals(prices, config)
-        if momentum_scores.empty: st.error("모멘텀 시그널 계산에 실패했습니다."); st.stop()
-        
-        target_weights, investment_mode = construct_portfolio(momentum_scores, config, prices.columns.tolist())
-        
-        returns_freq = config['backtest_type'].split(' ')[0]
-        if returns_freq == '월별':
-            rebal_dates = momentum_scores.index
-            prices_rebal = prices.loc[rebal_dates]
-            returns_rebal = prices_rebal.pct_change()
-            turnover = (target_weights.shift(1) - target_weights).abs().sum(axis=1) / 2
-            costs = turnover * config['transaction_cost']
-            portfolio_returns = (target_weights.shift(1) * returns_rebal).sum(axis=1) - costs
-            portfolio_returns = portfolio_returns.fillna(0)
-            benchmark_returns = returns_rebal[config['benchmark']].fillna(0)
-        else: # 일별
-            daily_weights = target_weights.reindex(prices.index, method='ffill').fillna(0)
-            rebal_dates_series = pd.Series(index=prices.index, data=False)
-            rebal_dates_series.loc[target_weights.index] = True
-            turnover = (daily_weights.shift(1) - daily_weights).abs().sum(axis=1) / 2
-            costs = turnover * config['transaction_cost']
-            daily_returns = prices.pct_change().fillna(0)
-            portfolio_returns = (daily_weights.shift(1) * daily_returns).sum(axis=1) - costs.where(rebal_dates_series, 0)
-            benchmark_returns = daily_returns[config['benchmark']]
-
-        # 워밍업 기간(사전 로딩 기간)의 수익률 데이터를 제거합니다.
-        start_date_dt = pd.to_datetime(config['start_date'])
-        portfolio_returns = portfolio_returns[portfolio_returns.index >= start_date_dt]
-        benchmark_returns = benchmark_returns[benchmark_returns.index >= start_date_dt]
-        
-        contribution_dates = target_weights.index
-        cumulative_returns = calculate_cumulative_returns_with_dca(portfolio_returns, config['initial_capital'], config['monthly_contribution'], contribution_dates)
-        benchmark_cumulative = calculate_cumulative_returns_with_dca(benchmark_returns, config['initial_capital'], config['monthly_contribution'], contribution_dates)
-        
-        initial_cap = config['initial_capital']
-        strategy_growth = (1 + portfolio_returns).cumprod() * initial_cap
-        benchmark_growth = (1 + benchmark_returns).cumprod() * initial_cap
+        try:
+            results = st.session_state.backtest_pipeline.run(config)
+        except BacktestError as e:
+            st.error(str(e)); st.stop()
 
-        strategy_dd = (strategy_growth / strategy_growth.cummax() - 1)
-        benchmark_dd = (benchmark_growth / benchmark_growth.cummax() - 1)
-                
-        first_valid_date = cumulative_returns.first_valid_index()
-        years = (cumulative_returns.index[-1] - first_valid_date).days / 365.25 if first_valid_date is not None else 0
-        
-        cagr, bm_cagr, mdd, bm_mdd, volatility, bm_volatility, sharpe_ratio, bm_sharpe_ratio, win_rate, bm_win_rate = (0,)*10
-        if years > 0:
-            cagr = (strategy_growth.iloc[-1]/initial_cap)**(1/years) - 1
-            bm_cagr = (benchmark_growth.iloc[-1]/initial_cap)**(1/years) - 1
-            mdd, mdd_start, mdd_end = get_mdd_details(strategy_growth)
-            bm_mdd, bm_mdd_start, bm_mdd_end = get_mdd_details(benchmark_growth)
-            trading_periods = 12 if returns_freq == '월별' else 252
-            rf_rate = config['risk_free_rate']
-            volatility = portfolio_returns.std() * np.sqrt(trading_periods)
-            bm_volatility = benchmark_returns.std() * np.sqrt(trading_periods)
-            sharpe_ratio = (cagr - rf_rate) / volatility if volatility != 0 else 0
-            bm_sharpe_ratio = (bm_cagr - rf_rate) / bm_volatility if bm_volatility != 0 else 0
-            win_rate = (portfolio_returns > 0).sum() / len(portfolio_returns) if len(portfolio_returns) > 0 else 0
-            bm_win_rate = (benchmark_returns > 0).sum() / len(benchmark_returns) if len(benchmark_returns) > 0 else 0
-
-        total_months = len(target_weights.index)
-        num_contributions = total_months - 1 if total_months > 0 else 0
-        
-        st.session_state['results'] = {
-            'prices': prices, 'failed_tickers': failed_tickers, 'culprit_tickers': culprit_tickers,
-            'max_momentum_period': max_momentum_period, # 계산된 최대 모멘텀 기간을 결과에 추가
-            'config': config, 'currency_symbol': currency_symbol, 'etf_df': etf_df,
-            'momentum_scores': momentum_scores,
-            'timeseries': {
-                'portfolio_value': cumulative_returns,
-                'benchmark_value': benchmark_cumulative,
-                'strategy_growth': strategy_growth,
-                'benchmark_growth': benchmark_growth,
-                'strategy_drawdown': strategy_dd,
-                'benchmark_drawdown': benchmark_dd
-            },
-            'investment_mode': investment_mode, 'target_weights': target_weights, 'initial_cap': initial_cap,
-            'metrics': {
-                'final_assets': cumulative_returns.iloc[-1],
-                'total_contribution': config['initial_capital'] + (config['monthly_contribution'] * num_contributions),
-                'total_profit': cumulative_returns.iloc[-1] - (config['initial_capital'] + (config['monthly_contribution'] * num_contributions)),
-                'cagr': cagr, 'mdd': mdd, 'mdd_start': mdd_start, 'mdd_end': mdd_end,
-                'volatility': volatility, 'sharpe_ratio': sharpe_ratio, 'win_rate': win_rate,
-                'bm_final_assets': benchmark_cumulative.iloc[-1],
-                'bm_total_contribution': config['initial_capital'] + (config['monthly_contribution'] * num_contributions),
-                'bm_total_profit': benchmark_cumulative.iloc[-1] - (config['initial_capital'] + (config['monthly_contribution'] * num_contributions)),
-                'bm_cagr': bm_cagr, 'bm_mdd': bm_mdd, 'bm_mdd_start': bm_mdd_start, 'bm_mdd_end': bm_mdd_end,
-                'bm_volatility': bm_volatility, 'bm_sharpe_ratio': bm_sharpe_ratio, 'bm_win_rate': bm_win_rate,
-            },
-            'portfolio_returns': portfolio_returns,
-            'benchmark_returns': benchmark_returns
-        }
+        results['etf_df'] = etf_df
+        st.session_state['results'] = results
         
         if 'backtest_save_name' in st.session_state:
             del st.session_state.backtest_save_name
@@ -846,21 +678,21 @@ if run_button_clicked:
     st.rerun()
 
 # --- 탭과 결과 표시는 '백테스트 실행' 버튼 블록 바깥에 위치 ---
-tab1, tab2 = st.tabs(["🚀 새로운 백테스트 결과", "📊 저장된 결과 비교"])
+tab1, tab2, tab3 = st.tabs(["🚀 새로운 백테스트 결과", "📊 저장된 결과 비교", "🧪 파라미터 스윕"])
 
 with tab1:
     st.header("🚀 백테스트 결과")
     st.divider()
 
-    # --- .pkl 파일 업로드 기능 ---
-    st.subheader("저장된 .pkl 파일 결과 보기")
+    # --- 결과 파일(.qtr, 예전 .pkl) 업로드 기능 ---
+    st.subheader("저장된 결과 파일 보기")
     # --- [수정] 파일 업로더의 key를 동적으로 변경하도록 설정 ---
     if 'uploader_key' not in st.session_state:
         st.session_state.uploader_key = 0
 
     uploaded_file_tab1 = st.file_uploader(
-        "상세 결과를 보고 싶은 .pkl 파일을 업로드하세요.",
-        type=['pkl'],
+        "상세 결과를 보고 싶은 결과 파일(.qtr 또는 예전 .pkl)을 업로드하세요.",
+        type=[ext.lstrip('.') for ext in RESULT_FILE_EXTENSIONS],
         key=f"uploader_tab1_{st.session_state.uploader_key}" # key를 동적으로 만듭니다.
     )
 
@@ -871,7 +703,11 @@ with tab1:
             
             if current_file_id != st.session_state.get('last_uploaded_file_id'):
                 try:
-                    loaded_data = pickle.load(uploaded_file_tab1)
+                    # --- [수정] .qtr 파일은 헤더만 읽고, 시계열은 화면에서 처음 사용할 때 읽습니다 ---
+                    loaded_data = load_result_bytes(uploaded_file_tab1.getvalue())
+                    # 결과 파일에는 티커 목록(etf_df)이 없으므로 현재 목록을 채워 넣습니다.
+                    if 'etf_df' not in loaded_data:
+                        loaded_data['etf_df'] = etf_df
                     st.session_state['results'] = loaded_data
                     st.session_state.last_uploaded_file_id = current_file_id
                     st.session_state.source = 'file'
@@ -903,7 +739,7 @@ with tab1:
         prices = results['prices']
         failed_tickers = results['failed_tickers']
         culprit_tickers = results.get('culprit_tickers', [results.get('culprit_ticker')])
-        config = results['config']; currency_symbol = results['currency_symbol']; etf_df = results['etf_df']
+        config = results['config']; currency_symbol = results['currency_symbol']
         
         timeseries = results['timeseries']
         cumulative_returns = timeseries['portfolio_value']
@@ -923,6 +759,24 @@ with tab1:
                 display_config['end_date'] = display_config['end_date'].strftime('%Y-%m-%d')
             display_config.pop('tickers', None)
             st.json(display_config)
+
+        # --- [추가] 워크포워드 결과: 구간별로 선택된 조합 ---
+        if 'walk_forward' in results:
+            walk_forward = results['walk_forward']
+            with st.expander("🔁 워크포워드 구간별 선택 조합", expanded=True):
+                st.caption(
+                    f"인샘플 {walk_forward['in_sample_months']}개월 / 아웃오브샘플 {walk_forward['out_of_sample_months']}개월, "
+                    f"선택 기준: {WALK_FORWARD_OBJECTIVES[walk_forward['objective']]}. 아래 모든 결과는 아웃오브샘플 구간만 이어 붙인 것입니다."
+                )
+                if walk_forward.get('failed_combos'):
+                    st.warning(f"{walk_forward['failed_combos']}개 조합은 실행에 실패하여 후보에서 제외되었습니다.")
+                st.dataframe(
+                    walk_forward['windows'].style.format({
+                        'in_sample_start': lambda d: d.strftime('%Y-%m-%d'), 'out_of_sample_start': lambda d: d.strftime('%Y-%m-%d'),
+                        'out_of_sample_end': lambda d: d.strftime('%Y-%m-%d'), 'score': "{:.2f}",
+                    }),
+                    use_container_width=True
+                )
         
 
         st.header("1. 데이터 로딩 정보")
@@ -950,12 +804,7 @@ with tab1:
         if culprit_tickers:
             culprit_names = []
             for ticker in culprit_tickers:
-                name = ticker
-                if etf_df is not None:
-                    match = etf_df[etf_df['Ticker'] == ticker]
-                    if not match.empty:
-                        name = match.iloc[0]['Name']
-                culprit_names.append(f"'{name}'({ticker})")
+                culprit_names.append(f"'{symbols.name(ticker)}'({ticker})")
         
             if len(culprit_tickers) == 1:
                 culprits_str = culprit_names[0]
@@ -990,15 +839,7 @@ with tab1:
         
         with st.expander("데이터 미리보기 (최근 5일)"):
             display_df = prices.tail().copy()
-            new_column_names = []
-            for ticker in display_df.columns:
-                full_name = ticker
-                if etf_df is not None:
-                    match = etf_df[etf_df['Ticker'] == ticker]
-                    if not match.empty: 
-                        full_name = match.iloc[0]['Name']
-                new_column_names.append(full_name)
-            display_df.columns = new_column_names
+            display_df.columns = [symbols.name(ticker) for ticker in display_df.columns]
             st.dataframe(display_df.style.format("{:,.0f}"))
             
         st.subheader("사용한 자산군 정보")
@@ -1008,13 +849,7 @@ with tab1:
         benchmark_ticker = config.get('benchmark')
         if benchmark_ticker:
             st.markdown("**벤치마크**")
-            benchmark_name = benchmark_ticker
-            if etf_df is not None:
-                match = etf_df[etf_df['Ticker'] == benchmark_ticker]
-                if not match.empty:
-                    benchmark_name = match.iloc[0]['Name']
-            
-            display_benchmark = f"{benchmark_ticker} - {benchmark_name}" if benchmark_ticker != benchmark_name else benchmark_ticker
+            display_benchmark = symbols.label(benchmark_ticker)
             
             # --- [수정] 아래 div의 style에 margin-bottom을 추가하여 간격을 줍니다 ---
             st.markdown(
@@ -1023,21 +858,12 @@ with tab1:
             )
         
         # 티커 리스트를 '티커 - 전체이름' 형식의 문자열 리스트로 변환하는 헬퍼 함수
-        def format_asset_list(ticker_list, df):
+        def format_asset_list(ticker_list):
             if not ticker_list:
                 return "없음"
             
-            formatted_items = []
-            for ticker in ticker_list:
-                full_name = ticker  # 기본값은 티커로 설정
-                if df is not None:
-                    match = df[df['Ticker'] == ticker]
-                    if not match.empty:
-                        full_name = match.iloc[0]['Name']
-                
-                # 티커와 이름이 다를 경우에만 " - "로 연결
-                display_item = f"{ticker} - {full_name}" if ticker != full_name else ticker
-                formatted_items.append(display_item)
+            # 티커와 이름이 다를 경우에만 " - "로 연결 (이름은 종목 색인에서 조회)
+            formatted_items = [symbols.label(ticker) for ticker in ticker_list]
             
             # 각 항목을 쉼표와 줄바꿈으로 연결하여 가독성 향상
             return ", \n".join(formatted_items)
@@ -1048,11 +874,11 @@ with tab1:
         defensive_list = config_tickers.get('DEFENSIVE', [])
         
         st.markdown("**카나리아**")
-        st.info(format_asset_list(canary_list, etf_df))
+        st.info(format_asset_list(canary_list))
         st.markdown("**공격 자산**")
-        st.success(format_asset_list(aggressive_list, etf_df))
+        st.success(format_asset_list(aggressive_list))
         st.markdown("**방어 자산**")
-        st.warning(format_asset_list(defensive_list, etf_df))
+        st.warning(format_asset_list(defensive_list))
 
         # [추가] 사용한 시그널 설정 정보 표시
         with st.expander("사용한 시그널 설정"):
@@ -1108,84 +934,51 @@ with tab1:
         if prices is None or config is None:
             st.warning("그래프를 그리는데 필요한 데이터(가격, 설정)가 결과에 포함되지 않았습니다.")
         else:
-            # 2. 그래프용 전체 기간 모멘텀 계산 (헬퍼 함수 사용)
-            full_momentum_scores = calculate_full_momentum(prices, config)
-        
-            # 3. 사용자의 '백테스트 기준'과 '리밸런싱 기준일'에 따라 데이터 가공
-            backtest_type = config.get('backtest_type', '일별')
-            rebalance_day = config.get('rebalance_day', '월말') # '월초'/'월말' 설정 가져오기
-        
-            if backtest_type == '월별':
-                if rebalance_day == '월초':
-                    # 월초 기준: 월 시작(Month Start)의 첫번째 데이터로 리샘플링
-                    display_momentum = full_momentum_scores.resample('MS').first()
-                    display_prices = prices.resample('MS').first()
-                    #st.caption("월별 백테스트 기준: '월초' 설정이 적용되어 표시됩니다.")
-                else: # '월말'
-                    # 월말 기준: 월 끝(Month End)의 마지막 데이터로 리샘플링
-                    display_momentum = full_momentum_scores.resample('M').last()
-                    display_prices = prices.resample('M').last()
-                    #st.caption("월별 백테스트 기준: '월말' 설정이 적용되어 표시됩니다.")
-            else: # '일별'
-                display_momentum = full_momentum_scores
-                display_prices = prices
-                #st.caption("일별 백테스트 기준: 일별 데이터로 표시됩니다.")
-        
-            # 4. 표시할 데이터 시리즈 추출
             canary_tickers = config['tickers']['CANARY']
             benchmark_ticker = config['benchmark']
         
-            if canary_tickers and benchmark_ticker in display_prices.columns:
-                canary_momentum = display_momentum[canary_tickers].mean(axis=1)
-                benchmark_price = display_prices[benchmark_ticker]
-        
-                # 5. 이중 축 그래프 그리기 (이하 동일)
-                fig_mom, ax_mom = plt.subplots(figsize=(10, 5))
-                ax_price = ax_mom.twinx()
-        
-                # 왼쪽 축: 카나리아 모멘텀
-                ax_mom.plot(canary_momentum.index, canary_momentum, 
-                            label=f'Canary Momentum ({",".join(canary_tickers)})', 
-                            color='blue', linewidth=1.0)
-                ax_mom.set_ylabel('카나리아 모멘텀 점수', fontsize=12)
-                ax_mom.tick_params(axis='y')
-        
-                # 오른쪽 축: 벤치마크 가격
-                ax_price.plot(benchmark_price.index, benchmark_price, 
-                              label=f'Benchmark Price ({benchmark_ticker})', 
-                              color='grey', linewidth=1.0)
-                ax_price.set_ylabel(f'{benchmark_ticker} 가격', fontsize=12)
-                ax_price.tick_params(axis='y')
-
-                # --- [추가] 카나리아 모멘텀이 0 이상인 구간에 배경 음영 추가 ---
-                # 1. 모멘텀이 0 이상인 구간을 True, 아니면 False로 표시
-                is_positive = canary_momentum >= 0
-                # 2. True인 구간들의 시작과 끝을 찾아 axvspan으로 배경색을 칠함
-                start_date = None
-                for i in range(len(is_positive)):
-                    # 현재 시점에 0 이상이고, 이전 시점에는 0 미만이었거나 첫 시작이면 -> 상승 구간 시작
-                    if is_positive[i] and (i == 0 or not is_positive[i-1]):
-                        start_date = canary_momentum.index[i]
-                    # 현재 시점에 0 미만이고, 이전 시점에 0 이상이었으면 -> 상승 구간 끝
-                    elif not is_positive[i] and (i > 0 and is_positive[i-1]) and start_date:
-                        end_date = canary_momentum.index[i]
-                        ax_mom.axvspan(start_date, end_date, facecolor='lightgreen', alpha=0.3)
-                        start_date = None
-                # 마지막까지 상승 구간이 이어졌을 경우 처리
-                if start_date:
-                    ax_mom.axvspan(start_date, canary_momentum.index[-1], facecolor='lightgreen', alpha=0.3)
-                # --- 추가 로직 끝 ---   
-        
-                ax_mom.axhline(0, color='red', linestyle=':', linewidth=1.0)
-                ax_mom.set_title('카나리아 모멘텀 vs. 벤치마크 가격', fontsize=16)
-                ax_mom.set_xlabel('Date', fontsize=12)
-                ax_mom.grid(True, which="both", ls="--", linewidth=0.5)
-        
-                lines, labels = ax_mom.get_legend_handles_labels()
-                lines2, labels2 = ax_price.get_legend_handles_labels()
-                ax_mom.legend(lines + lines2, labels + labels2, loc='upper left')
+            if canary_tickers and benchmark_ticker in prices.columns:
+                # --- [수정] 같은 결과에 대해서는 모멘텀 계산과 그래프 렌더링을 다시 하지 않습니다 ---
+                def render_canary_chart():
+                    # 2. 그래프용 전체 기간 모멘텀 계산 ('백테스트 기준'과 '리밸런싱 기준일'에 따라 리샘플링)
+                    canary_momentum, benchmark_price = get_canary_chart_series(prices, config)
+        
+                    # 3. 이중 축 그래프 그리기
+                    fig_mom, ax_mom = plt.subplots(figsize=(10, 5))
+                    ax_price = ax_mom.twinx()
+        
+                    # 왼쪽 축: 카나리아 모멘텀
+                    ax_mom.plot(*downsample_series(canary_momentum, chart_max_points), 
+                                label=f'Canary Momentum ({",".join(canary_tickers)})', 
+                                color='blue', linewidth=1.0)
+                    ax_mom.set_ylabel('카나리아 모멘텀 점수', fontsize=12)
+                    ax_mom.tick_params(axis='y')
+        
+                    # 오른쪽 축: 벤치마크 가격
+                    ax_price.plot(*downsample_series(benchmark_price, chart_max_points), 
+                                  label=f'Benchmark Price ({benchmark_ticker})', 
+                                  color='grey', linewidth=1.0)
+                    ax_price.set_ylabel(f'{benchmark_ticker} 가격', fontsize=12)
+                    ax_price.tick_params(axis='y')
+
+                    # --- [수정] 카나리아 모멘텀이 0 이상인 구간에 배경 음영 추가 (구간마다 axvspan 대신 한 번에 그림) ---
+                    segments = (results.get('regime_segments') or {}).get('canary_positive')
+                    if segments is None:
+                        segments = get_regime_segments(canary_momentum >= 0)
+                    shade_regime_segments(ax_mom, segments, {True: 'lightgreen'})
+        
+                    ax_mom.axhline(0, color='red', linestyle=':', linewidth=1.0)
+                    ax_mom.set_title('카나리아 모멘텀 vs. 벤치마크 가격', fontsize=16)
+                    ax_mom.set_xlabel('Date', fontsize=12)
+                    ax_mom.grid(True, which="both", ls="--", linewidth=0.5)
+        
+                    lines, labels = ax_mom.get_legend_handles_labels()
+                    lines2, labels2 = ax_price.get_legend_handles_labels()
+                    ax_mom.legend(lines + lines2, labels + labels2, loc='upper left')
                 
-                st.pyplot(fig_mom)
+                    return figure_to_png(fig_mom)
+
+                st.image(cached_figure(('canary', get_result_fingerprint(results), chart_max_points), render_canary_chart), use_container_width=True)
             else:
                 st.warning("카나리아 또는 벤치마크 자산 데이터를 찾을 수 없습니다.")
 
@@ -1218,69 +1011,36 @@ with tab1:
                     #start_date = end_date - pd.DateOffset(months=12)
                     #recent_scores = scores_to_display[scores_to_display.index >= start_date]
                     #sorted_recent_scores = recent_scores.sort_index(ascending=False)
-                    sorted_recent_scores = scores_to_display.sort_index(ascending=False)
-                    
-                    if not sorted_recent_scores.empty:
-                        # --- ▼▼▼ 테이블 컬럼 이름 변경 로직 추가 ▼▼▼ ---
-                        df_to_display = sorted_recent_scores.copy()
-                        
-                        # Stock_list.csv 정보가 있을 경우, 컬럼 이름을 전체 이름으로 변경
-                        if etf_df is not None:
-                            # Ticker를 키로, Name을 값으로 하는 딕셔너리 생성
-                            ticker_to_name_map = pd.Series(etf_df.Name.values, index=etf_df.Ticker).to_dict()
-                            df_to_display.rename(columns=ticker_to_name_map, inplace=True)
-
-                        # 이름이 변경된 데이터프레임을 화면에 표시
-                        st.dataframe(df_to_display.style.format("{:.3f}").background_gradient(cmap='viridis', axis=1))
-                        # --- ▲▲▲ 로직 추가 끝 ▲▲▲ ---
-                    else:
-                        st.dataframe(sorted_recent_scores)
-
-                # --- ▼▼▼ Plotly 그래프 로직 수정 ▼▼▼ ---
-                # 1. 데이터를 'long' 형태로 변환
-                df_melted = scores_to_display.reset_index().rename(columns={'index': 'Date'})
-                df_melted = df_melted.melt(id_vars='Date', var_name='Ticker', value_name='Momentum Score')
-
-                # 2. Stock_list.csv의 이름 정보를 df_melted에 합치기(merge)
-                if etf_df is not None:
-                    # Ticker를 기준으로 이름(Name) 컬럼을 추가합니다.
-                    df_merged = pd.merge(
-                        df_melted, 
-                        etf_df[['Ticker', 'Name']], 
-                        on='Ticker', 
-                        how='left' # 모멘텀 데이터 기준으로 합치기
+                    # --- [수정] 이름 매핑과 정렬은 결과마다 한 번만 하고, 색상 스타일은 현재 페이지에만 입힙니다 ---
+                    def build_momentum_table():
+                        return scores_to_display.sort_index(ascending=False).rename(columns=symbols.name_map())
+                    show_paginated_table(
+                        cached_figure(('momentum_table', get_result_fingerprint(results)), build_momentum_table), 'momentum_table',
+                        style=lambda page: page.style.format("{:.3f}").background_gradient(cmap='viridis', axis=1)
                     )
-                else:
-                    # Stock_list.csv가 없으면 Name 컬럼을 Ticker와 동일하게 설정
-                    df_merged = df_melted.copy()
-                    df_merged['Name'] = df_merged['Ticker']
-
-                # 3. Plotly Express 라인 차트 생성 시 호버 옵션 추가
-                fig_interactive = px.line(
-                    df_merged, # 이름이 추가된 데이터프레임 사용
-                    x='Date',
-                    y='Momentum Score',
-                    color='Name',
-                    title='구성종목 모멘텀 점수 추이',
-                    labels={'Date': 'Date', 'Momentum Score': '모멘텀 점수', 'Name': '종목명'},
-                    hover_name='Name', # 호버 툴팁의 제목을 'Name'으로 설정
-                    custom_data=['Ticker']
-                )
-                # 4. 툴팁(hovertemplate) 서식과 순서를 직접 지정
-                fig_interactive.update_traces(
-                    hovertemplate=(
-                        "<b>%{hovertext}</b><br><br>" + # hovertext는 hover_name으로 지정된 'Name'을 의미 (맨 위 굵은 글씨)
-                        "티커: %{customdata[0]}<br>" +     # customdata[0]은 custom_data의 첫 번째 항목인 'Ticker'를 의미
-                        "모멘텀 점수: %{y:.3f}<br>" +      # y는 y축 값인 'Momentum Score'를 의미
-                        "날짜: %{x|%Y-%m-%d}" +            # x는 x축 값인 'Date'를 의미
-                        "<extra></extra>"                # Plotly에서 기본으로 붙는 추가 정보 박스 제거
+
+                # --- [수정] 같은 결과의 그래프는 다시 만들지 않고 캐시에서 가져옵니다 ---
+                def render_momentum_chart():
+                    # --- [수정] melt/merge로 긴 표를 만드는 대신, 종목마다 점을 줄인 선 하나씩 그립니다 ---
+                    fig_interactive = go.Figure()
+                    for ticker, (x, y) in zip(assets_to_show, downsample_panel(scores_to_display, chart_max_points)):
+                        name = symbols.name(ticker)
+                        fig_interactive.add_trace(go.Scattergl(
+                            x=x, y=y, mode='lines', name=name,
+                            # 툴팁: 종목명(굵은 글씨), 티커, 모멘텀 점수, 날짜 순서로 표시하고 기본 추가 정보 상자는 숨깁니다.
+                            hovertemplate=(
+                                f"<b>{name}</b><br><br>티커: {ticker}<br>"
+                                "모멘텀 점수: %{y:.3f}<br>날짜: %{x|%Y-%m-%d}<extra></extra>"
+                            )
+                        ))
+                    fig_interactive.add_hline(y=0, line_dash="dot", line_color="red")
+                    fig_interactive.update_layout(
+                        title='구성종목 모멘텀 점수 추이', xaxis_title='Date', yaxis_title='모멘텀 점수', legend_title_text='종목명'
                     )
-                )
+                    return fig_interactive
+
+                fig_interactive = cached_figure(('momentum', get_result_fingerprint(results), chart_max_points), render_momentum_chart)
 
-                
-                fig_interactive.add_hline(y=0, line_dash="dot", line_color="red")
-                fig_interactive.update_layout(legend_title_text='종목명')
-                
                 st.plotly_chart(fig_interactive, use_container_width=True)
                 
             else:
@@ -1379,43 +1139,61 @@ with tab1:
             st.metric("Volatility (변동성)", f"{metrics['bm_volatility']:.2%}")
             st.metric("Sharpe Ratio (샤프 지수)", f"{metrics['bm_sharpe_ratio']:.2f}")
             st.metric("Win Rate (승률)", f"{metrics['bm_win_rate']:.2%}")
+
+        # --- [추가] 위험 지표 (예전에 저장한 결과에는 없으므로 있을 때만 표시) ---
+        if 'sortino_ratio' in metrics:
+            st.markdown("##### **위험 지표**")
+            risk_table = pd.DataFrame({
+                "소르티노 지수": [metrics['sortino_ratio'], metrics['bm_sortino_ratio']],
+                "칼마 지수": [metrics['calmar_ratio'], metrics['bm_calmar_ratio']],
+                "CVaR (95%)": [metrics['cvar'], metrics['bm_cvar']],
+                "베타": [metrics['beta'], np.nan],
+                "알파 (연)": [metrics['alpha'], np.nan],
+                "추적 오차": [metrics['tracking_error'], np.nan],
+            }, index=["전략", f"벤치마크 ({config['benchmark']})"])
+            st.dataframe(risk_table.style.format({
+                "소르티노 지수": "{:.2f}", "칼마 지수": "{:.2f}", "CVaR (95%)": "{:.2%}",
+                "베타": "{:.2f}", "알파 (연)": "{:.2%}", "추적 오차": "{:.2%}"
+            }, na_rep='-'), use_container_width=True)
+            st.caption("소르티노: 하방 변동성 대비 초과 수익 · 칼마: CAGR / |MDD| · CVaR: 하위 5% 기간 수익률의 평균 · "
+                       "베타/알파/추적 오차: 벤치마크 대비")
         
         st.subheader("📊 누적 수익 그래프")
-        fig, ax = plt.subplots(figsize=(10, 5))
-        if not investment_mode.empty:
-            mode_changes = investment_mode.loc[investment_mode.shift(1) != investment_mode].index.tolist()
-            if investment_mode.index[0] not in mode_changes: mode_changes.insert(0, investment_mode.index[0])
-            for i in range(len(mode_changes)):
-                start_interval = mode_changes[i]
-                end_interval = mode_changes[i+1] if i+1 < len(mode_changes) else cumulative_returns.index[-1]
-                mode = investment_mode.loc[start_interval]
-                color = 'lightgreen' if mode == 'Aggressive' else 'lightyellow'
-                ax.axvspan(start_interval, end_interval, facecolor=color, alpha=0.3)
-        line1, = ax.plot(cumulative_returns.index, cumulative_returns, label='Strategy', color='royalblue', linewidth=1.0)
-        line2, = ax.plot(benchmark_cumulative.index, benchmark_cumulative, label='Benchmark', color='grey', linewidth=1.0)
-        
-        # 1. 데이터가 실제로 시작하고 끝나는 날짜를 찾습니다.
-        first_valid_date = cumulative_returns.first_valid_index()
-        last_valid_date = cumulative_returns.last_valid_index()
-
-        # 2. 유효한 날짜가 있을 경우, X축의 시작과 끝에 동적인 여백을 줍니다.
-        if first_valid_date is not None and last_valid_date is not None:
-            # 전체 기간의 약 5%에 해당하는 날짜 수를 계산하여 여백으로 사용
-            margin_days = (last_valid_date - first_valid_date).days * 0.05
+        # --- [수정] 결과 지문이 같으면 그래프를 다시 그리지 않고 캐시된 이미지를 사용합니다 ---
+        def render_cumulative_chart():
+            fig, ax = plt.subplots(figsize=(10, 5))
+            line1, = ax.plot(*downsample_series(cumulative_returns, chart_max_points), label='Strategy', color='royalblue', linewidth=1.0)
+            line2, = ax.plot(*downsample_series(benchmark_cumulative, chart_max_points), label='Benchmark', color='grey', linewidth=1.0)
+            # --- [수정] 투자 모드 구간은 저장된 구간 표로 모드별 한 번에 칠합니다 ---
+            mode_segments = (results.get('regime_segments') or {}).get('investment_mode')
+            if mode_segments is None:
+                mode_segments = get_regime_segments(investment_mode, cumulative_returns.index[-1])
+            shade_regime_segments(ax, mode_segments, {'Aggressive': 'lightgreen', 'Defensive': 'lightyellow'})
+        
+            # 1. 데이터가 실제로 시작하고 끝나는 날짜를 찾습니다.
+            first_valid_date = cumulative_returns.first_valid_index()
+            last_valid_date = cumulative_returns.last_valid_index()
+
+            # 2. 유효한 날짜가 있을 경우, X축의 시작과 끝에 동적인 여백을 줍니다.
+            if first_valid_date is not None and last_valid_date is not None:
+                # 전체 기간의 약 5%에 해당하는 날짜 수를 계산하여 여백으로 사용
+                margin_days = (last_valid_date - first_valid_date).days * 0.05
             
-            # 시작점은 여백만큼 앞으로, 끝점은 여백만큼 뒤로 설정
-            graph_start_date = first_valid_date - pd.DateOffset(days=margin_days)
-            graph_end_date = last_valid_date + pd.DateOffset(days=margin_days)
+                # 시작점은 여백만큼 앞으로, 끝점은 여백만큼 뒤로 설정
+                graph_start_date = first_valid_date - pd.DateOffset(days=margin_days)
+                graph_end_date = last_valid_date + pd.DateOffset(days=margin_days)
             
-            ax.set_xlim(left=graph_start_date, right=graph_end_date)      
+                ax.set_xlim(left=graph_start_date, right=graph_end_date)      
             
-        legend_handles = [line1, line2, Patch(facecolor='lightgreen', label='Aggressive'), Patch(facecolor='lightyellow', label='Defensive')]
-        ax.set_title('Cumulative Value Over Time', fontsize=16)
-        ax.set_xlabel('Date', fontsize=12); ax.set_ylabel('Portfolio Value', fontsize=12)
-        formatter = mtick.FuncFormatter(lambda y, _: format_large_number(y, symbol=currency_symbol))
-        ax.yaxis.set_major_formatter(formatter)
-        ax.legend(handles=legend_handles, loc='upper left', fontsize=10); ax.grid(True, which="both", ls="--", linewidth=0.5)
-        st.pyplot(fig)
+            legend_handles = [line1, line2, Patch(facecolor='lightgreen', label='Aggressive'), Patch(facecolor='lightyellow', label='Defensive')]
+            ax.set_title('Cumulative Value Over Time', fontsize=16)
+            ax.set_xlabel('Date', fontsize=12); ax.set_ylabel('Portfolio Value', fontsize=12)
+            formatter = mtick.FuncFormatter(lambda y, _: format_large_number(y, symbol=currency_symbol))
+            ax.yaxis.set_major_formatter(formatter)
+            ax.legend(handles=legend_handles, loc='upper left', fontsize=10); ax.grid(True, which="both", ls="--", linewidth=0.5)
+            return figure_to_png(fig)
+
+        st.image(cached_figure(('cumulative', get_result_fingerprint(results), chart_max_points), render_cumulative_chart), use_container_width=True)
         
         st.markdown("---")
         st.header("🔬 상세 분석")
@@ -1423,126 +1201,186 @@ with tab1:
         st.subheader("📅 연도별 수익률")
         col1_annual, col2_annual = st.columns([1, 2])
         returns_freq = config['backtest_type'].split(' ')[0]
-        if returns_freq == '일별':
-            monthly_pf_returns_for_annual = portfolio_returns.resample('M').apply(lambda x: (1 + x).prod() - 1)
-            monthly_bm_returns_for_annual = benchmark_returns.resample('M').apply(lambda x: (1 + x).prod() - 1)
-        else:
-            monthly_pf_returns_for_annual = portfolio_returns; monthly_bm_returns_for_annual = benchmark_returns
-        annual_returns = monthly_pf_returns_for_annual.resample('A').apply(lambda x: (1 + x).prod() - 1).to_frame(name="Strategy")
-        bm_annual_returns = monthly_bm_returns_for_annual.resample('A').apply(lambda x: (1 + x).prod() - 1).to_frame(name="Benchmark")
-        annual_df = pd.concat([annual_returns, bm_annual_returns], axis=1)
+        # --- [수정] 구간별 반복(resample().apply) 대신 결과에 저장된 월/연 복리 수익률을 사용합니다 (예전 결과는 이때 계산) ---
+        period_returns = results.get('period_returns') or calculate_period_returns(portfolio_returns, benchmark_returns)
+        monthly_period_returns = period_returns['month']
+        annual_df = period_returns['year'].copy()
         annual_df.index = annual_df.index.year
         annual_df.index = annual_df.index.astype(str)
         annual_df.index.name = "Date" # 인덱스 이름 재설정        
         with col1_annual: st.dataframe(annual_df.style.format("{:.2%}"))
         with col2_annual:
-            fig2, ax2 = plt.subplots(figsize=(10, 5))
-            annual_df.plot(kind='bar', ax=ax2, color=['royalblue', 'grey']); ax2.set_title('Annual Returns', fontsize=16)
-            ax2.set_xlabel('Year', fontsize=12); ax2.set_ylabel('Return', fontsize=12); ax2.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-            ax2.tick_params(axis='x', rotation=45); ax2.grid(axis='y', linestyle='--', linewidth=0.5); st.pyplot(fig2)
+            def render_annual_chart():
+                fig2, ax2 = plt.subplots(figsize=(10, 5))
+                annual_df.plot(kind='bar', ax=ax2, color=['royalblue', 'grey']); ax2.set_title('Annual Returns', fontsize=16)
+                ax2.set_xlabel('Year', fontsize=12); ax2.set_ylabel('Return', fontsize=12); ax2.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+                ax2.tick_params(axis='x', rotation=45); ax2.grid(axis='y', linestyle='--', linewidth=0.5)
+                return figure_to_png(fig2)
+            st.image(cached_figure(('annual', get_result_fingerprint(results)), render_annual_chart), use_container_width=True)
 
         st.subheader("📉 하락폭(Drawdown) 추이")
         strategy_dd = (strategy_growth / strategy_growth.cummax() - 1)
         benchmark_dd = (benchmark_growth / benchmark_growth.cummax() - 1)
-        fig3, ax3 = plt.subplots(figsize=(10, 5))
-        ax3.plot(strategy_dd.index, strategy_dd, label='Strategy Drawdown', color='royalblue', linewidth=1.0)
-        ax3.plot(benchmark_dd.index, benchmark_dd, label='Benchmark Drawdown', color='grey', linewidth=1.0)
-        ax3.fill_between(strategy_dd.index, strategy_dd, 0, color='royalblue', alpha=0.1)
-        ax3.set_title('Drawdown Over Time', fontsize=16)
-        ax3.set_xlabel('Date', fontsize=12); ax3.set_ylabel('Drawdown', fontsize=12); ax3.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-        ax3.legend(loc='lower right', fontsize=10); ax3.grid(True, which="both", ls="--", linewidth=0.5); st.pyplot(fig3)
+        def render_drawdown_chart():
+            fig3, ax3 = plt.subplots(figsize=(10, 5))
+            strategy_dd_x, strategy_dd_y = downsample_series(strategy_dd, chart_max_points)
+            ax3.plot(strategy_dd_x, strategy_dd_y, label='Strategy Drawdown', color='royalblue', linewidth=1.0)
+            ax3.plot(*downsample_series(benchmark_dd, chart_max_points), label='Benchmark Drawdown', color='grey', linewidth=1.0)
+            ax3.fill_between(strategy_dd_x, strategy_dd_y, 0, color='royalblue', alpha=0.1)
+            ax3.set_title('Drawdown Over Time', fontsize=16)
+            ax3.set_xlabel('Date', fontsize=12); ax3.set_ylabel('Drawdown', fontsize=12); ax3.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+            ax3.legend(loc='lower right', fontsize=10); ax3.grid(True, which="both", ls="--", linewidth=0.5)
+            return figure_to_png(fig3)
+        st.image(cached_figure(('drawdown', get_result_fingerprint(results), chart_max_points), render_drawdown_chart), use_container_width=True)
+
+        # --- [추가] 롤링(이동 구간) 지표: 구간 합과 블록 누적 최대/최소로 모든 구간을 한 번에 계산합니다 ---
+        st.subheader("🔄 롤링 지표 (전략 vs. 벤치마크)")
+        rolling_months = st.select_slider(
+            "롤링 구간", options=[3, 6, 12, 24, 36, 60], value=12, format_func=lambda m: f"{m}개월", key='rolling_window_months'
+        )
+        periods_per_year = get_periods_per_year(config)
+        rolling_window = max(2, round(rolling_months * periods_per_year / 12))
+        if len(portfolio_returns) < rolling_window:
+            st.info(f"백테스트 기간이 롤링 구간({rolling_months}개월)보다 짧아 롤링 지표를 계산할 수 없습니다.")
+        else:
+            def render_rolling_chart():
+                rolling = calculate_rolling_metrics(
+                    portfolio_returns, benchmark_returns, rolling_window, periods_per_year, config['risk_free_rate']
+                ).dropna(how='all')
+                panels = [
+                    ('cagr', 'Rolling CAGR', True), ('volatility', 'Rolling Volatility', True),
+                    ('sharpe_ratio', 'Rolling Sharpe Ratio', False), ('mdd', 'Rolling Max Drawdown', True),
+                    ('beta', 'Rolling Beta vs. Benchmark', False), ('correlation', 'Rolling Correlation vs. Benchmark', False),
+                ]
+                fig_roll, axes = plt.subplots(3, 2, figsize=(14, 11), sharex=True)
+                for ax, (metric, title, is_percent) in zip(axes.ravel(), panels):
+                    for series_name, color in (('Strategy', 'royalblue'), ('Benchmark', 'grey')):
+                        if (metric, series_name) in rolling.columns:
+                            ax.plot(*downsample_series(rolling[(metric, series_name)], chart_max_points), label=series_name, color=color, linewidth=1.0)
+                    if metric in ('beta', 'correlation'):
+                        ax.axhline(1 if metric == 'beta' else 0, color='grey', linestyle=':', linewidth=0.8)
+                    ax.set_title(title, fontsize=12); ax.grid(True, ls="--", linewidth=0.5)
+                    if is_percent:
+                        ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+                    ax.legend(loc='best', fontsize=8)
+                fig_roll.suptitle(f'{rolling_months}-Month Rolling Metrics', fontsize=16)
+                fig_roll.tight_layout()
+                return figure_to_png(fig_roll)
+            st.image(cached_figure(('rolling', get_result_fingerprint(results), rolling_window, chart_max_points), render_rolling_chart), use_container_width=True)
         
         st.subheader("🗓️ 월별 수익률 히트맵")
-        if not monthly_pf_returns_for_annual.empty:
-            heatmap_df = monthly_pf_returns_for_annual.to_frame(name='Return').copy()
-            heatmap_df['Year'] = heatmap_df.index.year; heatmap_df['Month'] = heatmap_df.index.month
-            heatmap_pivot = heatmap_df.pivot_table(index='Year', columns='Month', values='Return', aggfunc='sum')
+        if not monthly_period_returns.empty:
+            heatmap_pivot = monthly_return_grid(monthly_period_returns['Strategy'])
             heatmap_pivot.columns = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec']
             monthly_avg = heatmap_pivot.mean(); heatmap_pivot.loc['Average'] = monthly_avg
             st.dataframe(heatmap_pivot.style.format("{:.2%}", na_rep="").background_gradient(cmap='RdYlGn', axis=None))
 
-        # --- [수정] '전략 기여도 분석' 테이블 ---
+        # --- [수정] 자산마다 반복하는 대신, (기간 x 자산) 기여도 행렬 하나로 요약 표/누적 기여도/투자 모드별 기여도를 만듭니다 ---
         st.subheader("💎 개별 자산 전략 기여도 분석")
-        with st.spinner('개별 자산 기여도 계산 중...'):
-            # 1. 필요한 데이터 추출
-            target_weights = results.get('target_weights')
-            prices = results.get('prices')
-            config = results.get('config')
-            
-            contribution_data = []
-            
-            # 2. 리밸런싱 주기에 맞는 기간별 수익률 계산
-            rebal_dates = target_weights.index
-            periodic_prices = prices.loc[rebal_dates]
-            periodic_returns = periodic_prices.pct_change()
-
-            # 3. 분석할 전체 자산 목록 준비 (중복 제거)
-            aggressive_tickers = config['tickers']['AGGRESSIVE']
-            defensive_tickers = config['tickers']['DEFENSIVE']
-            all_assets = list(dict.fromkeys(aggressive_tickers + defensive_tickers))
-
-            # 4. 각 자산별 기여도 계산
-            for asset in all_assets:
-                if asset in target_weights.columns:
-                    holding_periods = target_weights.index[target_weights[asset] > 0]
-                    
-                    months_held = len(holding_periods)
-                    if months_held == 0:
-                        continue
+        # 기여도는 백테스트 실행 시 시작일 이전 비중까지 포함해 계산해 둔 값(asset_attribution)을 사용합니다.
+        attribution = results.get('asset_attribution')
+        if attribution is None:
+            # 예전 결과 파일: 시작일 이후로 잘린 가격/비중으로 계산합니다 (첫 구간은 빠질 수 있음).
+            with st.spinner('개별 자산 기여도 계산 중...'):
+                def build_attribution():
+                    contributions = calculate_asset_contributions(results['prices'], results['target_weights'], config)
+                    return summarize_asset_contributions(contributions, results['target_weights'], results['prices'], results['investment_mode'])
+                attribution = cached_figure(('attribution', get_result_fingerprint(results)), build_attribution)
+
+        attribution_summary = attribution['summary']
+        if attribution_summary.empty:
+            st.info("기여도를 분석할 자산 데이터가 없습니다.")
+        else:
+            st.caption("기여도 = 직전 비중 x 기간 수익률 - 해당 자산의 거래 비용 몫 (총 기여도는 기간별 기여도의 단순 합)")
+            st.markdown("##### **상위 기여 자산**")
+            st.dataframe(
+                attribution_summary.rename(index=symbols.label).style.format({
+                    '총 기여도': "{:,.2%}", '보유 횟수': "{:,.0f}회", '보유 시 평균 수익률': "{:,.2%}", '보유 시 승률': "{:,.2%}"
+                }, na_rep='-'),
+                use_container_width=True
+            )
 
-                    returns_when_held = periodic_returns.loc[holding_periods, asset].dropna()
-                    
-                    avg_return = returns_when_held.mean()
-                    win_rate = (returns_when_held > 0).sum() / len(returns_when_held) if not returns_when_held.empty else 0
-
-                    # --- ▼▼▼ 전체 이름(Full Name) 찾아서 합치는 로직 ▼▼▼ ---
-                    full_name = asset # 기본값은 티커로 설정
-                    if etf_df is not None:
-                        match = etf_df[etf_df['Ticker'] == asset]
-                        if not match.empty:
-                            # CSV 파일에 해당 티커 정보가 있으면 전체 이름으로 변경
-                            full_name = match.iloc[0]['Name']
-                    
-                    # 최종적으로 표시될 이름 형식 (예: SPY - SPDR S&P 500...)
-                    display_name = f"{asset} - {full_name}" if asset != full_name else asset
-                    # --- ▲▲▲ 로직 끝 ▲▲▲ ---
-
-                    contribution_data.append({
-                        "자산 (Asset)": display_name, # 티커 대신 display_name 사용
-                        "총 보유 횟수": f"{months_held}회",
-                        "평균 보유 기간 수익률": avg_return,
-                        "보유 시 승률": win_rate
-                    })
+            def render_contribution_chart():
+                # 총 기여도 절댓값 기준 상위 10개 자산만 따로 그리고, 나머지는 '기타'로 합칩니다.
+                cumulative = attribution['cumulative']
+                top_assets = attribution_summary['총 기여도'].abs().nlargest(10).index
+                chart_panel = cumulative[top_assets].rename(columns=symbols.name)
+                if len(top_assets) < cumulative.shape[1]:
+                    chart_panel['기타'] = cumulative.drop(columns=top_assets).sum(axis=1)
+                fig_contrib, ax_contrib = plt.subplots(figsize=(10, 5))
+                for name, (x, y) in zip(chart_panel.columns, downsample_panel(chart_panel, chart_max_points)):
+                    ax_contrib.plot(x, y, label=name, linewidth=1.0)
+                ax_contrib.set_title('Cumulative Contribution by Asset', fontsize=16)
+                ax_contrib.set_xlabel('Date', fontsize=12); ax_contrib.set_ylabel('Contribution', fontsize=12)
+                ax_contrib.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+                ax_contrib.legend(loc='upper left', fontsize=8, ncol=2); ax_contrib.grid(True, which="both", ls="--", linewidth=0.5)
+                return figure_to_png(fig_contrib)
+            st.image(cached_figure(('contribution', get_result_fingerprint(results), chart_max_points), render_contribution_chart), use_container_width=True)
+
+            st.markdown("##### **투자 모드별 기여도**")
+            regime_table = attribution['by_regime'].rename(index=symbols.label)
+            regime_table.loc['합계'] = regime_table.sum()
+            st.dataframe(regime_table.style.format("{:,.2%}"), use_container_width=True)
 
-            # 5. 결과 테이블 표시
-            if contribution_data:
-                contribution_df = pd.DataFrame(contribution_data).set_index("자산 (Asset)")
-                st.dataframe(contribution_df.style.format({
-                    "평균 보유 기간 수익률": "{:,.2%}",
-                    "보유 시 승률": "{:,.2%}"
-                }))
-            else:
-                st.info("기여도를 분석할 자산 데이터가 없습니다.")
-                
         with st.expander("⚖️ 월별 리밸런싱 내역 보기 (전체 기간)"):
-            #recent_weights = target_weights[target_weights.index > (target_weights.index.max() - pd.DateOffset(months=12))]
-            #for date, weights in reversed(list(recent_weights.iterrows())):
-            for date, weights in reversed(list(target_weights.iterrows())):
-                holdings = weights[weights > 0]
-                # 리밸런싱 판단 시점(date)을 기준으로 다음 달을 표시
-                display_month_str = (date + pd.DateOffset(months=1)).strftime('%Y-%m')
-    
-                if not holdings.empty:
-                    holding_list = []
-                    for ticker, weight in holdings.items():
-                        full_name = ticker 
-                        if etf_df is not None:
-                            match = etf_df[etf_df['Ticker'] == ticker]
-                            if not match.empty: full_name = match.iloc[0]['Name']
-                        holding_list.append(f"{full_name} ({weight:.0%})")
-                    holding_str = ", ".join(holding_list)
-                    st.text(f"{display_month_str}: {holding_str}")
-                else: st.text(f"{display_month_str}: 현금 (100%)")
+            # --- [수정] 월마다 텍스트를 출력하는 대신, 한 번 만든 보유 내역 표를 페이지 단위로 표시합니다 ---
+            holdings_table = cached_figure(
+                ('holdings_table', get_result_fingerprint(results)),
+                lambda: build_holdings_table(target_weights, symbols.name_map())
+            )
+            show_paginated_table(holdings_table, 'holdings_table')
+
+        # --- [추가] 몬테카를로(블록 부트스트랩) 강건성 분석 ---
+        st.subheader("🎲 몬테카를로 강건성 분석 (블록 부트스트랩)")
+        st.caption("전략/벤치마크 수익률을 같은 블록으로 다시 뽑아 가상의 경로를 만들고, 성과 지표의 분포와 신뢰구간을 계산합니다.")
+        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+        mc_paths = mc_col1.number_input("경로 수", min_value=100, max_value=50000, value=2000, step=500)
+        mc_block = mc_col2.number_input("블록 길이 (기간 수)", min_value=1, max_value=252, value=12 if returns_freq == '월별' else 21)
+        mc_confidence = mc_col3.selectbox("신뢰수준", [0.9, 0.95, 0.99], format_func=lambda c: f"{c:.0%}")
+        mc_seed = mc_col4.number_input("난수 시드", min_value=0, value=42)
+        mc_key = (get_result_fingerprint(results), int(mc_paths), int(mc_block), int(mc_seed))
+
+        if st.button("🎲 몬테카를로 실행"):
+            with st.spinner('부트스트랩 경로 계산 중...'):
+                try:
+                    st.session_state.monte_carlo = {
+                        'key': mc_key,
+                        'samples': run_monte_carlo(
+                            portfolio_returns, benchmark_returns, target_weights.index, config,
+                            n_paths=int(mc_paths), block_size=int(mc_block), seed=int(mc_seed)
+                        ),
+                    }
+                except ValueError as e:
+                    st.error(str(e))
+
+        monte_carlo = st.session_state.get('monte_carlo')
+        if monte_carlo and monte_carlo['key'] == mc_key:
+            # 경로별 적립식 가치는 단위 값으로 저장되어 있어, 투자 금액이 바뀌어도 다시 뽑지 않습니다.
+            mc_summary, mc_path_metrics = summarize_monte_carlo(
+                monte_carlo['samples'], config['initial_capital'], config['monthly_contribution'], confidence=mc_confidence
+            )
+            mc_labels = {'cagr': 'CAGR', 'mdd': 'MDD', 'sharpe_ratio': '샤프 지수', 'final_assets': '최종 자산'}
+            mc_table = mc_summary.rename(index={'strategy': '전략', 'benchmark': '벤치마크'}, level=0).rename(index=mc_labels, level=1)
+            mc_table.columns = ['평균', '중앙값', f'하한 ({mc_confidence:.0%})', f'상한 ({mc_confidence:.0%})']
+            mc_col_table, mc_col_chart = st.columns([1, 2])
+            with mc_col_table:
+                st.dataframe(
+                    mc_table.style.format("{:.2%}")
+                    .format("{:.2f}", subset=pd.IndexSlice[pd.IndexSlice[:, '샤프 지수'], :])
+                    .format(f"{currency_symbol}{{:,.0f}}", subset=pd.IndexSlice[pd.IndexSlice[:, '최종 자산'], :])
+                )
+                outperform = (mc_path_metrics[('strategy', 'cagr')] > mc_path_metrics[('benchmark', 'cagr')]).mean()
+                st.metric("전략 CAGR > 벤치마크 CAGR 확률", f"{outperform:.1%}")
+            with mc_col_chart:
+                mc_metric = st.selectbox("분포를 볼 지표", MONTE_CARLO_METRICS, format_func=lambda m: mc_labels[m])
+                mc_hist_df = pd.DataFrame({
+                    '전략': mc_path_metrics[('strategy', mc_metric)], '벤치마크': mc_path_metrics[('benchmark', mc_metric)]
+                }).melt(var_name='구분', value_name=mc_labels[mc_metric])
+                fig_mc = px.histogram(
+                    mc_hist_df, x=mc_labels[mc_metric], color='구분', barmode='overlay', nbins=60, opacity=0.6,
+                    color_discrete_map={'전략': 'royalblue', '벤치마크': 'grey'}
+                )
+                st.plotly_chart(fig_mc, use_container_width=True)
 
         st.markdown("---")
         st.subheader("💾 결과 저장 및 내보내기")
@@ -1568,8 +1406,8 @@ with tab1:
                 
                     # ▼▼▼▼▼ 핵심 수정 부분 ▼▼▼▼▼
                     # 현재 결과를 '바로가기'가 아닌 완전한 '복사본'으로 만듭니다.
-                    # pickle을 사용하면 저장하는 시점의 데이터를 그대로 스냅샷처럼 찍어낼 수 있습니다.
-                    copied_results = pickle.loads(pickle.dumps(st.session_state['results']))
+                    # [수정] .qtr 형식으로 압축한 복사본을 보관하여, 시계열은 비교할 때만 풀어 씁니다.
+                    copied_results = load_result_bytes(get_result_file_bytes(st.session_state['results']))
                 
                     new_result = {
                         'name': backtest_name_to_save,
@@ -1588,16 +1426,20 @@ with tab1:
                 st.write(" ") 
                 st.write(" ")
                 
-                result_binary = pickle.dumps(st.session_state['results'])
+                result_binary = get_result_file_bytes(st.session_state['results'])
                 file_name_suggestion = st.session_state.get('backtest_save_name', default_name)
         
                 st.download_button(
                     label="파일로 다운로드",
                     data=result_binary,
-                    file_name=f"{file_name_suggestion}.pkl",
+                    file_name=f"{file_name_suggestion}{RESULT_FILE_EXTENSION}",
                     mime="application/octet-stream",
-                    help="현재 백테스트 결과를 내 컴퓨터에 .pkl 파일로 영구 저장합니다."
+                    help=f"현재 백테스트 결과를 내 컴퓨터에 {RESULT_FILE_EXTENSION} 파일로 영구 저장합니다."
                 )
+                # --- [추가] 서버의 보관함 폴더에 저장하고 카탈로그에 기록 ---
+                if st.button("보관함에 저장", help=f"'{RESULTS_DIR}' 폴더에 저장하여 '저장된 결과 비교' 탭에서 검색할 수 있게 합니다."):
+                    saved_path = save_result(st.session_state['results'], file_name_suggestion, RESULTS_DIR)
+                    st.toast(f"✅ '{os.path.basename(saved_path)}' 파일을 보관함에 저장했습니다!", icon="🗂️")
 
                 
 # --- 2단계: 결과 비교 탭 (업그레이드 버전) ---
@@ -1608,8 +1450,8 @@ with tab2:
     # --- 파일 업로드 섹션 (수정 없음) ---
     st.subheader("파일에서 결과 불러오기")
     uploaded_files = st.file_uploader(
-        "저장된 .pkl 파일을 여기에 업로드하세요.",
-        type=['pkl'],
+        "저장된 결과 파일(.qtr 또는 예전 .pkl)을 여기에 업로드하세요.",
+        type=[ext.lstrip('.') for ext in RESULT_FILE_EXTENSIONS],
         accept_multiple_files=True,
         key="uploader_tab2"
     )
@@ -1619,9 +1461,9 @@ with tab2:
         for uploaded_file in uploaded_files:
             if uploaded_file.name not in st.session_state.loaded_files:
                 try:
-                    loaded_data = pickle.load(uploaded_file)
+                    loaded_data = load_result_bytes(uploaded_file.getvalue())
                     new_result = {
-                        'name': uploaded_file.name.replace('.pkl', ''),
+                        'name': os.path.splitext(uploaded_file.name)[0],
                         'data': loaded_data
                     }
                     st.session_state.saved_results.append(new_result)
@@ -1631,6 +1473,76 @@ with tab2:
                     st.error(f"'{uploaded_file.name}' 파일 처리 중 오류 발생: {e}")
     st.divider()
 
+    # --- [추가] 보관함(backtest_results) 검색: 파일을 열지 않고 카탈로그에서 필터/정렬/페이지 조회 ---
+    st.subheader("🗂️ 보관함에서 결과 찾기")
+    resync_clicked = st.button("🔄 보관함 폴더 다시 읽기")
+    if resync_clicked or 'catalog_synced' not in st.session_state:
+        added, removed = sync_catalog(RESULTS_DIR)
+        st.session_state.catalog_synced = True
+        if added or removed:
+            st.toast(f"보관함 목록 갱신: {added}개 추가, {removed}개 삭제")
+
+    cat_col1, cat_col2, cat_col3, cat_col4 = st.columns(4)
+    catalog_name = cat_col1.text_input("이름 포함")
+    catalog_ticker = cat_col2.text_input("티커 포함 (예: SPY)")
+    catalog_benchmark = cat_col3.selectbox("벤치마크", ["전체"] + get_catalog_options(RESULTS_DIR, 'benchmark'))
+    catalog_type = cat_col4.selectbox("백테스트 종류", ["전체"] + get_catalog_options(RESULTS_DIR, 'backtest_type'))
+    cat_col5, cat_col6, cat_col7, cat_col8 = st.columns(4)
+    catalog_min_cagr = cat_col5.number_input("최소 CAGR (%)", value=None, step=1.0)
+    catalog_max_mdd = cat_col6.number_input("최대 허용 MDD (%)", value=None, min_value=0.0, step=5.0)
+    catalog_min_sharpe = cat_col7.number_input("최소 샤프 지수", value=None, step=0.1)
+    catalog_order = cat_col8.selectbox("정렬 기준", CATALOG_SORT_COLUMNS, index=0)
+    cat_col9, cat_col10, cat_col11 = st.columns(3)
+    catalog_desc = cat_col9.checkbox("내림차순", value=True)
+    catalog_page_size = cat_col10.selectbox("페이지당 개수", [20, 50, 100], index=0)
+
+    catalog_filters = dict(
+        name=catalog_name, ticker=catalog_ticker,
+        benchmark=None if catalog_benchmark == "전체" else catalog_benchmark,
+        backtest_type=None if catalog_type == "전체" else catalog_type,
+        min_cagr=None if catalog_min_cagr is None else catalog_min_cagr / 100,
+        max_drawdown=None if catalog_max_mdd is None else catalog_max_mdd / 100,
+        min_sharpe=catalog_min_sharpe, order_by=catalog_order, descending=catalog_desc,
+    )
+    _, catalog_total = query_catalog(RESULTS_DIR, **catalog_filters, limit=0)
+    catalog_pages = max(1, -(-catalog_total // catalog_page_size))
+    catalog_page_no = cat_col11.number_input(f"페이지 (전체 {catalog_pages})", min_value=1, max_value=catalog_pages, value=1)
+    catalog_page, _ = query_catalog(
+        RESULTS_DIR, **catalog_filters, limit=catalog_page_size, offset=(catalog_page_no - 1) * catalog_page_size
+    )
+
+    if catalog_total == 0:
+        st.info(f"조건에 맞는 결과가 없습니다. ('{RESULTS_DIR}' 폴더)")
+    else:
+        st.caption(f"조건에 맞는 결과 {catalog_total}개 중 {len(catalog_page)}개 표시")
+        st.dataframe(
+            catalog_page.drop(columns=['config_hash']).set_index('file').style.format({
+                'final_assets': "{:,.0f}", 'cagr': "{:.2%}", 'mdd': "{:.2%}", 'volatility': "{:.2%}",
+                'sharpe_ratio': "{:.2f}", 'win_rate': "{:.2%}", 'bm_cagr': "{:.2%}", 'bm_mdd': "{:.2%}",
+            }, na_rep="-"),
+            use_container_width=True
+        )
+        catalog_selected = st.multiselect(
+            "비교 목록에 추가할 결과", catalog_page['file'].tolist(),
+            format_func=lambda f: f"{catalog_page.set_index('file').at[f, 'name']} ({f})"
+        )
+        if st.button("➕ 선택한 결과를 비교 목록에 추가") and catalog_selected:
+            if 'loaded_files' not in st.session_state:
+                st.session_state.loaded_files = set()
+            for file_name in catalog_selected:
+                if file_name in st.session_state.loaded_files:
+                    continue
+                try:
+                    st.session_state.saved_results.append({
+                        'name': os.path.splitext(file_name)[0],
+                        'data': load_result_file(os.path.join(RESULTS_DIR, file_name))
+                    })
+                    st.session_state.loaded_files.add(file_name)
+                except Exception as e:
+                    st.error(f"'{file_name}' 파일 처리 중 오류 발생: {e}")
+            st.toast(f"✅ {len(catalog_selected)}개 결과를 비교 목록에 추가했습니다!")
+    st.divider()
+
     # --- 비교 분석 로직 (버튼 방식으로 변경) ---
     # 1. session_state에 필요한 값들을 초기화합니다.
     if 'show_comparison' not in st.session_state:
@@ -1674,100 +1586,218 @@ with tab2:
             st.divider()
             st.subheader("📈 성과 요약 비교")
             
-            # (이하 모든 테이블 및 그래프 생성 코드는 이전과 동일하게 작동합니다)
-            comparison_data = []
-            for result_item in selected_results_structured:
-                result_name = result_item['name']
-                result_data = result_item['data']
-                metrics = result_data.get('metrics', {})
-                currency = result_data.get('currency_symbol', '$')
-                total_profit = metrics.get('total_profit', 0)
-                total_contribution = metrics.get('total_contribution', 1)
-                final_return_rate = (total_profit / total_contribution) if total_contribution != 0 else 0
-                comparison_data.append({
-                    "이름": result_name,
-                    "최종 자산": f"{currency}{metrics.get('final_assets', 0):,.0f}",
-                    "CAGR": metrics.get('cagr', 0),
-                    "MDD": metrics.get('mdd', 0),
-                    "변동성": metrics.get('volatility', 0),
-                    "샤프 지수": metrics.get('sharpe_ratio', 0),
-                    "총 투자 원금": f"{currency}{total_contribution:,.0f}",
-                    "총 손익": f"{currency}{total_profit:,.0f}",
-                    "최종 수익률": final_return_rate  # <-- 최종 수익률 항목 추가
-
-                })
-            
-            if comparison_data:
-                comp_df = pd.DataFrame(comparison_data).set_index("이름")
-                st.dataframe(comp_df.style.format({
-                    "CAGR": "{:.2%}", "MDD": "{:.2%}", "변동성": "{:.2%}",
-                    "샤프 지수": "{:.2f}", "최종 수익률": "{:.2%}"
-                }))
+            # --- [수정] 결과별 반복 대신, 모든 결과를 공통 날짜 인덱스의 패널 하나로 맞춰 표와 그래프를 만듭니다 ---
+            comparison = build_comparison_panel(
+                [result_item['name'] for result_item in selected_results_structured],
+                [result_item['data'] for result_item in selected_results_structured]
+            )
+            comp_metrics = comparison['metrics']
+            currency = comp_metrics['currency_symbol']
+            comp_df = pd.DataFrame({
+                "최종 자산": currency + comp_metrics['final_assets'].map("{:,.0f}".format),
+                "CAGR": comp_metrics['cagr'],
+                "MDD": comp_metrics['mdd'],
+                "변동성": comp_metrics['volatility'],
+                "샤프 지수": comp_metrics['sharpe_ratio'],
+                "소르티노 지수": comp_metrics['sortino_ratio'],
+                "칼마 지수": comp_metrics['calmar_ratio'],
+                "CVaR (95%)": comp_metrics['cvar'],
+                "베타": comp_metrics['beta'],
+                "알파": comp_metrics['alpha'],
+                "추적 오차": comp_metrics['tracking_error'],
+                "총 투자 원금": currency + comp_metrics['total_contribution'].map("{:,.0f}".format),
+                "총 손익": currency + comp_metrics['total_profit'].map("{:,.0f}".format),
+                "최종 수익률": comp_metrics['final_return_rate'],
+            })
+            comp_df.index.name = "이름"
+            st.dataframe(comp_df.style.format({
+                "CAGR": "{:.2%}", "MDD": "{:.2%}", "변동성": "{:.2%}",
+                "샤프 지수": "{:.2f}", "최종 수익률": "{:.2%}",
+                "소르티노 지수": "{:.2f}", "칼마 지수": "{:.2f}", "CVaR (95%)": "{:.2%}",
+                "베타": "{:.2f}", "알파": "{:.2%}", "추적 오차": "{:.2%}"
+            }, na_rep='-'))
+
+            # 화면 폭에 비해 지나치게 많은 점은 구간별 최솟값/최댓값만 남겨 그립니다. (WebGL 그래프, 해상도는 사이드바 설정)
+            show_legend = len(selected_results_structured) <= 30
 
             st.divider()
             st.subheader("📊 누적 수익률 비교 그래프")
-            
-            fig1, ax1 = plt.subplots(figsize=(10, 5))
-
-            for result_item in selected_results_structured:
-                result_name = result_item['name']
-                result_data = result_item['data']
-                
-                timeseries = result_data.get('timeseries', {})
-                config = result_data.get('config', {})
-                portfolio_value = timeseries.get('portfolio_value')
-                
-                if portfolio_value is not None and not portfolio_value.empty:
-                    # 적립식 투자를 고려한 누적 수익률(%)을 계산하는 로직
-                    initial_capital = config.get('initial_capital', 0)
-                    monthly_contribution = config.get('monthly_contribution', 0)
-                    target_weights = result_data.get('target_weights', pd.DataFrame())
-                    contribution_dates = target_weights.index
-
-                    monthly_adds = pd.Series(monthly_contribution, index=contribution_dates)
-                    monthly_adds = monthly_adds.reindex(portfolio_value.index).fillna(0)
-                    
-                    if not monthly_adds.empty:
-                        # 첫 날 투자 원금은 초기 투자금 + 첫 월 추가 투자금
-                        monthly_adds.iloc[0] = initial_capital + monthly_adds.iloc[0]
-                    
-                    cumulative_contributions = monthly_adds.cumsum()
-
-                    # 수익률(%) = (현재 자산 - 누적 원금) / 누적 원금
-                    cumulative_return_pct = ((portfolio_value - cumulative_contributions) / cumulative_contributions.replace(0, np.nan)) * 100
-                    
-                    ax1.plot(cumulative_return_pct, label=result_name, linewidth=1.0)
-
-            ax1.set_title('Cumulative Return Comparison', fontsize=16)
-            ax1.set_xlabel('Date'); ax1.set_ylabel('Cumulative Return (%)')
-            ax1.yaxis.set_major_formatter(mtick.FuncFormatter(lambda y, _: f'{y:,.0f}%'))
-            ax1.legend(loc='upper left'); ax1.grid(True, which="both", ls="--", linewidth=0.5)
-            st.pyplot(fig1)
+            fig_compare = go.Figure()
+            for name, (x, y) in zip(comparison['return_pct'].columns, downsample_panel(comparison['return_pct'], chart_max_points, method='minmax')):
+                fig_compare.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=name, line=dict(width=1)))
+            fig_compare.update_layout(
+                title='Cumulative Return Comparison', xaxis_title='Date', yaxis_title='Cumulative Return (%)',
+                yaxis_ticksuffix='%', hovermode='x unified' if show_legend else 'closest', showlegend=show_legend
+            )
+            st.plotly_chart(fig_compare, use_container_width=True)
 
             st.divider()
             st.subheader("📉 하락폭(Drawdown) 비교 그래프")
-            
-            fig2, ax2 = plt.subplots(figsize=(10, 5))
+            fig_dd_compare = go.Figure()
+            # 결과가 많을 때는 음영이 겹쳐 보이지 않으므로 선만 그립니다.
+            fill_drawdown = 'tozeroy' if len(selected_results_structured) <= 10 else None
+            for name, (x, y) in zip(comparison['drawdown'].columns, downsample_panel(comparison['drawdown'], chart_max_points, method='minmax')):
+                fig_dd_compare.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=name, line=dict(width=1), fill=fill_drawdown))
+            fig_dd_compare.update_layout(
+                title='Drawdown Comparison', xaxis_title='Date', yaxis_title='Drawdown',
+                yaxis_tickformat='.0%', hovermode='x unified' if show_legend else 'closest', showlegend=show_legend
+            )
+            st.plotly_chart(fig_dd_compare, use_container_width=True)
+            if not show_legend:
+                st.caption("결과가 많아 범례를 숨겼습니다. 선 위에 마우스를 올리면 결과 이름이 표시됩니다.")
 
-            for result_item in selected_results_structured:
-                result_name = result_item['name']
-                result_data = result_item['data']
 
-                timeseries = result_data.get('timeseries', {})
-                dd_series = timeseries.get('strategy_drawdown')
+            
+# --- [추가] 3단계: 파라미터 스윕 탭 ---
+with tab3:
+    st.header("🧪 파라미터 스윕")
+    st.caption("사이드바의 현재 설정을 기본값으로, 아래에서 지정한 값들의 모든 조합을 병렬로 백테스트합니다. 가격 데이터는 한 번만 불러와 모든 조합이 공유합니다.")
+    st.divider()
 
-                if dd_series is not None:
-                    ax2.plot(dd_series, label=result_name, linewidth=1.0)
-                    ax2.fill_between(dd_series.index, dd_series, 0, alpha=0.1) # 하락폭 영역 음영 처리
+    base_portfolio = current_config['portfolio_params']
+    base_momentum = current_config['momentum_params']
+
+    def parse_list(text, cast):
+        """'1, 2, 3' 형태의 입력을 값 목록으로 바꾸는 함수 (잘못된 항목은 무시)"""
+        values = []
+        for item in text.split(','):
+            try:
+                values.append(cast(item.strip()))
+            except ValueError:
+                continue
+        return list(dict.fromkeys(values))
+
+    sweep_col1, sweep_col2 = st.columns(2)
+    with sweep_col1:
+        sweep_top_agg = st.text_input("공격 자산 Top N 후보 (쉼표로 구분)", value=f"{max(base_portfolio['top_n_aggressive'] - 1, 1)}, {base_portfolio['top_n_aggressive']}, {base_portfolio['top_n_aggressive'] + 1}")
+        sweep_top_def = st.text_input("방어 자산 Top N 후보 (쉼표로 구분)", value=str(base_portfolio['top_n_defensive']))
+        sweep_mom_types = st.multiselect("모멘텀 종류 후보", ['13612U', '평균 모멘텀', '상대 모멘텀'], default=[base_momentum['type']])
+        sweep_mom_periods = st.text_input(
+            "모멘텀 기간 후보 (세미콜론으로 조합 구분)", value=', '.join(map(str, base_momentum['periods'])),
+            help="예: '1, 3, 6, 12; 3, 6, 9' 는 [1, 3, 6, 12]와 [3, 6, 9] 두 가지 기간 조합을 시험합니다. '13612U'에서는 무시됩니다."
+        )
+    with sweep_col2:
+        sweep_canary = st.multiselect("카나리아 자산 사용 후보", [True, False], default=[base_portfolio['use_canary']])
+        sweep_hybrid = st.multiselect("하이브리드 보호 장치 사용 후보", [True, False], default=[base_portfolio['use_hybrid_protection']])
+        sweep_freq = st.multiselect("리밸런싱 주기 후보", ['월별', '분기별'], default=[current_config['rebalance_freq']])
+        sweep_day = st.multiselect("리밸런싱 기준일 후보", ['월말', '월초'], default=[current_config['rebalance_day']])
+        sweep_costs = st.text_input("거래 비용 후보 (%, 쉼표로 구분)", value=f"{current_config['transaction_cost'] * 100:g}")
+
+    sweep_grid = {
+        'top_n_aggressive': parse_list(sweep_top_agg, int) or [base_portfolio['top_n_aggressive']],
+        'top_n_defensive': parse_list(sweep_top_def, int) or [base_portfolio['top_n_defensive']],
+        'momentum_type': sweep_mom_types or [base_momentum['type']],
+        'momentum_periods': [p for p in (parse_list(part, int) for part in sweep_mom_periods.split(';')) if p] or [base_momentum['periods']],
+        'use_canary': sweep_canary or [base_portfolio['use_canary']],
+        'use_hybrid_protection': sweep_hybrid or [base_portfolio['use_hybrid_protection']],
+        'rebalance_freq': sweep_freq or [current_config['rebalance_freq']],
+        'rebalance_day': sweep_day or [current_config['rebalance_day']],
+        'transaction_cost': [c / 100 for c in parse_list(sweep_costs, float)] or [current_config['transaction_cost']],
+    }
+    num_combos = len(expand_grid(sweep_grid))
+    cpu_count = os.cpu_count() or 1
+    sweep_workers = st.number_input("동시에 실행할 프로세스 수", min_value=1, max_value=cpu_count, value=min(cpu_count, 8))
+    st.markdown(f"**총 {num_combos}개 조합**을 실행합니다.")
+
+    if st.button("🧪 스윕 실행", type="primary"):
+        with st.spinner('가격 데이터 로딩 중...'):
+            # 모든 조합에 필요한 최대 모멘텀 기간만큼 앞당겨 한 번만 불러옵니다.
+            sweep_prices, _, _ = load_sweep_prices(current_config, sweep_grid, price_loader=get_price_data)
+
+        if sweep_prices is None or sweep_prices.empty:
+            st.error("데이터 로딩에 실패하여 스윕을 중단합니다.")
+        else:
+            progress_bar = st.progress(0.0, text="스윕 실행 중...")
+            sweep_table = run_sweep(
+                current_config, sweep_grid, sweep_prices, max_workers=sweep_workers,
+                progress_callback=lambda done, total: progress_bar.progress(done / total, text=f"스윕 실행 중... ({done}/{total})")
+            )
+            progress_bar.empty()
+            st.session_state.sweep_results = {'table': sweep_table, 'grid': sweep_grid}
+
+    if 'sweep_results' in st.session_state:
+        sweep_table = st.session_state.sweep_results['table']
+        sweep_grid_used = st.session_state.sweep_results['grid']
+
+        failed_rows = sweep_table['error'].notna()
+        if failed_rows.any():
+            st.warning(f"{failed_rows.sum()}개 조합은 실행에 실패했습니다. (표의 error 열 참고)")
+
+        st.subheader("📋 조합별 성과 지표")
+        metric_labels = {'cagr': 'CAGR', 'mdd': 'MDD', 'sharpe_ratio': '샤프 지수', 'volatility': '변동성', 'win_rate': '승률', 'final_assets': '최종 자산',
+                         'sortino_ratio': '소르티노 지수', 'calmar_ratio': '칼마 지수', 'cvar': 'CVaR (95%)'}
+        st.dataframe(
+            sweep_table.rename(columns=metric_labels).style.format({
+                'CAGR': "{:.2%}", 'MDD': "{:.2%}", '샤프 지수': "{:.2f}", '변동성': "{:.2%}", '승률': "{:.2%}", '최종 자산': "{:,.0f}",
+                '소르티노 지수': "{:.2f}", '칼마 지수': "{:.2f}", 'CVaR (95%)': "{:.2%}"
+            }),
+            use_container_width=True
+        )
+
+        # 값이 두 개 이상인 파라미터만 히트맵 축으로 사용할 수 있습니다.
+        varying_params = [name for name, values in sweep_grid_used.items() if len(values) > 1]
+        st.subheader("🌡️ 파라미터 히트맵")
+        if len(varying_params) >= 2:
+            heat_col1, heat_col2, heat_col3 = st.columns(3)
+            heat_x = heat_col1.selectbox("X축 파라미터", varying_params, index=0)
+            heat_y = heat_col2.selectbox("Y축 파라미터", [p for p in varying_params if p != heat_x], index=0)
+            heat_metric = heat_col3.selectbox("지표", SWEEP_METRICS, format_func=lambda m: metric_labels[m])
+            # 나머지 파라미터는 각 칸에서 가장 좋은 값을 표시합니다. (MDD는 0에 가까울수록 좋음)
+            heat_pivot = sweep_table.pivot_table(index=heat_y, columns=heat_x, values=heat_metric, aggfunc='max')
+            fig_heat = px.imshow(
+                heat_pivot, text_auto='.2%' if heat_metric not in ('sharpe_ratio', 'final_assets', 'sortino_ratio', 'calmar_ratio') else '.2f',
+                color_continuous_scale='RdYlGn', aspect='auto',
+                labels={'x': heat_x, 'y': heat_y, 'color': metric_labels[heat_metric]}
+            )
+            fig_heat.update_xaxes(type='category'); fig_heat.update_yaxes(type='category')
+            st.plotly_chart(fig_heat, use_container_width=True)
+            if len(varying_params) > 2:
+                st.caption("X/Y축 외의 파라미터는 각 칸에서 가장 높은 지표 값을 표시합니다.")
+        else:
+            st.info("히트맵을 그리려면 두 개 이상의 파라미터에 여러 후보 값을 지정하세요.")
 
-            ax2.set_title('Drawdown Comparison', fontsize=16)
-            ax2.set_xlabel('Date'); ax2.set_ylabel('Drawdown')
-            ax2.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-            ax2.legend(loc='lower left'); ax2.grid(True, which="both", ls="--", linewidth=0.5)
-            st.pyplot(fig2)
+    # --- [추가] 워크포워드 최적화: 위의 후보 값들 중 직전 구간 최고 조합을 다음 구간에 적용 ---
+    st.divider()
+    st.subheader("🔁 워크포워드 최적화")
+    st.caption("인샘플 구간에서 가장 좋았던 조합을 다음 아웃오브샘플 구간에 적용하고, 구간을 굴려 가며 아웃오브샘플 결과만 이어 붙입니다. 결과는 '새로운 백테스트 결과' 탭에 표시됩니다.")
+    wf_col1, wf_col2, wf_col3 = st.columns(3)
+    wf_in_sample = wf_col1.number_input("인샘플 구간 (개월)", min_value=6, max_value=240, value=36, step=6)
+    wf_out_of_sample = wf_col2.number_input("아웃오브샘플 구간 (개월)", min_value=1, max_value=120, value=12)
+    wf_objective = wf_col3.selectbox("선택 기준", list(WALK_FORWARD_OBJECTIVES), format_func=lambda o: WALK_FORWARD_OBJECTIVES[o])
+
+    if st.button("🔁 워크포워드 실행"):
+        with st.spinner('가격 데이터 로딩 중...'):
+            wf_prices, _, _ = load_sweep_prices(current_config, sweep_grid, price_loader=get_price_data)
+
+        if wf_prices is None or wf_prices.empty:
+            st.error("데이터 로딩에 실패하여 워크포워드를 중단합니다.")
+        else:
+            progress_bar = st.progress(0.0, text="조합별 전체 기간 백테스트 중...")
+            try:
+                wf_results = run_walk_forward(
+                    current_config, sweep_grid, wf_prices, int(wf_in_sample), int(wf_out_of_sample), wf_objective,
+                    max_workers=sweep_workers,
+                    progress_callback=lambda done, total: progress_bar.progress(done / total, text=f"조합별 전체 기간 백테스트 중... ({done}/{total})")
+                )
+            except BacktestError as e:
+                progress_bar.empty()
+                st.error(str(e)); st.stop()
+            progress_bar.empty()
+
+            wf_results['etf_df'] = etf_df
+            st.session_state['results'] = wf_results
+            st.session_state.source = 'new_run'
+            st.session_state.uploader_key = st.session_state.get('uploader_key', 0) + 1
+            st.session_state.last_run_config = current_config
+            st.session_state.settings_changed = False
+            st.session_state.toast_shown = False
+            st.session_state.result_selector = "--- 새로운 백테스트 실행 ---"
+            if 'backtest_save_name' in st.session_state:
+                del st.session_state.backtest_save_name
+            st.session_state.toast_message = f"워크포워드 완료: {len(wf_results['walk_forward']['windows'])}개 구간"
+            st.rerun()
 
 
-            
 # --- 페이지 최상단/최하단 이동 버튼 추가 ---
 st.markdown("""
     <style>
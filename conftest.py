@@ -0,0 +1,44 @@
+"""
+테스트 공용 픽스처: 네트워크 없이 백테스트를 실행할 수 있는 작은 합성 가격 테이블과 설정
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+TICKERS = ['SPY', 'EFA', 'VWO', 'TLT', 'IEF', 'BIL']
+
+
+def make_prices(years=4, seed=1):
+    """자산별 기대수익률/변동성이 다른 일별 가격 테이블 (같은 인자면 항상 같은 값)"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=252 * years)
+    drift = rng.normal(0.06, 0.04, len(TICKERS))
+    volatility = rng.uniform(0.05, 0.3, len(TICKERS))
+    log_returns = (drift - volatility ** 2 / 2) / 252 + volatility / np.sqrt(252) * rng.standard_normal((len(index), len(TICKERS)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(log_returns, axis=0)), index=index, columns=TICKERS)
+
+
+def make_config(prices, backtest_type='일별'):
+    """가격 테이블로 백테스트 설정을 만드는 함수 (앞쪽 세 자산은 공격, 나머지는 방어 자산)"""
+    return {
+        'tickers': {'CANARY': ['EFA'], 'AGGRESSIVE': TICKERS[:3], 'DEFENSIVE': TICKERS[3:]},
+        'benchmark': 'SPY',
+        'start_date': (prices.index[0] + pd.DateOffset(months=12)).date(),
+        'end_date': prices.index[-1].date(),
+        'backtest_type': backtest_type,
+        'momentum_params': {'type': '13612U', 'periods': [1, 3, 6, 12]},
+        'rebalance_freq': '월별', 'rebalance_day': '월말',
+        'portfolio_params': {'top_n_aggressive': 2, 'top_n_defensive': 1, 'use_canary': True, 'use_hybrid_protection': False},
+        'transaction_cost': 0.001, 'risk_free_rate': 0.02, 'initial_capital': 10000, 'monthly_contribution': 100,
+    }
+
+
+@pytest.fixture
+def prices():
+    return make_prices()
+
+
+@pytest.fixture
+def config_for():
+    """가격 테이블과 백테스트 방식으로 설정을 만드는 함수를 돌려주는 픽스처"""
+    return make_config
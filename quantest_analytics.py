@@ -0,0 +1,396 @@
+"""
+Quantest 결과 분석 도구 (Streamlit 없이 사용할 수 있는 계산 로직)
+
+백테스트 결과(run_backtest의 반환값)를 받아 추가 분석 지표를 계산합니다.
+
+    from quantest_analytics import run_monte_carlo, summarize_monte_carlo
+    samples = run_monte_carlo(results['portfolio_returns'], results['benchmark_returns'], results['target_weights'].index, config)
+    summary = summarize_monte_carlo(samples, config['initial_capital'], config['monthly_contribution'])
+"""
+import numpy as np
+import pandas as pd
+
+from quantest_engine import compound_with_contributions
+from quantest_metrics import calculate_metric_arrays, get_periods_per_year
+
+# -----------------------------------------------------------------------------
+# 1. 몬테카를로 (블록 부트스트랩) 강건성 분석
+# -----------------------------------------------------------------------------
+# 수익률 시계열을 연속된 블록 단위로 다시 뽑아 가상의 경로를 만들고, 경로마다 성과 지표를 계산합니다.
+# 전략과 벤치마크는 같은 인덱스로 뽑아(짝지어) 두 시계열의 동시점 상관관계를 유지합니다.
+MONTE_CARLO_METRICS = ['cagr', 'mdd', 'sharpe_ratio', 'final_assets']
+MONTE_CARLO_CHUNK_BYTES = 256 * 1024 * 1024  # 한 번에 만드는 경로 행렬의 최대 크기
+
+
+def block_bootstrap_indices(n_periods, n_paths, block_size, rng):
+    """순환 블록 부트스트랩 인덱스 행렬 (경로 수 x 기간 수)을 반환하는 함수"""
+    block_size = max(1, min(int(block_size), n_periods))
+    n_blocks = -(-n_periods // block_size)
+    starts = rng.integers(0, n_periods, size=(n_paths, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)) % n_periods
+    return indices.reshape(n_paths, -1)[:, :n_periods]
+
+
+def _bootstrap_path_metrics(sampled_returns, contributions, years, periods_per_year, rf_rate):
+    """(경로 x 기간 x 시계열) 수익률 배열에서 경로별 CAGR/MDD/샤프/적립식 단위 최종 가치를 계산하는 함수"""
+    n_paths, n_periods, n_series = sampled_returns.shape
+    # [수정] 경로 x 시계열을 열로 펼쳐 성과 지표 일괄 계산 함수로 한 번에 계산합니다.
+    path_metrics = calculate_metric_arrays(
+        sampled_returns.transpose(1, 0, 2).reshape(n_periods, n_paths * n_series), years, periods_per_year, rf_rate
+    )
+    growth = np.cumprod(1 + sampled_returns, axis=1)
+    final_growth = growth[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 적립식 단위 최종 가치: V_T = G_T * Σ c_s / G_s (초기 투자금 1의 최종 가치는 G_T)
+        contribution_final = final_growth * np.einsum('s,psk->pk', contributions, 1 / growth)
+
+    # 자산이 0이 되는 경로는 누적곱으로 나눌 수 없으므로 점화식으로 다시 계산합니다.
+    for path, col in zip(*np.nonzero((growth == 0).any(axis=1))):
+        contribution_final[path, col] = compound_with_contributions(
+            1 + sampled_returns[path, :, col:col + 1], 0.0, contributions
+        )[-1, 0]
+    return {
+        **{metric: path_metrics[metric].reshape(n_paths, n_series) for metric in ('cagr', 'mdd', 'sharpe_ratio')},
+        'capital_unit': final_growth, 'contribution_unit': contribution_final,
+    }
+
+
+def run_monte_carlo(portfolio_returns, benchmark_returns, contribution_dates, config,
+                    n_paths=2000, block_size=None, seed=None, chunk_bytes=MONTE_CARLO_CHUNK_BYTES):
+    """전략/벤치마크 수익률을 짝지어 블록 부트스트랩하고 경로별 지표 표(DataFrame)를 반환하는 함수.
+
+    열은 ('strategy' | 'benchmark', 지표) 형태이며, 적립식 최종 가치는 투자 금액과 무관한 단위 값
+    (capital_unit, contribution_unit)으로 저장되어 summarize_monte_carlo에서 금액을 곱합니다.
+    block_size를 주지 않으면 월별은 12기간, 일별은 21기간 블록을 사용합니다.
+    """
+    returns = pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['strategy', 'benchmark']).fillna(0)
+    values = returns.to_numpy(dtype=float)
+    n_periods = len(values)
+    if n_periods < 2:
+        raise ValueError("부트스트랩을 하려면 수익률 데이터가 2개 이상 필요합니다.")
+
+    is_monthly = config['backtest_type'].split(' ')[0] == '월별'
+    periods_per_year = get_periods_per_year(config)
+    block_size = block_size or (12 if is_monthly else 21)
+    years = (returns.index[-1] - returns.index[0]).days / 365.25
+    if years <= 0:
+        raise ValueError("백테스트 기간이 너무 짧아 연환산 지표를 계산할 수 없습니다.")
+
+    # 원래 일정과 같은 위치(기간 순서)에 추가 투자금이 입금된다고 가정합니다.
+    contributions = returns.index.isin(contribution_dates).astype(float)
+
+    rng = np.random.default_rng(seed)
+    # 경로 행렬, 누적곱, 고점 등 중간 배열을 고려하여 한 번에 처리할 경로 수를 정합니다.
+    paths_per_chunk = max(1, int(chunk_bytes // (n_periods * values.shape[1] * 8 * 8)))
+    chunks = []
+    for start in range(0, n_paths, paths_per_chunk):
+        size = min(paths_per_chunk, n_paths - start)
+        indices = block_bootstrap_indices(n_periods, size, block_size, rng)
+        chunks.append(_bootstrap_path_metrics(values[indices], contributions, years, periods_per_year, config['risk_free_rate']))
+
+    samples = {}
+    for metric in chunks[0]:
+        stacked = np.concatenate([chunk[metric] for chunk in chunks])
+        for j, series_name in enumerate(returns.columns):
+            samples[(series_name, metric)] = stacked[:, j]
+    return pd.DataFrame(samples)
+
+
+def summarize_monte_carlo(samples, initial_capital, monthly_contribution, confidence=0.9):
+    """경로별 지표 표로 지표별 평균/중앙값/신뢰구간 요약 표와, 금액을 반영한 경로별 지표 표를 반환하는 함수"""
+    path_metrics = {}
+    for series_name in samples.columns.get_level_values(0).unique():
+        series_samples = samples[series_name]
+        path_metrics[series_name] = pd.DataFrame({
+            'cagr': series_samples['cagr'], 'mdd': series_samples['mdd'], 'sharpe_ratio': series_samples['sharpe_ratio'],
+            'final_assets': initial_capital * series_samples['capital_unit'] + monthly_contribution * series_samples['contribution_unit'],
+        })
+    path_metrics = pd.concat(path_metrics, axis=1)
+
+    lower_q, upper_q = (1 - confidence) / 2, 1 - (1 - confidence) / 2
+    summary = pd.DataFrame({
+        'mean': path_metrics.mean(),
+        'median': path_metrics.median(),
+        'lower': path_metrics.quantile(lower_q),
+        'upper': path_metrics.quantile(upper_q),
+    })
+    return summary, path_metrics
+
+
+# -----------------------------------------------------------------------------
+# 2. 여러 결과 비교 패널
+# -----------------------------------------------------------------------------
+# 결과마다 그래프를 따로 그리는 대신, 모든 시계열을 공통 날짜 인덱스의 (날짜 x 결과) 패널 하나로 맞춥니다.
+COMPARISON_METRICS = ['final_assets', 'cagr', 'mdd', 'volatility', 'sharpe_ratio', 'total_contribution', 'total_profit']
+# 예전 결과에는 없을 수 있는 지표 (없으면 0 대신 빈 값으로 표시)
+COMPARISON_RISK_METRICS = ['sortino_ratio', 'calmar_ratio', 'cvar', 'beta', 'alpha', 'tracking_error']
+
+
+def build_comparison_panel(names, results_list):
+    """여러 결과를 공통 날짜 인덱스의 누적 수익률(%)/하락폭 패널과 성과 지표 표로 만드는 함수"""
+    timeseries = [results.get('timeseries', {}) for results in results_list]
+    empty = pd.Series(dtype=float)
+    # 시계열이 없는 결과는 빈 열이 되어 그래프에서 빠집니다.
+    values = pd.concat([ts.get('portfolio_value', empty) for ts in timeseries], axis=1, keys=range(len(names)))
+    drawdown = pd.concat([ts.get('strategy_drawdown', empty) for ts in timeseries], axis=1, keys=range(len(names)))
+
+    # 누적 원금 = 추가 투자일마다 월별 추가 투자금 + 각 결과의 첫 날 초기 투자금 (결과마다 일정이 달라 열별 지시 행렬 사용)
+    configs = [results.get('config', {}) for results in results_list]
+    is_contribution = pd.concat(
+        [pd.Series(1.0, index=getattr(results.get('target_weights'), 'index', pd.DatetimeIndex([]))) for results in results_list],
+        axis=1, keys=range(len(names))
+    ).reindex(values.index).fillna(0).to_numpy()
+    present = values.notna().to_numpy()
+    adds = is_contribution * np.array([c.get('monthly_contribution', 0) for c in configs], dtype=float) * present
+    first_rows = present.argmax(axis=0)
+    adds[first_rows, np.arange(len(names))] += np.array([c.get('initial_capital', 0) for c in configs], dtype=float)
+    contributed = np.where(present, np.cumsum(adds, axis=0), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return_pct = (values.to_numpy() - contributed) / np.where(contributed == 0, np.nan, contributed) * 100
+
+    metrics = pd.DataFrame.from_records(
+        [{**{key: results.get('metrics', {}).get(key, 0) for key in COMPARISON_METRICS},
+          **{key: results.get('metrics', {}).get(key, np.nan) for key in COMPARISON_RISK_METRICS}}
+         for results in results_list]
+    ).astype(float)
+    metrics['final_return_rate'] = np.where(
+        metrics['total_contribution'] != 0, metrics['total_profit'] / metrics['total_contribution'].replace(0, np.nan), 0
+    )
+    metrics['currency_symbol'] = [results.get('currency_symbol', '$') for results in results_list]
+    metrics.index = names
+
+    return {
+        'return_pct': pd.DataFrame(return_pct, index=values.index, columns=names),
+        'drawdown': drawdown.set_axis(names, axis=1),
+        'metrics': metrics,
+    }
+
+
+def downsample_minmax(panel, max_points):
+    """패널의 각 열을 구간별 최솟값/최댓값 점만 남겨 max_points 안팎으로 줄이는 함수.
+
+    모든 열을 (구간 x 구간 길이 x 열) 배열로 바꿔 한 번에 계산하며, 열마다 (날짜, 값) 쌍의 목록을 반환합니다.
+    """
+    values = panel.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    if n_rows <= max_points:
+        rows = np.repeat(np.arange(n_rows)[:, None], n_cols, axis=1)
+    else:
+        n_buckets = max(1, max_points // 2)
+        bucket_size = -(-n_rows // n_buckets)
+        padded = np.full((n_buckets * bucket_size, n_cols), np.nan)
+        padded[:n_rows] = values
+        padded = padded.reshape(n_buckets, bucket_size, n_cols)
+        missing = np.isnan(padded)
+        offsets = (np.arange(n_buckets) * bucket_size)[:, None]
+        low_rows = np.where(missing, np.inf, padded).argmin(axis=1) + offsets
+        high_rows = np.where(missing, -np.inf, padded).argmax(axis=1) + offsets
+        # 시작/끝 점은 항상 남겨 선이 잘리지 않게 합니다.
+        edges = np.array([[0], [n_rows - 1]]).repeat(n_cols, axis=1)
+        rows = np.sort(np.minimum(np.concatenate([low_rows, high_rows, edges]), n_rows - 1), axis=0)
+
+    sampled = []
+    for col in range(n_cols):
+        col_rows = np.unique(rows[:, col])
+        col_values = values[col_rows, col]
+        keep = ~np.isnan(col_values)
+        sampled.append((panel.index[col_rows[keep]], col_values[keep]))
+    return sampled
+
+
+# -----------------------------------------------------------------------------
+# 3. 그래프 다운샘플링
+# -----------------------------------------------------------------------------
+# 화면 가로 픽셀보다 훨씬 많은 점은 구분되지 않으므로, 탭1/탭2의 시계열 그래프는 모두 이 함수들로 점을 줄인 뒤 그립니다.
+CHART_POINTS_PER_PIXEL = 2  # 가로 1픽셀에 남기는 점 개수
+
+
+def get_chart_max_points(width_px, points_per_pixel=CHART_POINTS_PER_PIXEL):
+    """그래프 가로 픽셀 수에 맞는 선 하나당 최대 점 개수를 반환하는 함수"""
+    return max(3, int(width_px * points_per_pixel))
+
+
+def _lttb_rows(x, y, n_out):
+    """NaN이 없는 (x, y)에서 LTTB(Largest-Triangle-Three-Buckets)로 고른 n_out개 점의 위치를 반환하는 함수"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # 첫/마지막 점을 뺀 나머지를 n_out - 2개 구간으로 나누고, 구간마다 (이전 선택점, 후보, 다음 구간 평균점)의
+    # 삼각형 넓이가 가장 큰 점을 고릅니다. 다음 구간 평균은 누적합으로 한 번에 계산합니다.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    next_lo = np.append(edges[1:-1], n - 1)
+    next_hi = np.append(edges[2:], n)
+    avg_x = (cum_x[next_hi] - cum_x[next_lo]) / (next_hi - next_lo)
+    avg_y = (cum_y[next_hi] - cum_y[next_lo]) / (next_hi - next_lo)
+
+    rows = np.empty(n_out, dtype=int)
+    rows[0], rows[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        rows[i + 1] = a
+    return rows
+
+
+def downsample_lttb(panel, max_points):
+    """패널의 각 열을 LTTB로 max_points개 점으로 줄이는 함수 (반환 형식은 downsample_minmax와 같음)"""
+    values = panel.to_numpy(dtype=float)
+    index = panel.index
+    x = (index.asi8 - index.asi8[0] if isinstance(index, pd.DatetimeIndex) and len(index) else np.arange(len(index))).astype(float)
+    sampled = []
+    for col in range(values.shape[1]):
+        valid_rows = np.flatnonzero(~np.isnan(values[:, col]))
+        rows = valid_rows[_lttb_rows(x[valid_rows], values[valid_rows, col], max_points)]
+        sampled.append((index[rows], values[rows, col]))
+    return sampled
+
+
+DOWNSAMPLE_METHODS = {'lttb': downsample_lttb, 'minmax': downsample_minmax}
+
+
+def downsample_panel(panel, max_points=None, method='lttb'):
+    """패널(또는 Series)의 열마다 그래프에 그릴 (날짜, 값) 쌍의 목록을 반환하는 함수 (max_points가 None이면 모든 점).
+
+    method는 모양을 잘 보존하는 'lttb'(기본)와, 열이 많을 때 빠르고 극값을 항상 남기는 'minmax' 중에서 고릅니다.
+    """
+    if isinstance(panel, pd.Series):
+        panel = panel.to_frame()
+    if max_points is None or len(panel.index) <= max_points:
+        return downsample_minmax(panel, len(panel.index))  # 점을 줄이지 않고 NaN만 뺍니다.
+    return DOWNSAMPLE_METHODS[method](panel, max_points)
+
+
+def downsample_series(series, max_points=None, method='lttb'):
+    """Series 하나를 그래프에 그릴 (날짜, 값)으로 줄이는 함수"""
+    return downsample_panel(series, max_points, method)[0]
+
+
+# -----------------------------------------------------------------------------
+# 4. 리밸런싱 내역 표
+# -----------------------------------------------------------------------------
+def build_holdings_table(target_weights, ticker_to_name=None):
+    """리밸런싱 날짜별 보유 종목을 '이름 (비중)' 문자열로 정리한 표를 최근 날짜부터 반환하는 함수.
+
+    종목 이름은 열마다 한 번만 찾고, 보유 비중이 0보다 큰 칸만 골라 날짜별로 이어 붙입니다. 보유 종목이 없으면 현금입니다.
+    """
+    ticker_to_name = ticker_to_name or {}
+    names = np.array([ticker_to_name.get(t, t) for t in target_weights.columns], dtype=object)
+    weights = target_weights.to_numpy(dtype=float)
+    rows, cols = np.nonzero(weights > 0)
+    labels = pd.Series(names[cols] + ' (' + pd.Series(weights[rows, cols]).map('{:.0%}'.format).to_numpy() + ')')
+
+    holdings = np.full(len(target_weights.index), '현금 (100%)', dtype=object)
+    joined = labels.groupby(rows).agg(', '.join)
+    holdings[joined.index.to_numpy(dtype=int)] = joined.to_numpy()
+
+    # 리밸런싱 판단 시점을 기준으로 다음 달에 적용되는 구성입니다.
+    table = pd.DataFrame({
+        '적용 월': (target_weights.index + pd.DateOffset(months=1)).strftime('%Y-%m'),
+        '보유 종목': holdings,
+    }, index=target_weights.index.rename('리밸런싱 판단일'))
+    return table.iloc[::-1]
+
+
+# -----------------------------------------------------------------------------
+# 5. 롤링(이동 구간) 지표
+# -----------------------------------------------------------------------------
+# rolling().apply 대신 누적합의 차이(구간 합)와 블록 단위 누적 최대/최소로 모든 구간을 O(n)에 계산합니다.
+ROLLING_METRICS = ['cagr', 'volatility', 'sharpe_ratio', 'mdd', 'beta', 'correlation']
+
+
+def rolling_window_sums(values, window):
+    """열별로 길이 window인 직전 구간의 합을 반환하는 함수 (구간이 다 차지 않은 앞부분은 NaN)"""
+    values = np.asarray(values, dtype=float)
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def window_covariance(x, y, lo, hi):
+    """열별로 [lo, hi) 구간마다 x와 y의 표본 공분산을 반환하는 함수 (x와 y가 같으면 분산, 구간 길이가 2 미만이면 NaN).
+
+    공분산은 평균 이동에 영향을 받지 않으므로, 전체 평균을 뺀 값의 누적합으로 계산해 자릿수 손실을 줄입니다.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x):
+        x, y = x - x.mean(axis=0), y - y.mean(axis=0)
+    x_sum, y_sum, xy_sum = (np.concatenate([np.zeros((1,) + v.shape[1:]), np.cumsum(v, axis=0)]) for v in (x, y, x * y))
+    n = np.reshape(np.asarray(hi) - np.asarray(lo), (-1,) + (1,) * (x.ndim - 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((xy_sum[hi] - xy_sum[lo]) - (x_sum[hi] - x_sum[lo]) * (y_sum[hi] - y_sum[lo]) / n) / (n - 1)
+
+
+def rolling_max_drop(levels, window):
+    """1차원 수준 값(로그 누적 성장 등)의 길이 window 구간마다 '앞선 고점 - 이후 저점'의 최댓값을 반환하는 함수.
+
+    배열을 window 크기 블록으로 나누면 모든 구간은 한 블록의 뒷부분과 다음 블록의 앞부분으로 이루어지므로,
+    블록별 앞/뒤 방향 누적 최대/최소만으로 구간 값을 조합합니다 (van Herk/Gil-Werman 방식).
+    반환 배열의 i번째 값은 levels[i:i + window] 구간의 값입니다.
+    """
+    levels = np.asarray(levels, dtype=float)
+    n = len(levels)
+    if window < 1 or n < window:
+        return np.array([])
+    blocks = np.pad(levels, (0, -n % window), mode='edge').reshape(-1, window)
+    # 블록 앞부분 [블록 시작, t]: 최솟값, 최대 하락폭
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    prefix_min = np.minimum.accumulate(blocks, axis=1).ravel()
+    prefix_drop = np.maximum.accumulate(prefix_max - blocks, axis=1).ravel()
+    # 블록 뒷부분 [s, 블록 끝]: 최댓값, 최대 하락폭
+    reversed_blocks = blocks[:, ::-1]
+    reversed_min = np.minimum.accumulate(reversed_blocks, axis=1)
+    suffix_max = np.maximum.accumulate(reversed_blocks, axis=1)[:, ::-1].ravel()
+    suffix_drop = np.maximum.accumulate(reversed_blocks - reversed_min, axis=1)[:, ::-1].ravel()
+
+    starts = np.arange(n - window + 1)
+    ends = starts + window - 1
+    combined = np.maximum(np.maximum(suffix_drop[starts], prefix_drop[ends]), suffix_max[starts] - prefix_min[ends])
+    # 구간이 블록 하나와 정확히 겹치면 뒷부분 값이 곧 구간 값입니다.
+    return np.where(starts % window == 0, suffix_drop[starts], combined)
+
+
+def calculate_rolling_metrics(portfolio_returns, benchmark_returns, window, periods_per_year, rf_rate=0.0):
+    """전략/벤치마크 수익률의 길이 window(기간 수) 롤링 CAGR, 변동성, 샤프, MDD와 벤치마크 대비 베타, 상관계수를 계산하는 함수.
+
+    열은 (지표, 'Strategy' | 'Benchmark') 형태이며, 베타와 상관계수는 전략 열만 있습니다.
+    """
+    returns = pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['Strategy', 'Benchmark']).fillna(0)
+    values = returns.to_numpy(dtype=float)
+    n_periods = len(values)
+    if window < 2 or n_periods < window:
+        return pd.DataFrame(index=returns.index, columns=pd.MultiIndex.from_product([ROLLING_METRICS, []]))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_growth = np.log1p(values)
+        cagr = np.exp(rolling_window_sums(log_growth, window) * (periods_per_year / window)) - 1
+        starts = np.arange(n_periods - window + 1)
+        variance = np.full(values.shape, np.nan)
+        variance[window - 1:] = np.maximum(window_covariance(values, values, starts, starts + window), 0)
+        volatility = np.sqrt(variance * periods_per_year)
+        sharpe_ratio = np.where(volatility > 0, (cagr - rf_rate) / volatility, 0.0)
+        covariance = np.full(n_periods, np.nan)
+        covariance[window - 1:] = window_covariance(values[:, 0], values[:, 1], starts, starts + window)
+        beta = np.where(variance[:, 1] > 0, covariance / variance[:, 1], np.nan)
+        correlation = np.where(variance.prod(axis=1) > 0, covariance / np.sqrt(variance.prod(axis=1)), np.nan)
+
+        # 최대 낙폭: 구간 시작 직전 가치를 포함한 window + 1개 시점의 로그 누적 성장에서 가장 큰 하락
+        levels = np.vstack([np.zeros((1, 2)), np.cumsum(log_growth, axis=0)])
+        mdd = np.full(values.shape, np.nan)
+        for col in range(2):
+            mdd[window - 1:, col] = np.exp(-rolling_max_drop(levels[:, col], window + 1)) - 1
+
+    columns = {}
+    for metric, array in (('cagr', cagr), ('volatility', volatility), ('sharpe_ratio', sharpe_ratio), ('mdd', mdd)):
+        columns[(metric, 'Strategy')] = array[:, 0]
+        columns[(metric, 'Benchmark')] = array[:, 1]
+    columns[('beta', 'Strategy')] = beta
+    columns[('correlation', 'Strategy')] = correlation
+    table = pd.DataFrame(columns, index=returns.index)
+    table.iloc[:window - 1] = np.nan
+    return table
+
@@ -0,0 +1,81 @@
+"""
+Quantest 일괄 실행기 (명령줄)
+
+웹 화면 없이 설정 JSON 파일로 백테스트를 실행하고 결과를 저장합니다.
+
+    python quantest_batch.py my_config.json other_config.json --out-dir backtest_results
+
+설정 파일은 웹 화면의 gather_current_config()와 같은 형태의 딕셔너리(또는 그 리스트)이며,
+날짜는 'YYYY-MM-DD' 문자열로 적습니다. 'name' 키가 있으면 저장 파일 이름에 사용합니다.
+"""
+import os
+import sys
+import json
+import argparse
+
+import pandas as pd
+
+from quantest_engine import run_backtest
+from quantest_catalog import save_result
+
+SUMMARY_METRICS = ['final_assets', 'cagr', 'mdd', 'volatility', 'sharpe_ratio', 'win_rate', 'sortino_ratio', 'calmar_ratio',
+                   'bm_cagr', 'bm_mdd', 'bm_sharpe_ratio']
+
+
+def load_config_file(path):
+    """설정 JSON 파일을 읽어 (이름, 설정) 목록으로 반환하는 함수"""
+    with open(path, 'r', encoding='utf-8') as f:
+        loaded = json.load(f)
+    configs = loaded if isinstance(loaded, list) else [loaded]
+
+    default_name = os.path.splitext(os.path.basename(path))[0]
+    named_configs = []
+    for i, config in enumerate(configs):
+        config = dict(config)
+        name = config.pop('name', default_name if len(configs) == 1 else f"{default_name}_{i + 1}")
+        # 웹 화면과 같은 형태가 되도록 날짜 문자열을 date 객체로 변환합니다.
+        for key in ('start_date', 'end_date'):
+            if key in config:
+                config[key] = pd.to_datetime(config[key]).date()
+        named_configs.append((name, config))
+    return named_configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantest 백테스트를 설정 JSON 파일로 일괄 실행합니다.")
+    parser.add_argument('configs', nargs='+', help="설정 JSON 파일 경로 (여러 개 가능)")
+    parser.add_argument('--out-dir', default='backtest_results', help="결과 파일을 저장할 폴더 (기본값: backtest_results)")
+    args = parser.parse_args(argv)
+
+    summary_rows = []
+    failed = 0
+    for path in args.configs:
+        for name, config in load_config_file(path):
+            try:
+                results = run_backtest(config)
+                # 결과 파일을 저장하면서 보관함 카탈로그(catalog.sqlite3)에도 기록합니다.
+                file_path = save_result(results, name, args.out_dir)
+            except Exception as e:
+                # 설정 하나의 실패가 나머지 실행을 멈추지 않도록, 어떤 예외든 요약 표의 error에 기록합니다.
+                print(f"[실패] {name}: {e}", file=sys.stderr)
+                summary_rows.append({'name': name, 'file': None, **{key: None for key in SUMMARY_METRICS}, 'error': str(e)})
+                failed += 1
+                continue
+
+            metrics = results['metrics']
+            summary_rows.append({'name': name, 'file': os.path.basename(file_path),
+                                 **{key: metrics.get(key) for key in SUMMARY_METRICS}, 'error': None})
+            print(f"[완료] {name}: CAGR {metrics['cagr']:.2%}, MDD {metrics['mdd']:.2%}, "
+                  f"Sharpe {metrics['sharpe_ratio']:.2f} -> {file_path}")
+
+    if summary_rows:
+        os.makedirs(args.out_dir, exist_ok=True)
+        summary_path = os.path.join(args.out_dir, 'summary.csv')
+        summary_df = pd.DataFrame(summary_rows)
+        summary_df.to_csv(summary_path, mode='a', index=False, header=not os.path.exists(summary_path), encoding='utf-8')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Quantest 핵심 계산 벤치마크 (명령줄)
+
+네트워크 없이 재현 가능한 합성 가격(기하 브라운 운동, GBM)으로 시그널/포트폴리오/수익률 계산의 실행 시간과
+최대 메모리 사용량을 측정하고, 버전 간 비교할 수 있도록 JSON 파일로 저장합니다.
+
+    python quantest_benchmark.py --sizes small medium --missing none gaps
+    python quantest_benchmark.py --sizes large --compare benchmark_results/bench_20250101_120000.json
+
+각 계산은 반복마다 모멘텀 캐시를 비우고 새 가격 테이블 복사본을 넘겨, 캐시가 없는 상태(첫 실행)의 시간을 잽니다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from quantest_engine import (
+    momentum_cache, calculate_signals, construct_portfolio, calculate_cumulative_returns_with_dca,
+    calculate_full_momentum, get_mdd_details, calculate_portfolio_returns,
+)
+from quantest_metrics import calculate_metrics_batch
+
+# 패널 크기 이름 -> (자산 수, 햇수)
+BENCHMARK_SIZES = {
+    'small': (10, 5),
+    'medium': (100, 10),
+    'large': (500, 25),
+    'xlarge': (1000, 30),
+}
+# 결측 데이터 형태: 없음 / 군데군데 빈 값 / 늦게 상장된 자산 / 중간에 상장 폐지된 자산
+MISSING_PATTERNS = ('none', 'gaps', 'late_listing', 'delisted')
+REGRESSION_RATIO = 1.2  # 기준 대비 이 배수 이상 느리거나 메모리를 더 쓰면 표시
+
+
+# -----------------------------------------------------------------------------
+# 1. 합성 가격
+# -----------------------------------------------------------------------------
+def make_synthetic_prices(n_assets, years, seed=0, start='2000-01-03', missing='none', missing_ratio=0.01):
+    """자산별 연 기대수익률/변동성이 다른 GBM 일별 가격 테이블을 만드는 함수 (같은 인자면 항상 같은 값).
+
+    missing='gaps'는 전체 칸의 missing_ratio만큼을 무작위로 비운 뒤 직전 가격으로 채우고(거래소 휴장일이 다른 경우),
+    'late_listing'/'delisted'는 자산의 절반을 무작위 날짜 이전/이후로 비워 둡니다. 첫 번째 자산(벤치마크)은 비우지 않습니다.
+    """
+    if missing not in MISSING_PATTERNS:
+        raise ValueError(f"알 수 없는 결측 형태입니다: {missing}")
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=int(round(252 * years)))
+    drift = rng.normal(0.06, 0.04, n_assets)
+    volatility = rng.uniform(0.1, 0.4, n_assets)
+    shocks = rng.standard_normal((len(index), n_assets))
+    log_returns = (drift - volatility ** 2 / 2) / 252 + volatility / np.sqrt(252) * shocks
+    values = 100 * np.exp(np.cumsum(log_returns, axis=0))
+
+    if missing == 'gaps':
+        gaps = rng.random(values.shape) < missing_ratio
+        gaps[0] = False  # 첫날은 채울 직전 가격이 없으므로 비우지 않습니다.
+        values[gaps] = np.nan
+        values = pd.DataFrame(values).ffill().to_numpy()
+    elif missing in ('late_listing', 'delisted'):
+        rows = np.arange(len(index))[:, None]
+        cutoffs = rng.integers(len(index) // 4, len(index) * 3 // 4, n_assets)
+        affected = rng.random(n_assets) < 0.5
+        mask = (rows < cutoffs) if missing == 'late_listing' else (rows > cutoffs)
+        values[mask & affected] = np.nan
+    values[:, 0] = 100 * np.exp(np.cumsum(log_returns[:, 0]))
+
+    columns = [f"A{i:04d}" for i in range(n_assets)]
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def make_benchmark_config(prices, backtest_type='일별'):
+    """합성 가격 테이블로 백테스트 설정을 만드는 함수 (첫 번째 자산은 벤치마크, 앞쪽 절반은 공격, 나머지는 방어 자산)"""
+    tickers = list(prices.columns)
+    half = max(1, len(tickers) // 2)
+    return {
+        'tickers': {
+            'CANARY': tickers[:max(1, len(tickers) // 100)],
+            'AGGRESSIVE': tickers[:half],
+            'DEFENSIVE': tickers[half:] or tickers[:1],
+        },
+        'benchmark': tickers[0],
+        'start_date': (prices.index[0] + pd.DateOffset(months=12)).date(),
+        'end_date': prices.index[-1].date(),
+        'backtest_type': backtest_type,
+        'momentum_params': {'type': '13612U', 'periods': [1, 3, 6, 12]},
+        'rebalance_freq': '월별', 'rebalance_day': '월말',
+        'portfolio_params': {'top_n_aggressive': 3, 'top_n_defensive': 1, 'use_canary': True, 'use_hybrid_protection': False},
+        'transaction_cost': 0.001, 'risk_free_rate': 0.02, 'initial_capital': 10000, 'monthly_contribution': 100,
+    }
+
+
+# -----------------------------------------------------------------------------
+# 2. 측정 대상
+# -----------------------------------------------------------------------------
+def build_kernels(prices):
+    """(이름, 준비 함수, 실행 함수) 목록을 반환하는 함수. 준비 함수의 반환값(인자 튜플)은 시간 측정에서 제외됩니다."""
+    config = make_benchmark_config(prices)
+    monthly_config = make_benchmark_config(prices, '월별')
+    # 측정 대상이 아닌 앞 단계 출력은 한 번만 미리 계산해 둡니다.
+    momentum_scores = calculate_signals(prices, config)
+    target_weights, _ = construct_portfolio(momentum_scores, config, list(prices.columns))
+    portfolio_returns, benchmark_returns = calculate_portfolio_returns(prices, target_weights, config)
+    returns_pair = pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['strategy', 'benchmark'])
+    strategy_growth = (1 + portfolio_returns).cumprod() * config['initial_capital']
+    asset_returns = prices.pct_change(fill_method=None).iloc[1:]
+
+    def cold_prices():
+        # 모멘텀 캐시와 가격 지문을 새로 계산하도록, 캐시를 비우고 복사본을 넘깁니다.
+        momentum_cache.clear()
+        return prices.copy()
+
+    return [
+        ('calculate_signals', lambda: (cold_prices(), config), calculate_signals),
+        ('construct_portfolio', lambda: (momentum_scores, config, list(prices.columns)), construct_portfolio),
+        ('calculate_full_momentum', lambda: (cold_prices(), config), calculate_full_momentum),
+        ('portfolio_returns_daily', lambda: (prices, target_weights, config), calculate_portfolio_returns),
+        ('portfolio_returns_monthly', lambda: (prices, target_weights, monthly_config), calculate_portfolio_returns),
+        ('calculate_cumulative_returns_with_dca',
+         lambda: (returns_pair, config['initial_capital'], config['monthly_contribution'], target_weights.index),
+         calculate_cumulative_returns_with_dca),
+        ('get_mdd_details', lambda: (strategy_growth,), get_mdd_details),
+        ('calculate_metrics_batch', lambda: (asset_returns, 252, config['risk_free_rate']), calculate_metrics_batch),
+    ]
+
+
+def measure(setup, fn, repeat):
+    """실행 시간(최소/중앙값, 초)과 최대 메모리 사용량(MB, tracemalloc 기준)을 측정하는 함수"""
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+
+    # 메모리는 tracemalloc이 실행을 느리게 하므로 시간 측정과 따로 한 번 더 실행하여 잽니다.
+    args = setup()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'min_s': min(timings), 'median_s': statistics.median(timings), 'peak_mb': (peak - base) / 1024 ** 2}
+
+
+# -----------------------------------------------------------------------------
+# 3. 실행 및 저장
+# -----------------------------------------------------------------------------
+def get_environment():
+    """측정 환경(파이썬/라이브러리 버전, 운영체제, git 커밋) 정보를 반환하는 함수"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'platform': platform.platform(), 'processor': platform.processor(), 'git_commit': commit,
+    }
+
+
+def run_benchmarks(sizes, missing_patterns=('none',), repeat=3, kernels=None, seed=0, progress_callback=None):
+    """크기/결측 형태 조합마다 합성 가격을 만들어 각 계산을 측정하고, 측정 기록 목록을 반환하는 함수"""
+    records = []
+    for size in sizes:
+        n_assets, years = BENCHMARK_SIZES[size]
+        for missing in missing_patterns:
+            prices = make_synthetic_prices(n_assets, years, seed=seed, missing=missing)
+            with warnings.catch_warnings():
+                # 상장 폐지 패턴의 뒤쪽 결측값에서 반복되는 pandas 경고(pct_change의 fill_method)는 출력하지 않습니다.
+                warnings.simplefilter('ignore', FutureWarning)
+                kernel_list = build_kernels(prices)
+                for name, setup, fn in kernel_list:
+                    if kernels and name not in kernels:
+                        continue
+                    record = {
+                        'kernel': name, 'size': size, 'n_assets': n_assets, 'years': years, 'missing': missing,
+                        'n_days': len(prices.index), 'repeat': repeat, **measure(setup, fn, repeat),
+                    }
+                    records.append(record)
+                    if progress_callback:
+                        progress_callback(record)
+    momentum_cache.clear()
+    return records
+
+
+def save_benchmark_file(records, out_dir):
+    """측정 기록과 환경 정보를 out_dir/bench_<시각>.json으로 저장하고 경로를 반환하는 함수"""
+    os.makedirs(out_dir, exist_ok=True)
+    created_at = datetime.now()
+    path = os.path.join(out_dir, f"bench_{created_at.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'created_at': created_at.isoformat(timespec='seconds'), 'environment': get_environment(),
+                   'records': records}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare_benchmarks(records, baseline_records):
+    """같은 (계산, 크기, 결측 형태)끼리 기준 측정 대비 시간/메모리 배수를 계산한 표를 반환하는 함수"""
+    keys = ['kernel', 'size', 'missing']
+    current = pd.DataFrame(records).set_index(keys)
+    baseline = pd.DataFrame(baseline_records).set_index(keys)
+    joined = current[['min_s', 'peak_mb']].join(baseline[['min_s', 'peak_mb']], rsuffix='_base', how='inner')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        joined['time_ratio'] = joined['min_s'] / joined['min_s_base']
+        joined['memory_ratio'] = joined['peak_mb'] / joined['peak_mb_base']
+    joined['regression'] = (joined['time_ratio'] >= REGRESSION_RATIO) | (joined['memory_ratio'] >= REGRESSION_RATIO)
+    return joined.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantest 핵심 계산의 실행 시간과 메모리 사용량을 합성 가격으로 측정합니다.")
+    parser.add_argument('--sizes', nargs='+', default=list(BENCHMARK_SIZES), choices=list(BENCHMARK_SIZES),
+                        help="패널 크기 (기본값: 전체)")
+    parser.add_argument('--missing', nargs='+', default=['none'], choices=list(MISSING_PATTERNS),
+                        help="결측 데이터 형태 (기본값: none)")
+    parser.add_argument('--kernels', nargs='+', default=None, help="측정할 계산 이름 (기본값: 전체)")
+    parser.add_argument('--repeat', type=int, default=3, help="시간 측정 반복 횟수 (기본값: 3)")
+    parser.add_argument('--seed', type=int, default=0, help="합성 가격 난수 시드 (기본값: 0)")
+    parser.add_argument('--out-dir', default='benchmark_results', help="결과 JSON을 저장할 폴더 (기본값: benchmark_results)")
+    parser.add_argument('--compare', default=None, help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args(argv)
+
+    def report(record):
+        print(f"[{record['size']}/{record['missing']}] {record['kernel']}: "
+              f"{record['min_s'] * 1000:,.1f} ms (중앙값 {record['median_s'] * 1000:,.1f} ms), 최대 {record['peak_mb']:,.1f} MB")
+
+    records = run_benchmarks(args.sizes, args.missing, max(1, args.repeat), args.kernels, args.seed, report)
+    path = save_benchmark_file(records, args.out_dir)
+    print(f"[저장] {path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['records']
+        comparison = compare_benchmarks(records, baseline)
+        if comparison.empty:
+            print("비교할 수 있는 (계산, 크기, 결측 형태) 조합이 없습니다.")
+        for row in comparison.itertuples():
+            flag = '  <- 느려짐/메모리 증가' if row.regression else ''
+            print(f"[비교] {row.size}/{row.missing} {row.kernel}: 시간 x{row.time_ratio:.2f}, 메모리 x{row.memory_ratio:.2f}{flag}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
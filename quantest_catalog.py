@@ -0,0 +1,196 @@
+"""
+Quantest 결과 보관함 목록 (backtest_results 폴더의 SQLite 카탈로그)
+
+결과 파일을 저장할 때 설정 해시, 티커, 기간, 주요 성과 지표를 catalog.sqlite3에 한 행으로 기록합니다.
+비교 탭에서는 파일을 열지 않고 이 표에서 필터/정렬/페이지 단위 조회를 합니다.
+
+    from quantest_catalog import save_result, query_catalog
+    save_result(results, '나의 전략', 'backtest_results')
+    page, total = query_catalog('backtest_results', ticker='SPY', order_by='cagr', limit=20)
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import itertools
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from quantest_engine import safe_file_name
+from quantest_results import RESULT_FILE_EXTENSION, RESULT_FILE_EXTENSIONS, load_result_file, save_result_file
+
+CATALOG_FILE_NAME = 'catalog.sqlite3'
+# 카탈로그에 기록하는 성과 지표 (results['metrics']의 키)
+CATALOG_METRICS = ['final_assets', 'cagr', 'mdd', 'volatility', 'sharpe_ratio', 'win_rate', 'bm_cagr', 'bm_mdd']
+CATALOG_COLUMNS = [
+    'file', 'name', 'saved_at', 'config_hash', 'start_date', 'end_date', 'backtest_type', 'benchmark',
+    'momentum_type', 'rebalance_freq', 'tickers', *CATALOG_METRICS,
+]
+# 정렬에 사용할 수 있는 열 (SQL에 그대로 들어가므로 이 목록 안의 값만 허용)
+CATALOG_SORT_COLUMNS = ['saved_at', 'name', 'start_date', 'end_date', *CATALOG_METRICS]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    file TEXT PRIMARY KEY, name TEXT, saved_at TEXT, config_hash TEXT, start_date TEXT, end_date TEXT,
+    backtest_type TEXT, benchmark TEXT, momentum_type TEXT, rebalance_freq TEXT, tickers TEXT,
+    {', '.join(f'{metric} REAL' for metric in CATALOG_METRICS)}
+);
+CREATE INDEX IF NOT EXISTS idx_runs_saved_at ON runs (saved_at);
+CREATE INDEX IF NOT EXISTS idx_runs_name ON runs (name);
+CREATE INDEX IF NOT EXISTS idx_runs_config_hash ON runs (config_hash);
+CREATE INDEX IF NOT EXISTS idx_runs_cagr ON runs (cagr);
+CREATE INDEX IF NOT EXISTS idx_runs_sharpe_ratio ON runs (sharpe_ratio);
+"""
+
+
+def get_catalog_path(results_dir):
+    return os.path.join(results_dir, CATALOG_FILE_NAME)
+
+
+def connect_catalog(results_dir):
+    """카탈로그에 연결하는 함수 (파일과 표가 없으면 만듦)"""
+    os.makedirs(results_dir, exist_ok=True)
+    conn = sqlite3.connect(get_catalog_path(results_dir))
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def config_hash(config):
+    """설정 딕셔너리의 해시 (같은 설정으로 실행한 결과를 묶어 찾을 때 사용)"""
+    encoded = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _parse_saved_at(file_name):
+    """'YYYYmmddHHMMSS_이름.확장자' 파일 이름에서 저장 시각과 이름을 꺼내는 함수 (형식이 다르면 None)"""
+    stem = os.path.splitext(file_name)[0]
+    parts = stem.split('_', 1)
+    try:
+        return datetime.strptime(parts[0], '%Y%m%d%H%M%S'), (parts[1] if len(parts) > 1 else stem)
+    except ValueError:
+        return None, stem
+
+
+def catalog_row(file_name, name, results, saved_at):
+    """결과 딕셔너리에서 카탈로그 한 행을 만드는 함수 (헤더에 있는 값만 사용하므로 시계열은 읽지 않음)"""
+    config = results.get('config', {})
+    metrics = results.get('metrics', {})
+    tickers = config.get('tickers', {})
+    all_tickers = {t for group in tickers.values() for t in group}
+    if config.get('benchmark'):
+        all_tickers.add(config['benchmark'])
+    to_text = lambda value: None if value is None else str(value)
+    return {
+        'file': file_name, 'name': name, 'saved_at': saved_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'config_hash': config_hash(config),
+        'start_date': to_text(config.get('start_date')), 'end_date': to_text(config.get('end_date')),
+        'backtest_type': config.get('backtest_type'), 'benchmark': config.get('benchmark'),
+        'momentum_type': config.get('momentum_params', {}).get('type'), 'rebalance_freq': config.get('rebalance_freq'),
+        # 앞뒤에 쉼표를 붙여 ',SPY,' 형태로 정확한 티커를 검색할 수 있게 합니다.
+        'tickers': f",{','.join(sorted(all_tickers))},",
+        **{metric: None if metrics.get(metric) is None else float(metrics[metric]) for metric in CATALOG_METRICS},
+    }
+
+
+def _insert_rows(conn, rows):
+    placeholders = ', '.join('?' for _ in CATALOG_COLUMNS)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO runs ({', '.join(CATALOG_COLUMNS)}) VALUES ({placeholders})",
+        [[row[column] for column in CATALOG_COLUMNS] for row in rows]
+    )
+
+
+def record_result(results_dir, file_name, name, results, saved_at=None):
+    """저장된 결과 파일 하나를 카탈로그에 기록하는 함수"""
+    with closing(connect_catalog(results_dir)) as conn, conn:
+        _insert_rows(conn, [catalog_row(file_name, name, results, saved_at or datetime.now())])
+
+
+def save_result(results, name, results_dir):
+    """결과를 보관함 폴더에 .qtr 파일로 저장하고 카탈로그에 기록한 뒤 파일 경로를 반환하는 함수.
+
+    파일 이름에는 경로 문자를 치환한 이름을 쓰며, 같은 초에 같은 이름으로 저장하면 '_2', '_3' ...을 붙여 덮어쓰지 않습니다.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    saved_at = datetime.now()
+    stem = f"{saved_at.strftime('%Y%m%d%H%M%S')}_{safe_file_name(name)}"
+    for number in itertools.count(1):
+        file_name = f"{stem}{'' if number == 1 else f'_{number}'}{RESULT_FILE_EXTENSION}"
+        try:
+            # 파일이 이미 있으면 실패하는 모드로 열므로, 동시에 저장해도 서로 덮어쓰지 않습니다.
+            file_path = save_result_file({**results, 'name': name}, os.path.join(results_dir, file_name), overwrite=False)
+            break
+        except FileExistsError:
+            continue
+    record_result(results_dir, file_name, name, results, saved_at)
+    return file_path
+
+
+def sync_catalog(results_dir):
+    """카탈로그에 없는 결과 파일은 추가하고, 사라진 파일의 행은 지우는 함수. (추가 개수, 삭제 개수)를 반환합니다."""
+    if not os.path.isdir(results_dir):
+        return 0, 0
+    files = {f for f in os.listdir(results_dir) if f.endswith(RESULT_FILE_EXTENSIONS)}
+    with closing(connect_catalog(results_dir)) as conn, conn:
+        known = {row[0] for row in conn.execute("SELECT file FROM runs")}
+        removed = known - files
+        conn.executemany("DELETE FROM runs WHERE file = ?", [(f,) for f in removed])
+
+        rows = []
+        for file_name in sorted(files - known):
+            saved_at, name = _parse_saved_at(file_name)
+            file_path = os.path.join(results_dir, file_name)
+            try:
+                results = load_result_file(file_path)
+            except Exception:
+                continue  # 읽을 수 없는 파일은 건너뜁니다.
+            saved_at = saved_at or datetime.fromtimestamp(os.path.getmtime(file_path))
+            rows.append(catalog_row(file_name, results.get('name', name), results, saved_at))
+        _insert_rows(conn, rows)
+    return len(rows), len(removed)
+
+
+def query_catalog(results_dir, name=None, ticker=None, benchmark=None, backtest_type=None, momentum_type=None,
+                  min_cagr=None, max_drawdown=None, min_sharpe=None, config_hash_value=None,
+                  order_by='saved_at', descending=True, limit=50, offset=0):
+    """조건에 맞는 결과를 정렬하여 한 페이지만 (DataFrame, 전체 개수)로 반환하는 함수.
+
+    max_drawdown은 양수 비율(예: 0.3 → MDD가 -30%보다 나은 결과만)로 지정합니다.
+    """
+    if order_by not in CATALOG_SORT_COLUMNS:
+        raise ValueError(f"정렬할 수 없는 열입니다: {order_by}")
+    conditions, params = [], []
+    if name:
+        conditions.append("name LIKE ?"); params.append(f"%{name}%")
+    if ticker:
+        conditions.append("tickers LIKE ?"); params.append(f"%,{ticker.strip().upper()},%")
+    for column, value in (('benchmark', benchmark), ('backtest_type', backtest_type),
+                          ('momentum_type', momentum_type), ('config_hash', config_hash_value)):
+        if value:
+            conditions.append(f"{column} = ?"); params.append(value)
+    if min_cagr is not None:
+        conditions.append("cagr >= ?"); params.append(min_cagr)
+    if max_drawdown is not None:
+        conditions.append("mdd >= ?"); params.append(-abs(max_drawdown))
+    if min_sharpe is not None:
+        conditions.append("sharpe_ratio >= ?"); params.append(min_sharpe)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with closing(connect_catalog(results_dir)) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+        page = pd.read_sql_query(
+            f"SELECT * FROM runs {where} ORDER BY {order_by} {'DESC' if descending else 'ASC'}, file LIMIT ? OFFSET ?",
+            conn, params=[*params, int(limit), int(offset)]
+        )
+    page['tickers'] = page['tickers'].str.strip(',')
+    return page, total
+
+
+def get_catalog_options(results_dir, column):
+    """필터 선택지로 쓸 열의 고유 값 목록을 반환하는 함수"""
+    if column not in ('benchmark', 'backtest_type', 'momentum_type'):
+        raise ValueError(f"선택지를 만들 수 없는 열입니다: {column}")
+    with closing(connect_catalog(results_dir)) as conn:
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT {column} FROM runs WHERE {column} IS NOT NULL ORDER BY 1")]
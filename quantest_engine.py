@@ -0,0 +1,995 @@
+"""
+Quantest 백테스트 엔진 (Streamlit 없이 사용할 수 있는 계산 로직)
+
+Quantest_v10.py(웹 화면)와 quantest_batch.py(명령줄 일괄 실행)가 함께 사용합니다.
+    from quantest_engine import run_backtest
+    results = run_backtest(config)   # config는 gather_current_config()와 같은 형태의 딕셔너리
+"""
+import os
+import sys
+import copy
+import json
+import hashlib
+import weakref
+import warnings
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from quantest_metrics import PERFORMANCE_METRICS, calculate_metrics_batch, get_periods_per_year, get_years
+from quantest_periods import calculate_period_returns
+
+
+class BacktestError(Exception):
+    """데이터 로딩/시그널 계산 실패처럼 백테스트를 계속할 수 없을 때 발생하는 예외"""
+
+
+# -----------------------------------------------------------------------------
+# 1. 가격 데이터
+# -----------------------------------------------------------------------------
+
+# --- [추가] 로컬 가격 저장소 (티커별 Parquet 파일 + manifest.json) ---
+# 한 번 받은 가격은 디스크에 보관하고, 이후에는 부족한 최근 구간만 추가로 다운로드합니다.
+PRICE_STORE_DIR = 'price_store'
+PRICE_STORE_FIELDS = ['Adj Close', 'Close']
+
+def get_price_store_path():
+    """가격 저장소 폴더의 전체 경로를 반환하는 함수"""
+    if getattr(sys, 'frozen', False):
+        application_path = os.path.dirname(sys.executable)
+    else:
+        application_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(application_path, PRICE_STORE_DIR)
+
+def safe_file_name(text):
+    """'^GSPC', 'BRK/B' 처럼 파일명에 쓰기 곤란한 문자(경로 구분자 포함)를 '_'로 치환하는 함수"""
+    return ''.join(c if c.isalnum() or c in '.-_' else '_' for c in text)
+
+def _price_store_file_name(ticker):
+    return f"{safe_file_name(ticker)}.parquet"
+
+def load_price_manifest(store_path):
+    """저장소의 manifest(티커별 보관 구간 정보)를 읽는 함수"""
+    manifest_path = os.path.join(store_path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # manifest가 손상된 경우, 저장소가 비어 있는 것으로 간주하고 다시 받습니다.
+        return {}
+
+def save_price_manifest(store_path, manifest):
+    """manifest를 임시 파일에 쓴 뒤 교체하여, 중간에 중단되어도 손상되지 않도록 저장하는 함수"""
+    manifest_path = os.path.join(store_path, 'manifest.json')
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def _split_downloaded_prices(raw_data, tickers):
+    """yf.download 결과를 티커별 ['Adj Close', 'Close'] 데이터프레임으로 나누는 함수"""
+    frames = {}
+    if raw_data is None or raw_data.empty:
+        return frames
+    for ticker in tickers:
+        columns = {}
+        for field in PRICE_STORE_FIELDS:
+            if isinstance(raw_data.columns, pd.MultiIndex):
+                if (field, ticker) in raw_data.columns:
+                    columns[field] = raw_data[(field, ticker)]
+            elif field in raw_data.columns and len(tickers) == 1:
+                columns[field] = raw_data[field]
+        if not columns:
+            continue
+        df = pd.DataFrame(columns).reindex(columns=PRICE_STORE_FIELDS).astype(float)
+        df = df.dropna(how='all')
+        if not df.empty:
+            df.index = pd.to_datetime(df.index).tz_localize(None)
+            df.index.name = 'Date'
+            frames[ticker] = df
+    return frames
+
+def _merge_price_tail(stored, tail):
+    """저장된 가격 뒤에 새로 받은 구간을 이어 붙이는 함수.
+
+    배당/분할이 새로 반영되면 과거 전체의 수정 종가가 같은 비율로 바뀌므로,
+    두 구간이 겹치는 날짜의 비율로 기존 데이터를 보정합니다. 겹치는 날짜가 없으면 None을 반환합니다.
+    """
+    overlap_date = stored.index[-1]
+    if overlap_date not in tail.index:
+        return None
+    stored = stored.copy()
+    for field in PRICE_STORE_FIELDS:
+        old_value = stored.at[overlap_date, field]
+        new_value = tail.at[overlap_date, field]
+        if pd.notna(old_value) and pd.notna(new_value) and old_value != 0:
+            ratio = new_value / old_value
+            if abs(ratio - 1) > 1e-9:
+                stored[field] = stored[field] * ratio
+    merged = pd.concat([stored.iloc[:-1], tail[tail.index >= overlap_date]])
+    return merged[~merged.index.duplicated(keep='last')]
+
+def update_price_store(tickers, start, end, store_path=None):
+    """저장소가 요청 구간을 덮지 못하는 티커만 다운로드하여 저장소를 갱신하고, 티커별 가격을 반환하는 함수.
+
+    - 저장소가 [start, end) 구간을 이미 덮고 있으면 네트워크를 사용하지 않습니다.
+    - 끝 구간만 부족하면 마지막 저장일부터의 구간만 받습니다.
+    - 시작 구간이 부족하면 (시작일을 앞당긴 경우) 해당 티커 전체를 다시 받습니다.
+    - 다운로드에 실패해도 저장된 데이터가 있으면 그대로 사용합니다.
+    """
+    store_path = store_path or get_price_store_path()
+    os.makedirs(store_path, exist_ok=True)
+    manifest = load_price_manifest(store_path)
+
+    start = pd.Timestamp(start).normalize()
+    # yfinance의 end는 '미포함'이며, 오늘 이후의 데이터는 존재하지 않으므로 오늘로 제한합니다.
+    end = min(pd.Timestamp(end).normalize(), pd.Timestamp.today().normalize())
+
+    stored_frames = {}
+    fetch_plan = {}  # (다운로드 시작일, 종료일) -> 티커 목록
+    for ticker in tickers:
+        entry = manifest.get(ticker)
+        file_path = os.path.join(store_path, _price_store_file_name(ticker))
+        stored = None
+        if entry and os.path.exists(file_path):
+            try:
+                stored = pd.read_parquet(file_path)
+            except Exception:
+                stored = None
+        if stored is None or stored.empty:
+            fetch_plan.setdefault((start, end), []).append(ticker)
+            continue
+
+        stored_frames[ticker] = stored
+        fetched_from = pd.Timestamp(entry['fetched_from'])
+        fetched_to = pd.Timestamp(entry['fetched_to'])
+        if start < fetched_from:
+            fetch_plan.setdefault((start, max(end, fetched_to)), []).append(ticker)
+        elif end > fetched_to:
+            fetch_plan.setdefault((stored.index[-1], end), []).append(ticker)
+
+    manifest_changed = False
+    for (fetch_start, fetch_end), plan_tickers in fetch_plan.items():
+        try:
+            raw_data = yf.download(
+                plan_tickers,
+                start=fetch_start,
+                end=fetch_end,
+                progress=False,
+                auto_adjust=False  # 'Adj Close' 컬럼을 포함하여 받습니다.
+            )
+        except Exception as e:
+            # 네트워크/yfinance 오류는 이 묶음만 건너뛰고 (manifest를 갱신하지 않아 다음 실행 때 다시 시도), 저장된 데이터를 사용합니다.
+            warnings.warn(f"가격 다운로드에 실패하여 저장된 데이터를 사용합니다 ({', '.join(plan_tickers)}): {e}")
+            continue
+        downloaded = _split_downloaded_prices(raw_data, plan_tickers)
+        for ticker in plan_tickers:
+            new_frame = downloaded.get(ticker)
+            if new_frame is None:
+                continue  # 실패한 티커는 기록하지 않고 다음 실행 때 다시 시도합니다.
+
+            entry = manifest.get(ticker, {})
+            stored = stored_frames.get(ticker)
+            is_tail_update = stored is not None and fetch_start == stored.index[-1]
+            if is_tail_update:
+                merged = _merge_price_tail(stored, new_frame)
+                if merged is None:
+                    continue  # 겹치는 날짜가 없어 보정할 수 없으면 기존 데이터를 그대로 씁니다.
+                fetched_from = pd.Timestamp(entry['fetched_from'])
+            else:
+                merged = new_frame
+                fetched_from = fetch_start
+
+            merged.to_parquet(os.path.join(store_path, _price_store_file_name(ticker)))
+            stored_frames[ticker] = merged
+            manifest[ticker] = {
+                'file': _price_store_file_name(ticker),
+                'fetched_from': fetched_from.strftime('%Y-%m-%d'),
+                'fetched_to': fetch_end.strftime('%Y-%m-%d'),
+                'last_date': merged.index[-1].strftime('%Y-%m-%d'),
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            manifest_changed = True
+
+    if manifest_changed:
+        save_price_manifest(store_path, manifest)
+
+    return {
+        ticker: frame[(frame.index >= start) & (frame.index < end)]
+        for ticker, frame in stored_frames.items()
+    }
+
+def get_price_data(tickers, start, end, user_start_date):
+    """가격 저장소에서 티커들의 가격을 불러와, 모든 티커가 존재하는 구간의 가격 테이블을 만드는 함수.
+
+    (가격, 실패한 티커 목록, 가장 늦게 시작하여 시작일을 늦춘 티커 목록)을 반환합니다.
+    """
+    price_frames = update_price_store(tickers, start, end)
+    price_frames = {t: df for t, df in price_frames.items() if not df.empty}
+
+    if not price_frames:
+        raise BacktestError("데이터를 다운로드하지 못했습니다.")
+
+    # 'Adj Close'가 있는지 먼저 확인하고, 없으면 'Close'를 사용하는 로직
+    prices = pd.DataFrame({
+        ticker: price_frames[ticker]['Adj Close'] if price_frames[ticker]['Adj Close'].notna().any() else price_frames[ticker]['Close']
+        for ticker in tickers if ticker in price_frames
+    })
+    if any(df['Adj Close'].isna().all() for df in price_frames.values()):
+        warnings.warn("'수정 종가(Adj Close)' 데이터를 일부 티커에서 찾을 수 없어, '종가(Close)'를 기준으로 계산합니다.")
+
+    prices.dropna(axis=0, how='all', inplace=True)
+    
+    successful_tickers = [t for t in tickers if t in prices.columns and not prices[t].isnull().all()]
+    failed_tickers = [t for t in tickers if t not in successful_tickers]
+
+    # --- [수정] 가장 늦게 시작하는 '핵심 원인' 티커 목록을 찾는 로직 ---
+    if not successful_tickers:
+        return pd.DataFrame(), failed_tickers, []
+
+    start_dates = {ticker: prices[ticker].first_valid_index() for ticker in successful_tickers}
+    
+    valid_start_dates = [d for d in start_dates.values() if pd.notna(d)]
+    if not valid_start_dates:
+        return prices[successful_tickers].dropna(axis=0, how='any'), failed_tickers, []
+
+    actual_latest_start = max(valid_start_dates)
+    
+    # 가장 늦은 날짜에 시작하는 모든 티커를 찾습니다.
+    culprit_tickers = [ticker for ticker, date in start_dates.items() if date == actual_latest_start]
+    
+    # 사용자가 요청한 진짜 시작일보다 실제 데이터 시작일이 늦은 경우에만 "culprit"으로 간주합니다.
+    if actual_latest_start <= pd.to_datetime(user_start_date):
+        culprit_tickers = [] # 워밍업 기간에 해당하는 경우는 원인 제공자가 없는 것으로 처리
+    
+    final_prices = prices[successful_tickers].dropna(axis=0, how='any')
+
+    return final_prices, failed_tickers, culprit_tickers
+
+# -----------------------------------------------------------------------------
+# 2. 적립식 투자 (DCA)
+# -----------------------------------------------------------------------------
+
+def compound_with_contributions(growth_factors, initial_capital, contributions):
+    """(1 + 수익률) 행렬과 시점별 추가 입금액으로 자산 가치 행렬을 계산하는 함수.
+
+    점화식 V_t = V_(t-1) * (1 + r_t) + c_t 를 누적곱 G_t 로 풀면
+    V_t = G_t * (초기금액 + Σ_(s<=t) c_s / G_s) 이므로, 누적곱과 누적합 한 번씩으로 계산됩니다.
+    growth_factors는 (기간 x 열) 2차원 배열, contributions는 길이가 기간 수인 1차원 배열입니다.
+    """
+    cumulative_growth = np.cumprod(growth_factors, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = cumulative_growth * (initial_capital + np.cumsum(contributions[:, None] / cumulative_growth, axis=0))
+
+    # 자산이 0이 되는(-100%) 시점이 있으면 G_s로 나눌 수 없으므로, 해당 열만 점화식으로 다시 계산합니다.
+    for col in np.flatnonzero((cumulative_growth == 0).any(axis=0)):
+        current_capital = initial_capital
+        for i, growth in enumerate(growth_factors[:, col]):
+            current_capital = current_capital * growth + contributions[i]
+            values[i, col] = current_capital
+    return values
+
+def calculate_cumulative_returns_with_dca(returns_series, initial_capital, monthly_contribution, contribution_dates):
+    """적립식 투자를 반영하여 누적 자산 가치를 계산하는 함수
+
+    returns_series가 DataFrame이면 각 열(전략, 벤치마크 등)을 한 번에 계산하여 DataFrame으로 반환합니다.
+    """
+    returns_df = returns_series.to_frame() if isinstance(returns_series, pd.Series) else returns_series
+
+    # 추가 투자일(리밸런싱 시점)에만 월별 추가 투자금이 입금됩니다.
+    contributions = np.zeros(len(returns_df.index))
+    if monthly_contribution > 0:
+        contributions[returns_df.index.isin(contribution_dates)] = monthly_contribution
+
+    values = compound_with_contributions(1 + returns_df.to_numpy(dtype=float), initial_capital, contributions)
+
+    if isinstance(returns_series, pd.Series):
+        return pd.Series(values[:, 0], index=returns_series.index)
+    return pd.DataFrame(values, index=returns_df.index, columns=returns_df.columns)
+
+# --- [추가] 초기 투자금/월별 추가 투자금 변경 시 즉시 재계산(What-if) ---
+# 수익률이 고정되면 자산 가치는 두 금액에 대해 선형이므로, 단위 금액에 대한 응답 곡선만 저장해 두면 됩니다.
+DCA_CONFIG_KEYS = ('initial_capital', 'monthly_contribution')
+
+def calculate_dca_units(returns_df, contribution_dates):
+    """초기 투자금 1, 월별 추가 투자금 1에 대한 자산 가치 응답 곡선을 계산하는 함수"""
+    return pd.concat({
+        'capital': calculate_cumulative_returns_with_dca(returns_df, 1.0, 0, contribution_dates),
+        'contribution': calculate_cumulative_returns_with_dca(returns_df, 0.0, 1.0, contribution_dates),
+    }, axis=1)
+
+def is_dca_only_change(old_config, new_config):
+    """두 설정이 초기 투자금/월별 추가 투자금 외에는 같은지 확인하는 함수"""
+    strip = lambda c: {k: v for k, v in c.items() if k not in DCA_CONFIG_KEYS}
+    # 초기 투자금이 0이면 CAGR/MDD가 정의되지 않으므로, 0을 오가는 변경은 재실행이 필요합니다.
+    same_capital_sign = (old_config.get('initial_capital', 0) > 0) == (new_config.get('initial_capital', 0) > 0)
+    return strip(old_config) == strip(new_config) and same_capital_sign
+
+def apply_dca_scenario(results, initial_capital, monthly_contribution):
+    """저장된 단위 응답 곡선으로 새 투자 금액에 대한 결과(자산 곡선, 최종 자산, 원금, 손익)를 만드는 함수"""
+    dca_units = results['dca_units']
+    values = initial_capital * dca_units['capital'] + monthly_contribution * dca_units['contribution']
+    growth = initial_capital * dca_units['capital']
+
+    num_contributions = results.get('num_contributions')
+    if num_contributions is None:
+        num_contributions = max(len(results['target_weights'].index) - 1, 0)
+    total_contribution = initial_capital + monthly_contribution * num_contributions
+
+    # dict(results)는 불러온 결과(LazyResult)의 시계열을 모두 읽으므로, 읽지 않은 항목은 그대로 두는 copy()를 사용합니다.
+    updated = results.copy()
+    updated['config'] = {**results['config'], 'initial_capital': initial_capital, 'monthly_contribution': monthly_contribution}
+    updated['initial_cap'] = initial_capital
+    updated['timeseries'] = {
+        **results['timeseries'],
+        'portfolio_value': values['strategy'], 'benchmark_value': values['benchmark'],
+        'strategy_growth': growth['strategy'], 'benchmark_growth': growth['benchmark'],
+    }
+    updated['metrics'] = {
+        **results['metrics'],
+        'final_assets': values['strategy'].iloc[-1],
+        'total_contribution': total_contribution,
+        'total_profit': values['strategy'].iloc[-1] - total_contribution,
+        'bm_final_assets': values['benchmark'].iloc[-1],
+        'bm_total_contribution': total_contribution,
+        'bm_total_profit': values['benchmark'].iloc[-1] - total_contribution,
+    }
+    return updated
+
+# -----------------------------------------------------------------------------
+# 3. 시그널 및 포트폴리오 구성
+# -----------------------------------------------------------------------------
+
+# --- [추가] 모멘텀 패널 캐시 ---
+# 기간별 수익률 행렬을 (가격 지문, 기간, 리밸런싱 일정) 단위로 보관하여,
+# Top N/카나리아 설정만 바뀌거나 다른 기간 조합을 시험할 때 다시 계산하지 않도록 합니다.
+MOMENTUM_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+class MomentumCache:
+    """메모리 상한이 있는 LRU 캐시 (값은 읽기 전용 NumPy 배열)"""
+
+    def __init__(self, max_bytes=MOMENTUM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()  # Streamlit은 세션마다 다른 스레드에서 스크립트를 실행합니다.
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = np.asarray(compute(), dtype=float)
+        value.setflags(write=False)
+        with self._lock:
+            if key not in self._entries and value.nbytes <= self.max_bytes:
+                self._entries[key] = value
+                self._total_bytes += value.nbytes
+                # 상한을 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+                while self._total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._total_bytes -= evicted.nbytes
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+momentum_cache = MomentumCache()
+_fingerprint_memo = {}
+
+def price_fingerprint(prices):
+    """가격 테이블(인덱스, 열 이름, 값)의 내용으로 만든 지문 문자열을 반환하는 함수.
+
+    같은 객체에 대해서는 다시 해시하지 않도록 기억해 두므로, 가격 테이블의 값을 제자리에서 수정하면 안 됩니다.
+    """
+    memo = _fingerprint_memo.get(id(prices))
+    if memo is not None and memo[0]() is prices:
+        return memo[1]
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(prices, index=True).to_numpy().tobytes(), digest_size=16)
+    digest.update(repr(list(prices.columns)).encode('utf-8'))
+    fingerprint = digest.hexdigest()
+    key = id(prices)
+    _fingerprint_memo[key] = (weakref.ref(prices, lambda _, key=key: _fingerprint_memo.pop(key, None)), fingerprint)
+    return fingerprint
+
+def get_daily_lookback_returns(prices, period_days, fingerprint=None):
+    """전체 거래일에 대해 period_days 거래일 전 대비 수익률 행렬을 반환하는 함수 (캐시 사용)"""
+    fingerprint = fingerprint or price_fingerprint(prices)
+    return momentum_cache.get_or_compute(
+        (fingerprint, 'days', period_days, None),
+        lambda: prices.pct_change(periods=period_days).fillna(0).to_numpy(dtype=float)
+    )
+
+def get_monthly_lookback_returns(prices, rebal_dates, month, schedule_key, fingerprint=None):
+    """리밸런싱 날짜마다 month개월 전(가장 가까운 거래일) 대비 수익률 행렬을 반환하는 함수 (캐시 사용)"""
+    fingerprint = fingerprint or price_fingerprint(prices)
+
+    def compute():
+        price_values = prices.to_numpy(dtype=float)
+        current_prices = price_values[prices.index.get_indexer(rebal_dates)]
+        past_dates = rebal_dates - pd.DateOffset(months=month)
+        past_price_idx = prices.index.get_indexer(past_dates, method='nearest')
+        period_returns = current_prices / price_values[past_price_idx] - 1
+        # 데이터 시작일 이전을 참조하는 경우 수익률을 0으로 처리합니다.
+        period_returns[past_dates < prices.index[0]] = 0.0
+        return period_returns
+
+    return momentum_cache.get_or_compute((fingerprint, 'months', month, schedule_key), compute)
+
+# --- 👇 [신규 추가] 그래프용 전체 기간 모멘텀 계산 함수 ---
+def calculate_full_momentum(prices, config, fingerprint=None):
+    """그래프 표시를 위해 전체 기간에 대한 모멘텀 점수를 계산하는 함수"""
+    mom_type = config['momentum_params']['type']
+    
+    if mom_type == '13612U':
+        mom_periods = [1, 3, 6, 12]
+    else:
+        mom_periods = config['momentum_params'].get('periods', [1, 3, 6, 12])
+
+    # 모든 기간의 수익률을 합산하여 평균
+    if not mom_periods:
+        return pd.DataFrame(0, index=prices.index, columns=prices.columns)
+
+    # 각 기간별 수익률을 계산 (근사치: 1개월 ≈ 21 거래일)
+    fingerprint = fingerprint or price_fingerprint(prices)
+    score_sum = np.zeros(prices.shape)
+    for month in mom_periods:
+        score_sum += get_daily_lookback_returns(prices, month * 21, fingerprint)
+    return pd.DataFrame(score_sum / len(mom_periods), index=prices.index, columns=prices.columns)
+
+def get_canary_chart_series(prices, config, fingerprint=None):
+    """카나리아 그래프에 표시할 (카나리아 평균 모멘텀, 벤치마크 가격)을 반환하는 함수 (데이터가 없으면 None).
+
+    월별 백테스트는 리밸런싱 기준일('월초'/'월말')에 맞춰 월 단위로 리샘플링합니다.
+    """
+    canary_tickers = config['tickers']['CANARY']
+    benchmark_ticker = config['benchmark']
+    if not canary_tickers or benchmark_ticker not in prices.columns:
+        return None
+    full_momentum_scores = calculate_full_momentum(prices, config, fingerprint)
+    if config.get('backtest_type', '일별') == '월별':
+        rule, how = ('MS', 'first') if config.get('rebalance_day', '월말') == '월초' else ('M', 'last')
+        full_momentum_scores = getattr(full_momentum_scores.resample(rule), how)()
+        prices = getattr(prices.resample(rule), how)()
+    return full_momentum_scores[canary_tickers].mean(axis=1), prices[benchmark_ticker]
+
+# --- [추가] 그래프 배경 음영용 구간 ---
+# 값이 바뀌는 지점만 찾아 (시작일, 종료일, 값) 구간 표로 만들어 두면, 그래프는 반복문 없이 값별로 한 번에 칠할 수 있습니다.
+def get_regime_segments(series, end=None):
+    """값이 같은 연속 구간을 start/end/value 표로 반환하는 함수 (구간의 끝은 다음 구간의 시작, 마지막 구간의 끝은 end)"""
+    values = series.to_numpy()
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]]) if len(values) else np.array([], dtype=int)
+    start_dates = series.index[starts]
+    last_end = [end if end is not None else series.index[-1]] if len(values) else []
+    return pd.DataFrame({
+        'start': start_dates,
+        'end': start_dates[1:].append(pd.DatetimeIndex(last_end)),
+        'value': values[starts],
+    })
+
+def calculate_regime_segments(prices, config, investment_mode, end_date=None):
+    """카나리아 모멘텀 0 이상 여부와 투자 모드의 구간 표를 계산하는 함수 (결과 딕셔너리의 'regime_segments').
+
+    화면의 그래프와 같도록 백테스트 시작일 이후의 데이터만 사용합니다.
+    """
+    start_date = pd.to_datetime(config['start_date'])
+    start = prices.index.searchsorted(start_date)
+    # 잘라낸 가격의 지문은 원래 테이블의 지문과 시작 위치로 만들어, 실행마다 잘라낸 테이블을 다시 해시하지 않습니다.
+    fingerprint = f"{price_fingerprint(prices)}:{start}"
+    investment_mode = investment_mode[investment_mode.index >= start_date]
+    canary_series = get_canary_chart_series(prices.iloc[start:], config, fingerprint)
+    return {
+        'canary_positive': None if canary_series is None else get_regime_segments(canary_series[0] >= 0),
+        'investment_mode': get_regime_segments(investment_mode, end_date),
+    }
+
+def get_rebalance_dates(index, config):
+    """리밸런싱 주기(월별/분기별)와 기준일(월말/월초)에 맞는 리밸런싱 날짜를 반환하는 함수"""
+    if len(index) == 0:
+        return index
+    # 기간(월/분기) 코드가 바뀌는 지점을 찾아 각 기간의 첫 거래일 또는 마지막 거래일을 고릅니다.
+    period_codes = index.to_period('Q' if config['rebalance_freq'] == '분기별' else 'M').asi8
+    period_changed = period_codes[1:] != period_codes[:-1]
+    if config['rebalance_day'] == '월말':
+        is_rebal_date = np.append(period_changed, True)
+    else:
+        is_rebal_date = np.insert(period_changed, 0, True)
+    return index[is_rebal_date]
+
+def calculate_signals(prices, config):
+    rebal_dates = get_rebalance_dates(prices.index, config)
+    mom_type = config['momentum_params']['type']
+
+    # --- CHANGED: '13612U' 선택 시 기간을 고정하도록 수정 ---
+    if mom_type == '13612U':
+        mom_periods = [1, 3, 6, 12]
+    else:
+        mom_periods = config['momentum_params']['periods']
+
+    # --- CHANGED: '13612U'와 '평균 모멘텀' 로직 통합 및 '절대 모멘텀' 삭제 ---
+    if mom_type in ['13612U', '평균 모멘텀']:
+        # --- [수정] 리밸런싱 날짜별 반복 대신, 기간마다 한 번의 get_indexer로 모든 과거 시점을 찾습니다 ---
+        # 기간별 수익률 행렬은 모멘텀 캐시에 보관되어, 같은 가격/일정에서는 다시 계산하지 않습니다.
+        fingerprint = price_fingerprint(prices)
+        schedule_key = (config['rebalance_freq'], config['rebalance_day'])
+        score_sum = np.zeros((len(rebal_dates), len(prices.columns)))
+        for month in mom_periods:
+            score_sum += get_monthly_lookback_returns(prices, rebal_dates, month, schedule_key, fingerprint)
+        scores = score_sum / len(mom_periods) if mom_periods else np.full_like(score_sum, np.nan)
+        momentum_scores = pd.DataFrame(scores, index=rebal_dates, columns=prices.columns)
+    
+    elif mom_type == '상대 모멘텀':
+        if not mom_periods: raise BacktestError("모멘텀 기간이 설정되지 않았습니다.")
+        period_days = mom_periods[0] * 21 
+        daily_returns = get_daily_lookback_returns(prices, period_days)
+        momentum_scores = pd.DataFrame(
+            daily_returns[prices.index.get_indexer(rebal_dates)], index=rebal_dates, columns=prices.columns
+        )
+    else:
+        momentum_scores = pd.DataFrame(index=rebal_dates, columns=prices.columns)
+            
+    return momentum_scores.astype(float)
+
+def select_top_n(scores, top_n):
+    """점수 행렬(날짜 x 자산)의 각 행에서 상위 N개 자산을 True로 표시한 마스크를 반환하는 함수.
+
+    NaN은 선택하지 않으며, 동점일 때는 nlargest(keep='first')와 같이 앞쪽 열을 우선합니다.
+    """
+    mask = np.zeros(scores.shape, dtype=bool)
+    top_n = min(int(top_n), scores.shape[1])
+    if top_n <= 0:
+        return mask
+    # -점수를 안정 정렬하면 높은 점수 순(동점은 열 순서)으로 정렬되고, NaN은 항상 맨 뒤로 갑니다.
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :top_n]
+    is_valid = ~np.isnan(np.take_along_axis(scores, order, axis=1))
+    np.put_along_axis(mask, order, is_valid, axis=1)
+    return mask
+
+def construct_portfolio(momentum_scores, config, successful_tickers):
+    canary_assets = [t for t in config['tickers']['CANARY'] if t in successful_tickers]
+    aggressive_assets = list(dict.fromkeys(t for t in config['tickers']['AGGRESSIVE'] if t in successful_tickers))
+    defensive_assets = list(dict.fromkeys(t for t in config['tickers']['DEFENSIVE'] if t in successful_tickers))
+    params = config['portfolio_params']
+
+    # --- [수정] 날짜별 반복/nlargest/.loc 대입 대신, 전체 점수 행렬에 대한 마스크 연산으로 비중을 계산합니다 ---
+    scores = momentum_scores.to_numpy(dtype=float)
+    weights = np.zeros(scores.shape)
+    aggressive_cols = momentum_scores.columns.get_indexer(aggressive_assets)
+    defensive_cols = momentum_scores.columns.get_indexer(defensive_assets)
+
+    # 1. 방어 자산 Top N (날짜별 선택 마스크와 선택 개수)
+    best_defensive_mask = select_top_n(scores[:, defensive_cols], params['top_n_defensive'])
+    best_defensive_count = best_defensive_mask.sum(axis=1)
+
+    # 2. 카나리아 Risk-On/Off 판단 (점수가 NaN이면 Risk-On으로 간주)
+    is_risk_on = np.ones(len(momentum_scores.index), dtype=bool)
+    if params['use_canary'] and canary_assets:
+        canary_score = momentum_scores[canary_assets].mean(axis=1).to_numpy()
+        is_risk_on = ~(canary_score <= 0)
+
+    # 3. 공격 자산 Top N (선택할 공격 자산이 없으면 방어 모드로 전환)
+    aggressive_scores = scores[:, aggressive_cols]
+    top_aggressive_mask = select_top_n(aggressive_scores, params['top_n_aggressive'])
+    top_aggressive_count = top_aggressive_mask.sum(axis=1)
+    is_aggressive = is_risk_on & (top_aggressive_count > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight_per_asset = np.where(top_aggressive_count > 0, 1.0 / top_aggressive_count, 0.0)
+        defensive_weight = np.where(best_defensive_count > 0, 1.0 / best_defensive_count, 0.0)
+
+    held_mask = top_aggressive_mask & is_aggressive[:, None]
+    protected_mask = np.zeros_like(held_mask)
+    if params['use_hybrid_protection']:
+        # 하이브리드 보호: 모멘텀이 0 이하인 공격 자산의 몫은 방어 자산 Top N에 나누어 배분합니다.
+        protected_mask = held_mask & (aggressive_scores <= 0)
+        held_mask &= ~protected_mask
+    weights[:, aggressive_cols] = np.where(held_mask, weight_per_asset[:, None], 0.0)
+
+    protected_count = protected_mask.sum(axis=1)
+    substitute_weight = (weight_per_asset / np.maximum(best_defensive_count, 1))[:, None]
+    for i in range(int(protected_count.max(initial=0))):
+        # 기존 구현과 같은 값이 나오도록, 교체된 자산 수만큼 순서대로 더합니다.
+        add_mask = best_defensive_mask & (protected_count > i)[:, None]
+        weights[:, defensive_cols] += np.where(add_mask, substitute_weight, 0.0)
+
+    # 4. 방어 모드: 방어 자산 Top N에 동일 비중 배분
+    defensive_rows = ~is_aggressive
+    weights[np.ix_(defensive_rows, defensive_cols)] = np.where(
+        best_defensive_mask[defensive_rows], defensive_weight[defensive_rows, None], 0.0
+    )
+
+    target_weights = pd.DataFrame(weights, index=momentum_scores.index, columns=momentum_scores.columns)
+    investment_mode = pd.Series(
+        np.where(is_aggressive, 'Aggressive', 'Defensive'), index=momentum_scores.index, dtype=str
+    )
+    return target_weights, investment_mode
+
+def get_mdd_details(series):
+    rolling_max = series.cummax()
+    drawdown = (series - rolling_max) / rolling_max
+    mdd_value = drawdown.min()
+    mdd_end_date = drawdown.idxmin()
+    pre_trough_series = series.loc[:mdd_end_date]
+    mdd_start_date = pre_trough_series.idxmax()
+    return mdd_value, mdd_start_date, mdd_end_date
+
+
+# -----------------------------------------------------------------------------
+# 4. 백테스트 실행
+# -----------------------------------------------------------------------------
+def get_all_tickers(config):
+    """설정에 포함된 모든 티커(공격/방어/카나리아/벤치마크)를 정렬된 목록으로 반환하는 함수"""
+    tickers = config['tickers']
+    return sorted(set(tickers['AGGRESSIVE'] + tickers['DEFENSIVE'] + tickers['CANARY'] + [config['benchmark']]))
+
+def get_currency_symbol(tickers):
+    """한국 티커(.KS)가 포함되어 있으면 원화, 아니면 달러 기호를 반환하는 함수"""
+    return '₩' if any(ticker.endswith('.KS') for ticker in tickers) else '$'
+
+def get_max_momentum_period(config):
+    """모멘텀 계산에 필요한 최대 기간(개월)을 반환하는 함수"""
+    mom_type = config['momentum_params']['type']
+    mom_periods = config['momentum_params']['periods']
+
+    if mom_type == '13612U':
+        # 13612U는 최대 12개월 수익률을 사용합니다.
+        return 12
+    elif mom_periods:
+        # '평균 모멘텀' 또는 '상대 모멘텀'의 경우, 설정된 기간 중 가장 긴 값을 사용합니다.
+        return max(mom_periods)
+    # 예외적인 경우 (기간이 설정되지 않음)를 대비해 기본값 12개월을 사용합니다.
+    return 12
+
+def get_data_fetch_start_date(config):
+    """백테스트 시작일로부터 최대 모멘텀 기간만큼 이전 날짜(데이터 요청 시작일)를 반환하는 함수"""
+    return pd.to_datetime(config['start_date']) - pd.DateOffset(months=get_max_momentum_period(config))
+
+def load_backtest_prices(config):
+    """설정에 필요한 모든 티커의 가격을 워밍업 기간을 포함하여 불러오는 함수"""
+    return get_price_data(get_all_tickers(config), get_data_fetch_start_date(config), config['end_date'], config['start_date'])
+
+def select_config_prices(prices, config):
+    """가격 테이블에서 설정에 필요한 티커 열만 남기고 결측 행을 뺀 테이블을 반환하는 함수"""
+    needed_tickers = [t for t in get_all_tickers(config) if t in prices.columns]
+    # 이미 필요한 티커만 있는 테이블이면 같은 객체를 그대로 반환하여, 모멘텀 캐시의 가격 지문을 재사용합니다.
+    if list(prices.columns) != needed_tickers or prices.isna().to_numpy().any():
+        prices = prices[needed_tickers].dropna(axis=0, how='any')
+    return prices
+
+# --- [추가] 보유 수량 기반 일별 시뮬레이션 ---
+# 리밸런싱일 종가에 목표 비중으로 매수한 뒤 다음 리밸런싱일까지는 수량을 그대로 들고 있으므로,
+# 구간 안의 자산별 가치는 (목표 비중 × 구간 시작가 대비 가격 비율)입니다. 날짜별 반복 없이 구간 번호로 한 번에 계산합니다.
+def _drift_daily_holdings(prices, target_weights):
+    """리밸런싱 구간별로 drift된 자산별 보유 가치(구간 시작 가치 = 1)를 계산하는 함수 (투자 전 날짜는 모두 현금)"""
+    price_values = prices[target_weights.columns].ffill().to_numpy(dtype=float)
+    weights = target_weights.to_numpy(dtype=float)
+    num_days = len(prices.index)
+    # 리밸런싱일이 가격 인덱스에 없으면 그 이전 마지막 거래일에 리밸런싱한 것으로 봅니다 (ffill과 같은 기준).
+    rebal_pos = prices.index.searchsorted(target_weights.index, side='right') - 1
+    valid = rebal_pos >= 0
+    rebal_pos, weights = rebal_pos[valid], weights[valid]
+    if len(rebal_pos) == 0:
+        return None
+
+    # 날짜 d의 수익률에 적용되는 구간 = d보다 앞선 마지막 리밸런싱 (-1이면 아직 투자 전)
+    segment = np.searchsorted(rebal_pos, np.arange(num_days), side='left') - 1
+    invested = segment >= 0
+    segment_safe = np.maximum(segment, 0)
+    held_weights = np.where(invested[:, None], weights[segment_safe], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = price_values / price_values[rebal_pos[segment_safe]]
+    growth = np.where(np.isfinite(growth), growth, 1.0)
+    holdings = held_weights * growth
+    # 구간 시작 시점 가치를 1로 둔 포트폴리오 가치 (현금 몫 포함)
+    value = holdings.sum(axis=1) + (1.0 - held_weights.sum(axis=1))
+    prev_value = np.ones(num_days)
+    same_segment = np.flatnonzero(segment[1:] == segment[:-1]) + 1
+    prev_value[same_segment] = value[same_segment - 1]
+    # 리밸런싱일 종가 기준, 새 목표 비중으로 바꾸기 직전의 drift된 비중
+    drifted = holdings[rebal_pos] / value[rebal_pos, None]
+    return {
+        'valid': valid, 'rebal_pos': rebal_pos, 'weights': weights, 'held_weights': held_weights,
+        'holdings': holdings, 'value': value, 'prev_value': prev_value, 'same_segment': same_segment, 'drifted': drifted,
+    }
+
+def simulate_daily_holdings(prices, target_weights, transaction_cost):
+    """리밸런싱 사이에 비중이 가격에 따라 변하는 일별 수익률과, 리밸런싱일의 회전율을 계산하는 함수.
+
+    비중 합이 1보다 작으면 나머지는 수익률 0의 현금으로 보고, 거래 비용은 실제 리밸런싱일에만 차감합니다.
+    반환값: (일별 포트폴리오 수익률, 리밸런싱일별 회전율)
+    """
+    turnover = pd.Series(np.nan, index=target_weights.index)
+    sim = _drift_daily_holdings(prices, target_weights)
+    if sim is None:
+        return pd.Series(0.0, index=prices.index), turnover
+    returns = sim['value'] / sim['prev_value'] - 1
+    # drift된 비중에서 새 목표 비중으로 바꾸는 양만큼 회전율과 비용을 계산합니다.
+    rebal_turnover = np.abs(sim['drifted'] - sim['weights']).sum(axis=1) / 2
+    np.subtract.at(returns, sim['rebal_pos'], rebal_turnover * transaction_cost)
+    turnover[sim['valid']] = rebal_turnover
+    return pd.Series(returns, index=prices.index), turnover
+
+# --- [추가] 자산별 수익 기여도 ---
+# 기간별 포트폴리오 수익률을 자산별 몫으로 나눈 (기간 x 자산) 행렬입니다. 자산의 거래 비용은 그 자산의 비중 변화량만큼
+# 나누어 빼므로, 행 합계는 calculate_portfolio_returns의 전략 수익률과 같습니다.
+def calculate_asset_contributions(prices, target_weights, config):
+    """기간별, 자산별 수익 기여도(비중 x 수익률 - 거래 비용 몫) 행렬을 계산하는 함수 (워밍업 기간 제외)"""
+    transaction_cost = config['transaction_cost']
+    if config['backtest_type'].split(' ')[0] == '월별':
+        weights = target_weights.to_numpy(dtype=float)
+        asset_returns = prices.loc[target_weights.index, target_weights.columns].pct_change().to_numpy(dtype=float)
+        prev_weights = np.vstack([np.full((1, weights.shape[1]), np.nan), weights[:-1]])
+        trade_costs = np.abs(prev_weights - weights) / 2 * transaction_cost
+        contributions = np.nan_to_num(prev_weights * asset_returns) - np.nan_to_num(trade_costs)
+        index = target_weights.index
+    else: # 일별
+        contributions = np.zeros((len(prices.index), target_weights.shape[1]))
+        sim = _drift_daily_holdings(prices, target_weights)
+        if sim is not None:
+            # 구간 첫날의 직전 보유 가치는 목표 비중 그대로, 그 밖의 날은 전날 보유 가치입니다.
+            prev_holdings = sim['held_weights'].copy()
+            prev_holdings[sim['same_segment']] = sim['holdings'][sim['same_segment'] - 1]
+            contributions = (sim['holdings'] - prev_holdings) / sim['prev_value'][:, None]
+            trade_costs = np.abs(sim['drifted'] - sim['weights']) / 2 * transaction_cost
+            np.subtract.at(contributions, sim['rebal_pos'], trade_costs)
+        index = prices.index
+    contributions = pd.DataFrame(contributions, index=index, columns=target_weights.columns)
+    return contributions[contributions.index >= pd.to_datetime(config['start_date'])]
+
+def summarize_asset_contributions(contributions, target_weights, prices, investment_mode):
+    """자산별 기여도 행렬(calculate_asset_contributions)로 자산별 요약 표, 누적 기여도, 투자 모드별 기여도를 만드는 함수.
+
+    보유 횟수/평균 수익률/승률은 리밸런싱 구간 단위이며, 각 구간에는 직전 리밸런싱에서 정한 비중을 적용합니다.
+    """
+    # 리밸런싱 구간별 수익률과 보유 여부 (백테스트 기간의 구간만)
+    period_returns = prices.loc[target_weights.index, target_weights.columns].pct_change()
+    in_backtest = target_weights.index >= contributions.index[0] if len(contributions.index) else np.zeros(len(target_weights.index), dtype=bool)
+    asset_returns = period_returns.to_numpy(dtype=float)[in_backtest]
+    held = (target_weights.shift(1).to_numpy(dtype=float) > 0)[in_backtest] & ~np.isnan(asset_returns)
+    held_count = held.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_return = np.where(held, asset_returns, 0.0).sum(axis=0) / held_count
+        win_rate = (held & (asset_returns > 0)).sum(axis=0) / held_count
+
+    summary = pd.DataFrame({
+        '총 기여도': contributions.sum(axis=0).to_numpy(),
+        '보유 횟수': held_count,
+        '보유 시 평균 수익률': avg_return,
+        '보유 시 승률': win_rate,
+    }, index=contributions.columns)
+    summary = summary[(summary['보유 횟수'] > 0) | (summary['총 기여도'] != 0)].sort_values('총 기여도', ascending=False)
+
+    # 각 기간에 적용된 투자 모드 = 그 기간보다 앞선 마지막 리밸런싱의 모드
+    mode_pos = investment_mode.index.searchsorted(contributions.index, side='left') - 1
+    modes = np.where(mode_pos >= 0, investment_mode.to_numpy()[np.maximum(mode_pos, 0)], '첫 리밸런싱 전')
+    by_regime = contributions.groupby(modes).sum().T.loc[summary.index]
+    by_regime = by_regime.loc[:, (by_regime != 0).any(axis=0)]  # 기여가 없는 모드(첫 리밸런싱 전 등)는 제외
+    return {'summary': summary, 'cumulative': contributions[summary.index].cumsum(), 'by_regime': by_regime}
+
+def calculate_portfolio_returns(prices, target_weights, config):
+    """목표 비중과 가격으로 전략/벤치마크의 기간별 수익률을 계산하는 함수 (워밍업 기간 제외)"""
+    returns_freq = config['backtest_type'].split(' ')[0]
+    if returns_freq == '월별':
+        rebal_dates = target_weights.index
+        prices_rebal = prices.loc[rebal_dates]
+        returns_rebal = prices_rebal.pct_change()
+        turnover = (target_weights.shift(1) - target_weights).abs().sum(axis=1) / 2
+        costs = turnover * config['transaction_cost']
+        portfolio_returns = (target_weights.shift(1) * returns_rebal).sum(axis=1) - costs
+        portfolio_returns = portfolio_returns.fillna(0)
+        benchmark_returns = returns_rebal[config['benchmark']].fillna(0)
+    else: # 일별
+        # [수정] 매일 목표 비중으로 되돌리는 대신, 리밸런싱 사이에는 보유 수량을 유지(비중 drift)합니다.
+        portfolio_returns, _ = simulate_daily_holdings(prices, target_weights, config['transaction_cost'])
+        benchmark_returns = prices[config['benchmark']].pct_change().fillna(0)
+
+    # 워밍업 기간(사전 로딩 기간)의 수익률 데이터를 제거합니다.
+    start_date_dt = pd.to_datetime(config['start_date'])
+    portfolio_returns = portfolio_returns[portfolio_returns.index >= start_date_dt]
+    benchmark_returns = benchmark_returns[benchmark_returns.index >= start_date_dt]
+    return portfolio_returns, benchmark_returns
+
+def calculate_performance(portfolio_returns, benchmark_returns, target_weights, config):
+    """수익률로 적립식 자산 곡선, 하락폭, 성과 지표(metrics)를 계산하는 함수"""
+    contribution_dates = target_weights.index
+    # 전략과 벤치마크의 단위 응답 곡선을 한 번에 계산하고, 설정된 금액을 곱해 적립식 자산 가치를 만듭니다.
+    dca_units = calculate_dca_units(
+        pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['strategy', 'benchmark']),
+        contribution_dates
+    )
+    dca_values = config['initial_capital'] * dca_units['capital'] + config['monthly_contribution'] * dca_units['contribution']
+    cumulative_returns = dca_values['strategy']
+    benchmark_cumulative = dca_values['benchmark']
+    
+    initial_cap = config['initial_capital']
+    strategy_growth = (1 + portfolio_returns).cumprod() * initial_cap
+    benchmark_growth = (1 + benchmark_returns).cumprod() * initial_cap
+
+    strategy_dd = (strategy_growth / strategy_growth.cummax() - 1)
+    benchmark_dd = (benchmark_growth / benchmark_growth.cummax() - 1)
+            
+    # --- [수정] 전략/벤치마크 지표를 시계열마다 따로 구하지 않고, 두 열을 한 번에 계산합니다 ---
+    series_metrics = calculate_metrics_batch(
+        pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['strategy', 'benchmark']),
+        get_periods_per_year(config), config['risk_free_rate'], benchmark_returns=benchmark_returns
+    )
+    if get_years(portfolio_returns.index) <= 0:
+        # 기간이 없으면 낙폭 기간도 없습니다.
+        series_metrics[['mdd_start', 'mdd_end']] = None
+    strategy_metrics = series_metrics.loc['strategy'].to_dict()
+    bm_metrics = series_metrics.loc['benchmark', PERFORMANCE_METRICS].to_dict()
+
+    total_months = len(target_weights.index)
+    num_contributions = total_months - 1 if total_months > 0 else 0
+    total_contribution = config['initial_capital'] + (config['monthly_contribution'] * num_contributions)
+
+    return {
+        'timeseries': {
+            'portfolio_value': cumulative_returns,
+            'benchmark_value': benchmark_cumulative,
+            'strategy_growth': strategy_growth,
+            'benchmark_growth': benchmark_growth,
+            'strategy_drawdown': strategy_dd,
+            'benchmark_drawdown': benchmark_dd
+        },
+        'initial_cap': initial_cap,
+        'metrics': {
+            'final_assets': cumulative_returns.iloc[-1],
+            'total_contribution': total_contribution,
+            'total_profit': cumulative_returns.iloc[-1] - total_contribution,
+            **strategy_metrics,
+            'bm_final_assets': benchmark_cumulative.iloc[-1],
+            'bm_total_contribution': total_contribution,
+            'bm_total_profit': benchmark_cumulative.iloc[-1] - total_contribution,
+            **{f'bm_{key}': value for key, value in bm_metrics.items()},
+        },
+        'dca_units': dca_units, 'num_contributions': num_contributions
+    }
+
+# --- [추가] 단계별 증분 재계산 ---
+# 파이프라인을 데이터 → 시그널 → 포트폴리오 → 수익률 → 성과 단계로 나누고, 단계마다 사용하는 설정 값을 선언합니다.
+# 이전 실행과 선언된 입력이 같은 단계는 저장해 둔 출력을 그대로 쓰고, 입력이 바뀐 단계부터 그 이후 단계만 다시 계산합니다.
+def _prices_stage_inputs(config):
+    return (get_all_tickers(config), get_data_fetch_start_date(config), config['end_date'], config['start_date'])
+
+def _signals_stage_inputs(config):
+    mom_params = config['momentum_params']
+    # '13612U'는 기간이 고정이므로, 기간 입력이 바뀌어도 시그널을 다시 계산하지 않습니다.
+    periods = None if mom_params['type'] == '13612U' else list(mom_params['periods'])
+    return (mom_params['type'], periods, config['rebalance_freq'], config['rebalance_day'])
+
+def _portfolio_stage_inputs(config):
+    return (config['tickers'], config['portfolio_params'])
+
+def _returns_stage_inputs(config):
+    return (config['backtest_type'], config['transaction_cost'], config['benchmark'], config['start_date'])
+
+def _performance_stage_inputs(config):
+    return (config['backtest_type'], config['initial_capital'], config['monthly_contribution'], config['risk_free_rate'])
+
+# (단계 이름, 입력 추출 함수) - 순서대로 실행되며, 앞 단계가 다시 계산되면 뒤 단계도 모두 다시 계산됩니다.
+PIPELINE_STAGES = [
+    ('prices', _prices_stage_inputs),
+    ('signals', _signals_stage_inputs),
+    ('portfolio', _portfolio_stage_inputs),
+    ('returns', _returns_stage_inputs),
+    ('performance', _performance_stage_inputs),
+]
+
+
+class BacktestPipeline:
+    """단계별 출력과 그 입력 설정 값을 기억해 두고, 바뀐 단계부터만 다시 계산하는 백테스트 파이프라인.
+
+    price_loader(tickers, start, end, user_start_date)는 (prices, failed_tickers, culprit_tickers)를
+    반환해야 하며, 주지 않으면 get_price_data(가격 저장소)를 사용합니다.
+    """
+
+    def __init__(self, price_loader=None):
+        self.price_loader = price_loader or get_price_data
+        self._stages = {}  # 단계 이름 -> (입력 설정 값, 출력)
+        self.last_recomputed = []
+
+    def clear(self):
+        self._stages.clear()
+        self.last_recomputed = []
+
+    def _compute_stage(self, name, config, outputs):
+        if name == 'prices':
+            all_tickers = get_all_tickers(config)
+            prices, failed_tickers, culprit_tickers = self.price_loader(
+                all_tickers, get_data_fetch_start_date(config), config['end_date'], config['start_date']
+            )
+            if prices is None or prices.empty:
+                raise BacktestError("데이터 로딩에 실패하여 백테스트를 중단합니다.")
+            prices = select_config_prices(prices, config)
+            if prices.empty:
+                raise BacktestError("데이터 로딩에 실패하여 백테스트를 중단합니다.")
+            if failed_tickers is None:
+                failed_tickers = [t for t in all_tickers if t not in prices.columns]
+            return {'prices': prices, 'failed_tickers': failed_tickers, 'culprit_tickers': culprit_tickers or []}
+        prices = outputs['prices']['prices']
+        if name == 'signals':
+            momentum_scores = calculate_signals(prices, config)
+            if momentum_scores.empty:
+                raise BacktestError("모멘텀 시그널 계산에 실패했습니다.")
+            return momentum_scores
+        if name == 'portfolio':
+            return construct_portfolio(outputs['signals'], config, prices.columns.tolist())
+        target_weights = outputs['portfolio'][0]
+        if name == 'returns':
+            return calculate_portfolio_returns(prices, target_weights, config)
+        portfolio_returns, benchmark_returns = outputs['returns']
+        return calculate_performance(portfolio_returns, benchmark_returns, target_weights, config)
+
+    def run(self, config):
+        """설정으로 파이프라인을 실행하고 결과 딕셔너리를 반환하는 함수 (바뀐 단계만 다시 계산)"""
+        outputs = {}
+        recomputed = []
+        for name, get_inputs in PIPELINE_STAGES:
+            inputs = get_inputs(config)
+            cached = self._stages.get(name)
+            if recomputed or cached is None or cached[0] != inputs:
+                # 실패한 단계는 저장하지 않으므로, 다음 실행에서 그 단계부터 다시 시도합니다.
+                self._stages.pop(name, None)
+                outputs[name] = self._compute_stage(name, config, outputs)
+                self._stages[name] = (copy.deepcopy(inputs), outputs[name])
+                recomputed.append(name)
+            else:
+                outputs[name] = cached[1]
+        self.last_recomputed = recomputed
+        return assemble_results(config, outputs)
+
+
+def assemble_results(config, outputs):
+    """단계별 출력을 모아 결과 딕셔너리를 만드는 함수"""
+    data, performance = outputs['prices'], outputs['performance']
+    target_weights, investment_mode = outputs['portfolio']
+    portfolio_returns, benchmark_returns = outputs['returns']
+    end_date = portfolio_returns.index[-1] if len(portfolio_returns) else None
+    # 기여도는 시작일 이전 리밸런싱 비중이 필요하므로, 화면에서 시작일 이후로 자르기 전의 가격/비중으로 계산해 둡니다.
+    contributions = calculate_asset_contributions(data['prices'], target_weights, config)
+    contribution_totals = contributions.sum(axis=1).reindex(portfolio_returns.index, fill_value=0.0)
+    if not np.allclose(contribution_totals.to_numpy(), portfolio_returns.to_numpy(), atol=1e-10):
+        warnings.warn("자산별 기여도의 합계가 전략 수익률과 다릅니다.")
+    return {
+        'prices': data['prices'], 'failed_tickers': data['failed_tickers'], 'culprit_tickers': data['culprit_tickers'],
+        'max_momentum_period': get_max_momentum_period(config), # 계산된 최대 모멘텀 기간을 결과에 추가
+        'config': config, 'currency_symbol': get_currency_symbol(get_all_tickers(config)),
+        'momentum_scores': outputs['signals'],
+        'timeseries': performance['timeseries'],
+        'investment_mode': investment_mode, 'target_weights': target_weights, 'initial_cap': performance['initial_cap'],
+        'regime_segments': calculate_regime_segments(data['prices'], config, investment_mode, end_date),
+        'period_returns': calculate_period_returns(portfolio_returns, benchmark_returns),
+        'asset_attribution': summarize_asset_contributions(contributions, target_weights, data['prices'], investment_mode),
+        'metrics': performance['metrics'],
+        'portfolio_returns': portfolio_returns,
+        'benchmark_returns': benchmark_returns,
+        'dca_units': performance['dca_units'], 'num_contributions': performance['num_contributions']
+    }
+
+
+def run_backtest(config, prices=None, failed_tickers=None, culprit_tickers=None):
+    """설정(config)으로 백테스트 전체 과정을 실행하고 결과 딕셔너리를 반환하는 함수.
+
+    prices를 주지 않으면 가격 저장소에서 불러옵니다. 여러 설정에서 같은 가격 테이블을 공유할 때는
+    미리 불러온 prices를 넘기면 되며, 이 경우 설정에 필요한 티커만 골라 사용합니다.
+    """
+    price_loader = None
+    if prices is not None:
+        price_loader = lambda *args: (prices, failed_tickers, culprit_tickers)
+    return BacktestPipeline(price_loader).run(config)
@@ -0,0 +1,115 @@
+"""
+Quantest 성과 지표 일괄 계산
+
+(기간 x 시계열) 수익률 행렬을 받아 모든 열(전략, 벤치마크, 부트스트랩 경로, 스윕 조합 등)의 성과 지표를
+열마다 반복하지 않고 한 번의 배열 연산으로 계산합니다.
+
+    from quantest_metrics import calculate_metrics_batch
+    table = calculate_metrics_batch(returns_df, periods_per_year=252, rf_rate=0.02, benchmark_returns=returns_df['SPY'])
+    table.loc['strategy', 'sortino_ratio']
+"""
+import numpy as np
+import pandas as pd
+
+# 열마다 계산하는 지표 (benchmark_returns를 주면 BENCHMARK_RELATIVE_METRICS도 계산)
+PERFORMANCE_METRICS = [
+    'cagr', 'mdd', 'mdd_start', 'mdd_end', 'volatility', 'sharpe_ratio', 'win_rate',
+    'sortino_ratio', 'calmar_ratio', 'cvar',
+]
+BENCHMARK_RELATIVE_METRICS = ['beta', 'alpha', 'tracking_error']
+CVAR_LEVEL = 0.95  # CVaR(조건부 VaR): 하위 5% 기간 수익률의 평균
+
+
+def get_periods_per_year(config):
+    """설정의 백테스트 방식(월별/일별)에 맞는 연간 기간 수를 반환하는 함수"""
+    return 12 if config['backtest_type'].split(' ')[0] == '월별' else 252
+
+
+def get_years(index):
+    """날짜 인덱스의 첫날부터 마지막 날까지의 햇수를 반환하는 함수"""
+    return (index[-1] - index[0]).days / 365.25 if len(index) else 0.0
+
+
+def calculate_metric_arrays(values, years, periods_per_year, rf_rate=0.0, benchmark_values=None, cvar_level=CVAR_LEVEL):
+    """(기간 x 열) 수익률 배열로 열별 지표 배열 딕셔너리를 계산하는 함수.
+
+    mdd_start/mdd_end는 날짜 대신 행 위치로 반환합니다. years가 0 이하이면 연환산 지표는 모두 0입니다.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_periods, n_columns = values.shape
+    zeros = np.zeros(n_columns)
+    if n_periods == 0 or years <= 0:
+        arrays = {metric: zeros.copy() for metric in PERFORMANCE_METRICS}
+        arrays['mdd_start'] = arrays['mdd_end'] = np.zeros(n_columns, dtype=int)
+        if benchmark_values is not None:
+            arrays.update({metric: zeros.copy() for metric in BENCHMARK_RELATIVE_METRICS})
+        return arrays
+
+    columns = np.arange(n_columns)
+    growth = np.cumprod(1 + values, axis=0)
+    running_max = np.maximum.accumulate(growth, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        final_growth = growth[-1]
+        cagr = np.where(final_growth > 0, final_growth ** (1 / years), 0.0) - 1
+        drawdown = np.nan_to_num(growth / running_max - 1, copy=False)
+        mdd_end = drawdown.argmin(axis=0)
+        mdd = drawdown[mdd_end, columns]
+        # 낙폭 시작일: 바닥 시점의 고점 값에 처음 도달한 날 (pandas idxmax와 같은 기준)
+        mdd_start = (growth == running_max[mdd_end, columns]).argmax(axis=0)
+
+        annualize = np.sqrt(periods_per_year)
+        volatility = values.std(axis=0, ddof=1) * annualize if n_periods > 1 else zeros
+        sharpe_ratio = np.where(volatility != 0, (cagr - rf_rate) / volatility, 0.0)
+        win_rate = (values > 0).mean(axis=0)
+        # 소르티노: 0보다 낮은 수익률만으로 계산한 하방 편차 사용
+        downside = np.sqrt(np.mean(np.minimum(values, 0.0) ** 2, axis=0)) * annualize
+        sortino_ratio = np.where(downside != 0, (cagr - rf_rate) / downside, 0.0)
+        calmar_ratio = np.where(mdd < 0, cagr / np.abs(mdd), 0.0)
+        tail_count = max(1, int(np.ceil(n_periods * (1 - cvar_level))))
+        cvar = np.partition(values, tail_count - 1, axis=0)[:tail_count].mean(axis=0)
+
+    arrays = {
+        'cagr': cagr, 'mdd': mdd, 'mdd_start': mdd_start, 'mdd_end': mdd_end,
+        'volatility': volatility, 'sharpe_ratio': sharpe_ratio, 'win_rate': win_rate,
+        'sortino_ratio': sortino_ratio, 'calmar_ratio': calmar_ratio, 'cvar': cvar,
+    }
+    if benchmark_values is not None:
+        arrays.update(_benchmark_relative_arrays(values, np.asarray(benchmark_values, dtype=float), periods_per_year, rf_rate))
+    return arrays
+
+
+def _benchmark_relative_arrays(values, benchmark_values, periods_per_year, rf_rate):
+    """열별 벤치마크 대비 베타, 연환산 젠센 알파, 추적 오차를 계산하는 함수"""
+    n_periods = len(values)
+    zeros = np.zeros(values.shape[1])
+    if n_periods < 2:
+        return {'beta': zeros.copy(), 'alpha': zeros.copy(), 'tracking_error': zeros.copy()}
+    rf_per_period = rf_rate / periods_per_year
+    excess = values - rf_per_period
+    bm_excess = benchmark_values - rf_per_period
+    bm_centered = bm_excess - bm_excess.mean()
+    bm_variance = (bm_centered ** 2).sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(bm_variance > 0, (bm_centered @ (excess - excess.mean(axis=0))) / bm_variance, 0.0)
+    alpha = (excess.mean(axis=0) - beta * bm_excess.mean()) * periods_per_year
+    tracking_error = (values - benchmark_values[:, None]).std(axis=0, ddof=1) * np.sqrt(periods_per_year)
+    return {'beta': beta, 'alpha': alpha, 'tracking_error': tracking_error}
+
+
+def calculate_metrics_batch(returns, periods_per_year, rf_rate=0.0, benchmark_returns=None, cvar_level=CVAR_LEVEL):
+    """수익률 DataFrame(열 = 전략/벤치마크)의 모든 열에 대한 성과 지표 표(행 = 열 이름)를 반환하는 함수.
+
+    결측 수익률은 0으로 보며, 낙폭 시작/종료일은 날짜로 돌려줍니다.
+    """
+    values = returns.fillna(0).to_numpy(dtype=float)
+    benchmark_values = None
+    if benchmark_returns is not None:
+        benchmark_values = benchmark_returns.reindex(returns.index).fillna(0).to_numpy(dtype=float)
+    arrays = calculate_metric_arrays(values, get_years(returns.index), periods_per_year, rf_rate, benchmark_values, cvar_level)
+    table = pd.DataFrame(arrays, index=returns.columns)
+    if len(returns.index):
+        table['mdd_start'] = returns.index[arrays['mdd_start']]
+        table['mdd_end'] = returns.index[arrays['mdd_end']]
+    return table
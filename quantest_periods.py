@@ -0,0 +1,53 @@
+"""
+Quantest 기간별 수익률 집계 (주/월/분기/연)
+
+수익률을 달력 구간별 복리 수익률로 묶습니다. 구간마다 (1 + r).prod()를 호출하지 않고,
+log(1 + r)의 구간 합(정렬된 인덱스의 구간 경계에서 np.add.reduceat)을 한 번에 구해 expm1로 되돌립니다.
+
+    from quantest_periods import aggregate_period_returns, monthly_return_grid
+    monthly = aggregate_period_returns(returns_df, 'month')   # 인덱스 = 월말 날짜
+    grid = monthly_return_grid(monthly['Strategy'])          # 연도 x 1~12월
+"""
+import numpy as np
+import pandas as pd
+
+# 구간 이름 -> pandas 기간 코드
+PERIOD_FREQS = {'week': 'W', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+# 결과에 저장해 두는 구간 (연도별 수익률 표, 월별 히트맵)
+RESULT_PERIODS = ('month', 'year')
+
+
+def aggregate_period_returns(returns, period):
+    """수익률 Series/DataFrame을 구간별 복리 수익률로 묶는 함수 (인덱스 = 구간 마지막 날짜, 데이터가 없는 구간은 제외)"""
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    if frame.empty:
+        return returns.iloc[:0]
+    periods = frame.index.to_period(PERIOD_FREQS[period])
+    codes = periods.asi8
+    # 인덱스가 정렬되어 있으므로 구간 번호가 바뀌는 위치가 곧 구간의 시작입니다.
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    with np.errstate(divide='ignore'):
+        log_growth = np.log1p(frame.fillna(0).to_numpy(dtype=float))
+    compounded = np.expm1(np.add.reduceat(log_growth, starts, axis=0))
+    index = periods[starts].to_timestamp(how='end').normalize().rename(frame.index.name)
+    result = pd.DataFrame(compounded, index=index, columns=frame.columns)
+    return result.iloc[:, 0].rename(returns.name) if isinstance(returns, pd.Series) else result
+
+
+def calculate_period_returns(portfolio_returns, benchmark_returns, periods=RESULT_PERIODS):
+    """전략/벤치마크 수익률의 구간별 복리 수익률 표(열 = Strategy, Benchmark)를 구간 이름별로 반환하는 함수"""
+    returns = pd.concat([portfolio_returns, benchmark_returns], axis=1, keys=['Strategy', 'Benchmark'])
+    return {period: aggregate_period_returns(returns, period) for period in periods}
+
+
+def monthly_return_grid(monthly_returns):
+    """월별 수익률 Series를 연도(행) x 월 1~12(열) 표로 바꾸는 함수 (같은 달이 여러 번이면 합계)"""
+    index = monthly_returns.index
+    years = np.unique(index.year)
+    grid = np.zeros((len(years), 12))
+    rows, cols = np.searchsorted(years, index.year), index.month - 1
+    # 같은 칸에 값이 여럿이면 pivot_table(aggfunc='sum')처럼 더합니다.
+    np.add.at(grid, (rows, cols), monthly_returns.to_numpy(dtype=float))
+    filled = np.zeros(grid.shape, dtype=bool)
+    filled[rows, cols] = True
+    return pd.DataFrame(np.where(filled, grid, np.nan), index=pd.Index(years, name='Year'), columns=range(1, 13))
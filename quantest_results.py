@@ -0,0 +1,251 @@
+"""
+Quantest 결과 파일 형식 (.qtr)
+
+결과 딕셔너리를 하나의 zip 파일로 저장합니다.
+  - header.json : 설정(config), 성과 지표(metrics) 등 작은 값과, 시계열 항목이 어느 멤버에 있는지에 대한 정보
+  - *.parquet   : 가격, 비중, 수익률 등 시계열 (열 단위 압축)
+
+불러올 때는 header.json만 읽고, 시계열은 해당 항목에 처음 접근할 때 읽습니다(LazyResult).
+etf_df(티커 목록)처럼 모든 결과에 반복되는 데이터는 저장하지 않습니다. 예전 .pkl 파일도 그대로 불러올 수 있습니다.
+
+    from quantest_results import dump_result_bytes, load_result_bytes
+    data = dump_result_bytes(results)
+    loaded = load_result_bytes(data)   # loaded['metrics']는 바로, loaded['prices']는 처음 접근할 때 읽음
+"""
+import io
+import copy
+import json
+import pickle
+import hashlib
+import zipfile
+from datetime import date, datetime
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+from quantest_engine import price_fingerprint
+
+RESULT_FILE_EXTENSION = '.qtr'
+RESULT_FILE_EXTENSIONS = ('.qtr', '.pkl')  # 불러올 수 있는 확장자 (.pkl은 예전 형식)
+RESULT_FORMAT_VERSION = 1
+RESULT_HEADER_MEMBER = 'header.json'
+# 결과 파일에 저장하지 않는 항목 (불러온 뒤 앱에서 현재 값으로 채웁니다)
+RESULT_EXCLUDED_KEYS = ('etf_df',)
+# 결과 딕셔너리에 쓸 수 있는 키 형식 (문자열이 아닌 키는 형식을 기록해 두었다가 그대로 복원합니다)
+RESULT_KEY_TYPES = (str, bool, int, float, np.integer, np.floating, date, type(None))
+
+
+# -----------------------------------------------------------------------------
+# 1. 저장
+# -----------------------------------------------------------------------------
+def _write_frame(zf, member, frame):
+    """DataFrame을 Parquet 멤버로 쓰고, 열 이름 복원 정보를 반환하는 함수 (Parquet은 문자열 열 이름만 허용)"""
+    flat = frame.copy(deep=False)
+    flat.columns = [str(i) for i in range(frame.shape[1])]
+    # 실수 열은 바이트 분할(byte stream split) 인코딩이 사전 인코딩보다 훨씬 잘 압축됩니다.
+    float_columns = [c for c in flat.columns if pd.api.types.is_float_dtype(flat[c])]
+    other_columns = [c for c in flat.columns if c not in float_columns]
+    buffer = io.BytesIO()
+    flat.to_parquet(buffer, compression='zstd', use_dictionary=other_columns or False,
+                    use_byte_stream_split=float_columns or False)
+    zf.writestr(member, buffer.getvalue())
+    columns = [list(label) if isinstance(label, tuple) else _encode_scalar(label) for label in frame.columns]
+    return {'member': member, 'columns': columns, 'column_names': list(frame.columns.names)}
+
+
+def _encode_scalar(value):
+    """JSON으로 쓸 수 있는 값으로 바꾸는 함수 (날짜는 태그를 붙여 원래 형식으로 복원할 수 있게 함)"""
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return {'$timestamp': pd.Timestamp(value).isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _encode(value, path, zf):
+    """결과 값 하나를 header.json에 들어갈 노드로 바꾸고, 시계열은 Parquet 멤버로 쓰는 함수"""
+    if isinstance(value, pd.DataFrame):
+        return {'$frame': _write_frame(zf, f"{path}.parquet", value)}
+    if isinstance(value, pd.Series):
+        return {'$series': _write_frame(zf, f"{path}.parquet", value.to_frame()), 'name': _encode_scalar(value.name)}
+    if isinstance(value, dict):
+        # 같은 인덱스의 Series 묶음(timeseries 등)은 하나의 표로 저장합니다.
+        if value and all(isinstance(v, pd.Series) for v in value.values()):
+            frame = pd.concat(value, axis=1)
+            if all(len(v.index) == len(frame.index) for v in value.values()):
+                return {'$series_dict': _write_frame(zf, f"{path}.parquet", frame),
+                        'names': [_encode_scalar(v.name) for v in value.values()]}
+        if all(isinstance(k, str) for k in value):
+            return {'$dict': {k: _encode(v, f"{path}.{k}", zf) for k, v in value.items()}}
+        # 문자열이 아닌 키(정수, 날짜 등)는 JSON 객체의 키로 쓰면 문자열이 되므로, 형식을 살린 (키, 값) 쌍 목록으로 저장합니다.
+        unsupported = [k for k in value if not isinstance(k, RESULT_KEY_TYPES)]
+        if unsupported:
+            raise TypeError(f"결과 파일에 저장할 수 없는 딕셔너리 키입니다: {unsupported[0]!r} ({path})")
+        return {'$items': [[_encode_scalar(k), _encode(v, f"{path}.{i}", zf)] for i, (k, v) in enumerate(value.items())]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v, f"{path}.{i}", zf) for i, v in enumerate(value)]
+    if isinstance(value, np.ndarray):
+        return [_encode_scalar(v) for v in value.tolist()]
+    return _encode_scalar(value)
+
+
+def dump_result_bytes(results):
+    """결과 딕셔너리를 .qtr 형식의 바이트로 변환하는 함수"""
+    buffer = io.BytesIO()
+    # Parquet 멤버는 이미 압축되어 있으므로 zip 자체는 압축하지 않습니다.
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as zf:
+        entries = {
+            key: _encode(value, key, zf)
+            for key, value in results.items() if key not in RESULT_EXCLUDED_KEYS
+        }
+        header = {'format_version': RESULT_FORMAT_VERSION, 'entries': entries}
+        zf.writestr(RESULT_HEADER_MEMBER, json.dumps(header, ensure_ascii=False))
+    return buffer.getvalue()
+
+
+def save_result_file(results, path, overwrite=True):
+    """결과 딕셔너리를 .qtr 파일로 저장하는 함수 (overwrite=False이면 파일이 이미 있을 때 FileExistsError)"""
+    data = dump_result_bytes(results)
+    with open(path, 'wb' if overwrite else 'xb') as f:
+        f.write(data)
+    return path
+
+
+# -----------------------------------------------------------------------------
+# 2. 불러오기
+# -----------------------------------------------------------------------------
+def _read_frame(zf, info):
+    """Parquet 멤버를 읽어 원래 열 이름을 복원하는 함수"""
+    frame = pd.read_parquet(io.BytesIO(zf.read(info['member'])))
+    labels = [_decode(label, zf) if isinstance(label, dict) else label for label in info['columns']]
+    if len(info['column_names']) > 1:
+        frame.columns = pd.MultiIndex.from_tuples([tuple(label) for label in labels], names=info['column_names'])
+    else:
+        frame.columns = pd.Index(labels, name=info['column_names'][0])
+    return frame
+
+
+def _decode(node, zf):
+    """header.json의 노드를 원래 값으로 되돌리는 함수 (시계열 멤버는 이때 읽음)"""
+    if isinstance(node, list):
+        return [_decode(v, zf) for v in node]
+    if not isinstance(node, dict):
+        return node
+    if '$frame' in node:
+        return _read_frame(zf, node['$frame'])
+    if '$series' in node:
+        series = _read_frame(zf, node['$series']).iloc[:, 0]
+        series.name = _decode(node['name'], zf)
+        return series
+    if '$series_dict' in node:
+        frame = _read_frame(zf, node['$series_dict'])
+        return {key: frame[key].rename(_decode(name, zf)) for key, name in zip(frame.columns, node['names'])}
+    if '$dict' in node:
+        return {k: _decode(v, zf) for k, v in node['$dict'].items()}
+    if '$items' in node:
+        return {_decode(k, zf): _decode(v, zf) for k, v in node['$items']}
+    if '$timestamp' in node:
+        return pd.Timestamp(node['$timestamp'])
+    if '$date' in node:
+        return date.fromisoformat(node['$date'])
+    return node
+
+
+def _has_members(node):
+    """노드 안에 Parquet 멤버(시계열)가 있는지 확인하는 함수"""
+    if isinstance(node, list):
+        return any(_has_members(v) for v in node)
+    if not isinstance(node, dict):
+        return False
+    if any(tag in node for tag in ('$frame', '$series', '$series_dict')):
+        return True
+    if '$items' in node:
+        return any(_has_members(v) for _, v in node['$items'])
+    return any(_has_members(v) for v in node.get('$dict', {}).values())
+
+
+class LazyResult(MutableMapping):
+    """.qtr 바이트를 들고 있다가, 시계열 항목은 처음 접근할 때 읽어 두는 결과 딕셔너리"""
+
+    def __init__(self, data):
+        self._data = data
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            header = json.loads(zf.read(RESULT_HEADER_MEMBER))
+            self._entries = header['entries']
+            # 설정, 지표처럼 작은 항목은 바로 복원하고, 시계열이 있는 항목만 나중에 읽습니다.
+            self._values = {key: _decode(node, zf) for key, node in self._entries.items() if not _has_members(node)}
+        self._pending = [key for key in self._entries if key not in self._values]
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key not in self._pending:
+                raise KeyError(key)
+            with zipfile.ZipFile(io.BytesIO(self._data)) as zf:
+                self._values[key] = _decode(self._entries[key], zf)
+            self._pending.remove(key)
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        if key in self._pending:
+            self._pending.remove(key)
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        if key in self._pending:
+            self._pending.remove(key)
+        else:
+            del self._values[key]
+
+    def __iter__(self):
+        yield from self._values
+        yield from list(self._pending)
+
+    def __len__(self):
+        return len(self._values) + len(self._pending)
+
+    def __contains__(self, key):
+        return key in self._values or key in self._pending
+
+    def copy(self):
+        """얕은 복사본을 반환하는 함수 (아직 읽지 않은 시계열은 복사본에서도 처음 접근할 때 읽음)"""
+        clone = copy.copy(self)
+        clone._values = dict(self._values)
+        clone._pending = list(self._pending)
+        return clone
+
+
+def load_result_bytes(data):
+    """.qtr 또는 예전 .pkl 형식의 바이트에서 결과를 불러오는 함수"""
+    if data[:2] == b'PK':
+        return LazyResult(data)
+    return pickle.loads(data)
+
+
+def load_result_file(path):
+    """결과 파일(.qtr 또는 .pkl)을 불러오는 함수"""
+    with open(path, 'rb') as f:
+        return load_result_bytes(f.read())
+
+
+# -----------------------------------------------------------------------------
+# 3. 결과 지문
+# -----------------------------------------------------------------------------
+def result_fingerprint(results):
+    """결과 내용(설정, 가격, 시계열, 투자 모드)으로 만든 지문 - 내용이 같으면 불러온 파일이어도 같은 값"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(results.get('config', {}), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    prices = results.get('prices')
+    if prices is not None:
+        digest.update(price_fingerprint(prices).encode('utf-8'))
+    series_items = sorted(results.get('timeseries', {}).items())
+    if results.get('investment_mode') is not None:
+        series_items.append(('investment_mode', results['investment_mode']))
+    for key, series in series_items:
+        digest.update(key.encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
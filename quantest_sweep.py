@@ -0,0 +1,179 @@
+"""
+Quantest 파라미터 스윕 (여러 설정 조합을 병렬로 백테스트)
+
+가격 테이블은 한 번만 불러와 공유 메모리에 올려 두고, 작업 프로세스들은 이를 복사 없이 읽습니다.
+각 작업은 설정 조합 하나에 대해 quantest_engine.run_backtest를 실행하고 성과 지표만 돌려줍니다.
+
+    from quantest_sweep import run_sweep
+    table = run_sweep(base_config, {'top_n_aggressive': [2, 3, 4], 'use_canary': [True, False]}, prices)
+"""
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from quantest_engine import (
+    run_backtest, get_all_tickers, get_max_momentum_period, get_price_data, select_config_prices,
+)
+
+# 스윕할 수 있는 파라미터 이름 -> 설정 딕셔너리 안의 위치
+SWEEP_PARAMS = {
+    'top_n_aggressive': ('portfolio_params', 'top_n_aggressive'),
+    'top_n_defensive': ('portfolio_params', 'top_n_defensive'),
+    'use_canary': ('portfolio_params', 'use_canary'),
+    'use_hybrid_protection': ('portfolio_params', 'use_hybrid_protection'),
+    'momentum_type': ('momentum_params', 'type'),
+    'momentum_periods': ('momentum_params', 'periods'),
+    'rebalance_freq': ('rebalance_freq',),
+    'rebalance_day': ('rebalance_day',),
+    'transaction_cost': ('transaction_cost',),
+}
+
+# 결과 표에 담을 성과 지표 (results['metrics']의 키)
+SWEEP_METRICS = ['cagr', 'mdd', 'sharpe_ratio', 'volatility', 'win_rate', 'final_assets', 'sortino_ratio', 'calmar_ratio', 'cvar']
+
+
+def apply_params(base_config, params):
+    """기본 설정에 스윕 파라미터 값을 덮어쓴 새 설정을 반환하는 함수"""
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in base_config.items()}
+    for name, value in params.items():
+        path = SWEEP_PARAMS[name]
+        target = config
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = list(value) if isinstance(value, (list, tuple)) else value
+    return config
+
+
+def format_param_value(value):
+    """리스트 값(모멘텀 기간 등)을 '1,3,6,12' 형태의 문자열로 바꾸는 함수"""
+    return ','.join(map(str, value)) if isinstance(value, (list, tuple)) else value
+
+
+def expand_grid(grid):
+    """{파라미터: 값 목록} 딕셔너리의 모든 조합(데카르트 곱)을 파라미터 딕셔너리 목록으로 반환하는 함수"""
+    unknown = set(grid) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"스윕할 수 없는 파라미터입니다: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def load_sweep_prices(base_config, grid, price_loader=get_price_data):
+    """모든 조합에 필요한 최대 모멘텀 기간을 포함하여 가격 테이블을 한 번만 불러오는 함수.
+
+    price_loader는 get_price_data와 같은 인자/반환값을 갖는 함수입니다 (화면에서 오류를 표시하는 함수 등).
+    """
+    max_period = max(get_max_momentum_period(apply_params(base_config, params)) for params in expand_grid(grid))
+    fetch_start = pd.to_datetime(base_config['start_date']) - pd.DateOffset(months=max_period)
+    return price_loader(get_all_tickers(base_config), fetch_start, base_config['end_date'], base_config['start_date'])
+
+
+# -----------------------------------------------------------------------------
+# 공유 메모리 가격 테이블
+# -----------------------------------------------------------------------------
+_worker_prices = None
+_worker_shm = None
+
+
+def _share_prices(prices):
+    """가격 값 배열을 공유 메모리에 복사하고, 작업 프로세스가 테이블을 복원할 정보를 반환하는 함수"""
+    values = np.ascontiguousarray(prices.to_numpy(dtype=float))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+    layout = {
+        'shm_name': shm.name, 'shape': values.shape,
+        # 인덱스는 객체 그대로 넘겨 날짜 단위(ns/us 등)와 시간대가 바뀌지 않게 합니다.
+        'index': prices.index, 'columns': list(prices.columns),
+    }
+    return shm, layout
+
+
+def _init_worker(layout):
+    """작업 프로세스 시작 시 한 번 호출되어, 공유 메모리의 가격 테이블을 복사 없이 연결하는 함수"""
+    global _worker_prices, _worker_shm
+    # 작업 프로세스는 부모 프로세스의 resource_tracker를 공유하므로, 정리(unlink)는 부모 프로세스가 맡습니다.
+    _worker_shm = shared_memory.SharedMemory(name=layout['shm_name'])
+    values = np.ndarray(layout['shape'], dtype=float, buffer=_worker_shm.buf)
+    _worker_prices = pd.DataFrame(
+        values, index=layout['index'], columns=layout['columns'], copy=False
+    )
+
+
+def get_task_prices(prices):
+    """작업 함수 안에서 사용할 가격 테이블(직접 넘긴 값 또는 공유 메모리 테이블)을 반환하는 함수"""
+    return _worker_prices if prices is None else prices
+
+
+def _run_sweep_task(task):
+    """조합 하나를 백테스트하여 (순번, 파라미터, 지표) 행을 반환하는 함수"""
+    task_id, params, config, prices = task
+    prices = get_task_prices(prices)
+    # 모멘텀 기간처럼 리스트인 값은 표/히트맵에서 쓸 수 있도록 문자열로 바꿉니다.
+    row = {'task_id': task_id, **{name: format_param_value(value) for name, value in params.items()}}
+    metrics = run_backtest(config, prices)['metrics']
+    row.update({key: metrics.get(key) for key in SWEEP_METRICS})
+    row['error'] = None
+    return row
+
+
+def _run_task_safely(task_fn, task):
+    """task_fn(task)를 실행하고, 실패하면 (순번, 파라미터, 오류 메시지) 행을 반환하는 함수"""
+    try:
+        return task_fn(task)
+    except Exception as e:
+        # 한 조합의 실패가 전체 실행을 멈추지 않도록, 어떤 예외든 해당 조합의 error에 기록합니다.
+        task_id, params = task[0], task[1]
+        return {'task_id': task_id, **{name: format_param_value(value) for name, value in params.items()}, 'error': str(e)}
+
+
+def map_combos(task_fn, base_config, combos, prices, max_workers=None, progress_callback=None):
+    """파라미터 조합마다 task_fn((순번, 파라미터, 설정, 가격))을 병렬로 실행하고 결과를 순번 순서로 반환하는 함수.
+
+    task_fn은 작업 프로세스에서 불러올 수 있도록 모듈 최상위 함수여야 하며, 가격은 get_task_prices로 얻습니다.
+    task_fn이 예외를 내면 그 조합의 결과는 {'task_id', 파라미터..., 'error'} 행이 됩니다.
+    max_workers가 1이거나 조합이 하나뿐이면 현재 프로세스에서 순서대로 실행합니다.
+    progress_callback(완료 개수, 전체 개수)를 주면 작업이 끝날 때마다 호출합니다.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results = [None] * len(combos)
+    # 스윕 파라미터로 티커는 바뀌지 않으므로, 필요한 열만 남긴 테이블을 한 번만 만들어 모든 작업이 같은 테이블(같은 가격 지문)을 쓰게 합니다.
+    prices = select_config_prices(prices, base_config)
+
+    if max_workers == 1 or len(combos) <= 1:
+        for i, params in enumerate(combos):
+            results[i] = _run_task_safely(task_fn, (i, params, apply_params(base_config, params), prices))
+            if progress_callback:
+                progress_callback(i + 1, len(combos))
+    else:
+        shm, layout = _share_prices(prices)
+        try:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(combos)),
+                                     initializer=_init_worker, initargs=(layout,)) as executor:
+                futures = {
+                    executor.submit(_run_task_safely, task_fn, (i, params, apply_params(base_config, params), None)): i
+                    for i, params in enumerate(combos)
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    if progress_callback:
+                        progress_callback(done, len(combos))
+        finally:
+            shm.close()
+            shm.unlink()
+    return results
+
+
+def run_sweep(base_config, grid, prices, max_workers=None, progress_callback=None):
+    """파라미터 조합 전체를 병렬로 백테스트하고 조합별 성과 지표 표(DataFrame)를 반환하는 함수.
+
+    max_workers가 1이거나 조합이 하나뿐이면 현재 프로세스에서 순서대로 실행합니다.
+    progress_callback(완료 개수, 전체 개수)를 주면 작업이 끝날 때마다 호출합니다.
+    """
+    rows = map_combos(_run_sweep_task, base_config, expand_grid(grid), prices, max_workers, progress_callback)
+    # 실패한 조합의 행에는 지표가 없으므로 열 순서를 고정하고 빈 지표는 NaN으로 채웁니다.
+    table = pd.DataFrame(rows, columns=[*grid, *SWEEP_METRICS, 'error']).reset_index(drop=True)
+    return table
@@ -0,0 +1,81 @@
+"""
+Quantest 종목 목록 색인 (Stock_list.csv)
+
+티커 → 이름 조회를 딕셔너리로 바로 하고, 종목 선택 위젯이 전체 목록 대신 검색 결과만 받을 수 있도록
+티커 앞부분 검색(정렬된 티커 배열의 이진 탐색)과 '티커 - 이름' 부분 문자열 검색을 제공합니다.
+
+    from quantest_symbols import SymbolRegistry
+    symbols = SymbolRegistry(pd.read_csv('Stock_list.csv'))
+    symbols.name('SPY')           # 'SPDR S&P 500 ETF Trust' (목록에 없으면 티커 그대로)
+    symbols.search('treasury')    # ['IEF - iShares 7-10 Year Treasury Bond ETF', ...]
+"""
+import numpy as np
+import pandas as pd
+
+SYMBOL_SEARCH_LIMIT = 50  # 검색 한 번에 돌려주는 최대 항목 수 (선택 위젯에 보내는 선택지 수)
+
+
+class SymbolRegistry:
+    """종목 목록(Ticker, Name 열)의 조회/검색 색인. 같은 티커가 여러 행에 있으면 첫 번째 행을 사용합니다."""
+
+    def __init__(self, frame=None):
+        self.frame = frame  # 원본 목록 (읽기 실패 시 None)
+        rows = pd.DataFrame(columns=['Ticker', 'Name']) if frame is None else frame.drop_duplicates('Ticker')
+        self._tickers = rows['Ticker'].astype(str).to_numpy(dtype=object)
+        self._names = rows['Name'].astype(str).to_numpy(dtype=object)
+        displays = rows['display'] if 'display' in rows.columns else rows['Ticker'] + ' - ' + rows['Name']
+        self._displays = displays.astype(str).to_numpy(dtype=object)
+        self._positions = dict(zip(self._tickers, range(len(self._tickers))))
+
+        # 앞부분 검색: 대문자 티커를 정렬해 두고 [검색어, 검색어 + 최대 문자) 범위를 이진 탐색합니다.
+        upper_tickers = np.array([t.upper() for t in self._tickers], dtype=str)
+        self._prefix_order = np.argsort(upper_tickers, kind='stable')
+        self._prefix_keys = upper_tickers[self._prefix_order]
+        # 부분 문자열 검색: 소문자 '티커 - 이름' 배열에서 한 번에 찾습니다.
+        self._search_text = np.char.lower(self._displays.astype(str))
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._positions
+
+    def name(self, ticker):
+        """티커의 이름을 반환하는 함수 (목록에 없으면 티커 그대로)"""
+        position = self._positions.get(ticker)
+        return ticker if position is None else self._names[position]
+
+    def label(self, ticker):
+        """'티커 - 이름' 형식의 표시 문자열 (이름이 없거나 티커와 같으면 티커만)"""
+        name = self.name(ticker)
+        return f"{ticker} - {name}" if name != ticker else ticker
+
+    def display(self, ticker):
+        """선택 위젯에서 쓰는 목록의 display 값을 반환하는 함수 (목록에 없으면 None)"""
+        position = self._positions.get(ticker)
+        return None if position is None else self._displays[position]
+
+    def displays_for(self, tickers):
+        """티커 목록을 목록에 있는 것만 display 값으로 바꾸는 함수 (순서 유지)"""
+        return [self._displays[self._positions[t]] for t in tickers if t in self._positions]
+
+    def name_map(self):
+        """티커 → 이름 딕셔너리 (표의 열 이름을 한 번에 바꿀 때 사용)"""
+        return dict(zip(self._tickers, self._names))
+
+    def search(self, query, limit=SYMBOL_SEARCH_LIMIT):
+        """티커가 검색어로 시작하는 항목을 먼저, 그다음 '티커 - 이름'에 검색어가 들어 있는 항목을 반환하는 함수.
+
+        검색어가 비어 있으면 목록의 앞쪽 항목을 반환합니다.
+        """
+        query = (query or '').strip()
+        if not query:
+            return self._displays[:limit].tolist()
+        upper = query.upper()
+        lo = np.searchsorted(self._prefix_keys, upper, side='left')
+        hi = np.searchsorted(self._prefix_keys, upper + chr(0x10FFFF), side='left')
+        rows = self._prefix_order[lo:hi][:limit]
+        if len(rows) < limit:
+            contains = np.flatnonzero(np.char.find(self._search_text, query.lower()) >= 0)
+            rows = np.concatenate([rows, contains[~np.isin(contains, rows)]])[:limit]
+        return self._displays[rows].tolist()
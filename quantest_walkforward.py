@@ -0,0 +1,160 @@
+"""
+Quantest 워크포워드(Walk-forward) 최적화
+
+직전 인샘플(In-sample) 구간에서 가장 좋았던 파라미터 조합을 다음 아웃오브샘플(Out-of-sample) 구간에 적용하고,
+구간을 굴려 가며 아웃오브샘플 구간의 비중을 이어 붙여 하나의 자산 곡선을 만듭니다.
+
+시그널과 비중은 과거 가격만으로 계산되므로, 조합마다 전체 기간 백테스트를 한 번씩만 (병렬로) 실행하고
+각 구간의 인샘플 점수는 그 수익률을 잘라서 계산합니다. 구간 수만큼 백테스트를 반복하지 않습니다.
+
+    from quantest_walkforward import run_walk_forward
+    results = run_walk_forward(base_config, {'top_n_aggressive': [2, 3, 4]}, prices, 36, 12, 'sharpe_ratio')
+"""
+import numpy as np
+import pandas as pd
+
+from quantest_engine import (
+    BacktestError, run_backtest, get_all_tickers, calculate_portfolio_returns, calculate_performance,
+    assemble_results, select_config_prices,
+)
+from quantest_analytics import rolling_max_drop, window_covariance
+from quantest_metrics import get_periods_per_year
+from quantest_sweep import apply_params, expand_grid, format_param_value, get_task_prices, map_combos
+
+# 인샘플 구간에서 조합을 고르는 기준
+WALK_FORWARD_OBJECTIVES = {'sharpe_ratio': '샤프 지수', 'cagr_mdd': 'CAGR / MDD'}
+# 비중이 아니라 이어 붙인 비중의 수익률 계산에만 쓰이는 파라미터 (구간마다 다른 값을 고를 수 없으므로 값이 하나여야 함)
+WALK_FORWARD_PRICING_PARAMS = ('transaction_cost',)
+
+
+def get_walk_forward_windows(start_date, end_date, in_sample_months, out_of_sample_months):
+    """(인샘플 시작일, 아웃오브샘플 시작일, 아웃오브샘플 종료일) 구간 목록을 반환하는 함수 (마지막 구간의 종료일은 None)"""
+    start, end = pd.to_datetime(start_date), pd.to_datetime(end_date)
+    windows = []
+    oos_start = start + pd.DateOffset(months=in_sample_months)
+    while oos_start < end:
+        oos_end = oos_start + pd.DateOffset(months=out_of_sample_months)
+        windows.append((oos_start - pd.DateOffset(months=in_sample_months), oos_start, oos_end if oos_end < end else None))
+        oos_start = oos_end
+    return windows
+
+
+def score_windows(returns, windows, objective, periods_per_year, rf_rate):
+    """수익률 시계열 하나를 각 인샘플 구간으로 잘라 선택 기준 점수를 한 번에 계산하는 함수 (데이터가 없으면 NaN)"""
+    values = returns.to_numpy(dtype=float)
+    dates = returns.index
+    lo = dates.searchsorted([w[0] for w in windows])
+    hi = dates.searchsorted([w[1] for w in windows])
+    n = hi - lo
+
+    # 누적합으로 구간별 로그 수익률 합과 분산을 반복 없이 계산합니다.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_sum = np.concatenate([[0.0], np.cumsum(np.log1p(values))])
+    variance = window_covariance(values, values, lo, hi)
+    valid = n >= 2
+    first, last = dates[np.minimum(lo, len(dates) - 1)], dates[np.maximum(hi - 1, 0)]
+    years = np.where(valid, (last - first).days / 365.25, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        cagr = np.exp((log_sum[hi] - log_sum[lo]) / years) - 1
+        volatility = np.sqrt(np.maximum(variance, 0)) * np.sqrt(periods_per_year)
+        if objective == 'sharpe_ratio':
+            scores = np.where(volatility > 0, (cagr - rf_rate) / volatility, 0.0)
+        else:
+            # 최대 낙폭: 구간 길이(기간 수)별로 로그 누적 성장의 롤링 최대 하락폭을 한 번씩 계산해 구간 시작 위치에서 읽습니다.
+            # 월 단위 구간은 길이가 거의 같으므로 길이 종류 수만큼만 전체를 훑습니다.
+            max_drop = np.zeros(len(windows))
+            for length in np.unique(n[valid]):
+                same_length = valid & (n == length)
+                max_drop[same_length] = rolling_max_drop(log_sum[1:], length)[lo[same_length]]
+            mdd = np.expm1(-max_drop)
+            scores = np.where(mdd < 0, cagr / np.abs(mdd), np.where(cagr > 0, np.inf, cagr))
+    return np.where(valid & (years > 0), scores, np.nan)
+
+
+def _run_full_history_task(task):
+    """조합 하나를 전체 기간으로 백테스트하여 수익률/비중/투자 모드/모멘텀 점수를 반환하는 함수"""
+    task_id, params, config, prices = task
+    results = run_backtest(config, get_task_prices(prices))
+    return {
+        'task_id': task_id, 'error': None,
+        'portfolio_returns': results['portfolio_returns'], 'target_weights': results['target_weights'],
+        'investment_mode': results['investment_mode'], 'momentum_scores': results['momentum_scores'],
+    }
+
+
+def run_walk_forward(base_config, grid, prices, in_sample_months, out_of_sample_months, objective='sharpe_ratio',
+                     max_workers=None, progress_callback=None):
+    """워크포워드 최적화를 실행하고, 아웃오브샘플 구간을 이어 붙인 결과 딕셔너리(탭1과 같은 형태)를 반환하는 함수.
+
+    결과의 'walk_forward' 항목에는 구간별로 선택된 조합과 인샘플 점수 표가 담깁니다.
+    """
+    combos = expand_grid(grid)
+    varying = [name for name in WALK_FORWARD_PRICING_PARAMS if len(grid.get(name, ())) > 1]
+    if varying:
+        raise BacktestError(f"워크포워드에서는 수익률 계산에만 쓰이는 파라미터를 여러 값으로 비교할 수 없습니다: {', '.join(varying)}")
+    windows = get_walk_forward_windows(base_config['start_date'], base_config['end_date'], in_sample_months, out_of_sample_months)
+    if not windows:
+        raise BacktestError("백테스트 기간이 인샘플 구간보다 짧아 워크포워드를 실행할 수 없습니다.")
+
+    runs = map_combos(_run_full_history_task, base_config, combos, prices, max_workers, progress_callback)
+    if all(run['error'] for run in runs):
+        raise BacktestError(f"모든 조합의 백테스트가 실패했습니다: {runs[0]['error']}")
+
+    # 1. 구간 x 조합 점수 행렬에서 구간마다 가장 좋은 조합을 고릅니다. (동점이면 먼저 나온 조합)
+    periods_per_year = get_periods_per_year(base_config)
+    scores = np.full((len(windows), len(combos)), np.nan)
+    for j, run in enumerate(runs):
+        if not run['error']:
+            scores[:, j] = score_windows(run['portfolio_returns'], windows, objective, periods_per_year, base_config['risk_free_rate'])
+    chosen = np.where(np.isnan(scores), -np.inf, scores).argmax(axis=1)
+    # 점수를 계산할 수 없는 구간은 첫 번째 성공 조합을 사용합니다.
+    fallback = next(j for j, run in enumerate(runs) if not run['error'])
+    chosen = np.where(np.isnan(scores).all(axis=1), fallback, chosen)
+
+    # 2. 구간마다 선택된 조합의 비중/투자 모드/모멘텀 점수를 이어 붙입니다.
+    #    첫 구간은 그 이전 리밸런싱 비중도 포함해야 첫 아웃오브샘플 수익률을 계산할 수 있습니다.
+    def stitch(key):
+        pieces = []
+        for k, (_, oos_start, oos_end) in enumerate(windows):
+            frame = runs[chosen[k]][key]
+            mask = np.ones(len(frame.index), dtype=bool) if k == 0 else frame.index >= oos_start
+            if oos_end is not None:
+                mask &= frame.index < oos_end
+            pieces.append(frame[mask])
+        return pd.concat(pieces)
+
+    target_weights = stitch('target_weights')
+    investment_mode = stitch('investment_mode')
+    momentum_scores = stitch('momentum_scores')
+
+    # 3. 이어 붙인 비중으로 수익률과 성과를 다시 계산하므로, 조합이 바뀌는 시점의 거래 비용도 반영됩니다.
+    all_tickers = get_all_tickers(base_config)
+    prices = select_config_prices(prices, base_config)
+    # 거래 비용처럼 수익률 계산에만 쓰이는 파라미터는 조합들과 같은 값(그리드의 단일 값)을 사용합니다.
+    fixed_params = {name: grid[name][0] for name in WALK_FORWARD_PRICING_PARAMS if name in grid}
+    wf_config = {**apply_params(base_config, fixed_params), 'start_date': windows[0][1].date()}
+    portfolio_returns, benchmark_returns = calculate_portfolio_returns(prices, target_weights, wf_config)
+    performance = calculate_performance(portfolio_returns, benchmark_returns, target_weights, wf_config)
+
+    results = assemble_results(wf_config, {
+        'prices': {'prices': prices, 'failed_tickers': [t for t in all_tickers if t not in prices.columns], 'culprit_tickers': []},
+        'signals': momentum_scores,
+        'portfolio': (target_weights, investment_mode),
+        'returns': (portfolio_returns, benchmark_returns),
+        'performance': performance,
+    })
+
+    window_table = pd.DataFrame({
+        'in_sample_start': [w[0] for w in windows],
+        'out_of_sample_start': [w[1] for w in windows],
+        'out_of_sample_end': [w[2] if w[2] is not None else pd.to_datetime(base_config['end_date']) for w in windows],
+        'score': scores[np.arange(len(windows)), chosen],
+    })
+    for name in grid:
+        window_table[name] = [format_param_value(combos[j][name]) for j in chosen]
+    results['walk_forward'] = {
+        'windows': window_table, 'grid': grid, 'objective': objective,
+        'in_sample_months': in_sample_months, 'out_of_sample_months': out_of_sample_months,
+        'failed_combos': sum(1 for run in runs if run['error']),
+    }
+    return results
@@ -0,0 +1,34 @@
+"""
+명령줄 일괄 실행기 검사 (합성 가격, 임시 폴더 사용)
+
+    python -m pytest -q test_quantest_batch.py
+"""
+import json
+
+import pandas as pd
+
+import quantest_batch
+from quantest_engine import run_backtest
+
+
+def test_failing_config_is_recorded_and_the_rest_still_run(tmp_path, monkeypatch, prices, config_for):
+    config = config_for(prices)
+    configs = [{**config, 'name': 'first'}, {**config, 'name': 'broken', 'benchmark': 'BROKEN'}, {**config, 'name': 'last'}]
+    config_path = tmp_path / 'configs.json'
+    config_path.write_text(json.dumps(configs, default=str), encoding='utf-8')
+
+    def fake_run_backtest(config):
+        # 'broken' 설정만 BacktestError가 아닌 예외로 실패하게 합니다 (나머지는 합성 가격으로 실행).
+        if config['benchmark'] == 'BROKEN':
+            raise KeyError('BROKEN')
+        return run_backtest(config, prices, [], [])
+
+    monkeypatch.setattr(quantest_batch, 'run_backtest', fake_run_backtest)
+
+    exit_code = quantest_batch.main([str(config_path), '--out-dir', str(tmp_path / 'out')])
+
+    summary = pd.read_csv(tmp_path / 'out' / 'summary.csv')
+    assert exit_code == 1
+    assert summary['name'].tolist() == ['first', 'broken', 'last']
+    assert summary['error'].isna().tolist() == [True, False, True]
+    assert summary['file'].notna().tolist() == [True, False, True]
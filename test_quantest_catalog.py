@@ -0,0 +1,36 @@
+"""
+결과 보관함 카탈로그 검사 (임시 폴더 사용)
+
+    python -m pytest -q test_quantest_catalog.py
+"""
+import os
+from datetime import datetime
+
+import quantest_catalog
+from quantest_catalog import query_catalog, save_result
+from quantest_engine import run_backtest
+from quantest_results import load_result_file
+
+
+class FrozenDatetime(datetime):
+    """now()가 항상 같은 시각을 반환하는 datetime (같은 초에 여러 번 저장하는 경우)"""
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 2, 3, 4, 5)
+
+
+def test_same_name_in_same_second_is_not_overwritten(tmp_path, monkeypatch, prices, config_for):
+    monkeypatch.setattr(quantest_catalog, 'datetime', FrozenDatetime)
+    results = run_backtest(config_for(prices), prices, [], [])
+    results_dir = str(tmp_path / 'results')
+    name = '../나의 전략/v1'
+
+    paths = [save_result(results, name, results_dir) for _ in range(3)]
+
+    # 이름의 경로 문자는 치환되어 모든 파일이 보관함 폴더 바로 아래에 서로 다른 이름으로 저장됩니다.
+    assert len(set(paths)) == 3
+    assert all(os.path.dirname(path) == results_dir for path in paths)
+    assert sorted(os.listdir(results_dir)) == sorted([*map(os.path.basename, paths), 'catalog.sqlite3'])
+    assert [load_result_file(path)['name'] for path in paths] == [name] * 3
+    page, total = query_catalog(results_dir)
+    assert total == 3 and set(page['name']) == {name}
@@ -0,0 +1,53 @@
+"""
+백테스트 엔진 검사 (가격 저장소는 임시 폴더를 사용하고, yf.download는 가짜 함수로 바꿔 네트워크를 쓰지 않음)
+
+    python -m pytest -q test_quantest_engine.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import quantest_engine
+from quantest_engine import PRICE_STORE_FIELDS, load_price_manifest, update_price_store
+
+TICKERS = ['SPY', 'TLT']
+
+
+def fake_download(tickers, start, end, **kwargs):
+    """yf.download처럼 (필드, 티커) 열을 가진 영업일 가격 테이블을 반환하는 함수 (날짜가 같으면 값도 같음)"""
+    index = pd.bdate_range(start, end, inclusive='left', name='Date')
+    values = 100 + (index - pd.Timestamp('2000-01-01')).days.to_numpy(dtype=float)[:, None] * np.arange(1, len(tickers) + 1)
+    columns = pd.MultiIndex.from_product([PRICE_STORE_FIELDS, tickers])
+    return pd.DataFrame(np.hstack([values] * len(PRICE_STORE_FIELDS)), index=index, columns=columns)
+
+
+def failing_download(*args, **kwargs):
+    raise ConnectionError('network down')
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    """2020년 한 해의 가격이 저장된 임시 가격 저장소"""
+    monkeypatch.setattr(quantest_engine.yf, 'download', fake_download)
+    update_price_store(TICKERS, '2020-01-01', '2021-01-01', store_path=str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2020-01-01', '2021-06-01'),  # 끝 구간만 부족 (마지막 저장일부터 추가 다운로드)
+    ('2019-06-01', '2021-01-01'),  # 시작일을 앞당김 (티커 전체를 다시 다운로드)
+])
+def test_failed_download_falls_back_to_stored_prices(store_path, monkeypatch, start, end):
+    manifest = load_price_manifest(store_path)
+    monkeypatch.setattr(quantest_engine.yf, 'download', failing_download)
+
+    with pytest.warns(UserWarning, match='저장된 데이터'):
+        frames = update_price_store(TICKERS, start, end, store_path=store_path)
+
+    assert set(frames) == set(TICKERS)
+    stored = fake_download(TICKERS, '2020-01-01', '2021-01-01')
+    for ticker in TICKERS:
+        expected = stored.xs(ticker, axis=1, level=1)
+        pd.testing.assert_frame_equal(frames[ticker], expected, check_freq=False, check_names=False)
+    # 실패한 묶음은 manifest에 기록하지 않아 다음 실행 때 다시 받습니다.
+    assert load_price_manifest(store_path) == manifest
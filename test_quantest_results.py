@@ -0,0 +1,63 @@
+"""
+결과 파일 형식(.qtr) 저장/불러오기 검사
+
+네트워크 없이 작은 합성 가격 테이블(conftest.py)로 run_backtest를 실행하고, 저장했다가 불러온 결과가 원래 결과와 같은지 확인합니다.
+
+    python -m pytest -q test_quantest_results.py
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantest_engine import run_backtest
+from quantest_results import LazyResult, dump_result_bytes, load_result_bytes
+
+def assert_same_value(expected, actual, path='results'):
+    """결과 값 두 개가 같은지 재귀적으로 확인하는 함수 (Parquet은 인덱스의 freq를 저장하지 않으므로 비교하지 않음)"""
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual, check_freq=False, obj=path)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual, check_freq=False, obj=path)
+    elif isinstance(expected, dict):
+        assert isinstance(actual, (dict, LazyResult)), path
+        assert set(expected) == set(actual), path
+        for key in expected:
+            assert type(key) is type(next(k for k in actual if k == key)), f"{path}[{key!r}]"
+            assert_same_value(expected[key], actual[key], f"{path}[{key!r}]")
+    elif isinstance(expected, (list, tuple, np.ndarray)):
+        assert len(expected) == len(actual), path
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            assert_same_value(e, a, f"{path}[{i}]")
+    elif isinstance(expected, (float, np.floating)) and np.isnan(expected):
+        assert np.isnan(actual), path
+    else:
+        assert expected == actual, path
+
+
+@pytest.mark.parametrize('backtest_type', ['일별', '월별'])
+def test_backtest_result_round_trip(prices, config_for, backtest_type):
+    results = run_backtest(config_for(prices, backtest_type), prices, [], [])
+
+    loaded = load_result_bytes(dump_result_bytes(results))
+
+    assert isinstance(loaded, LazyResult)
+    assert_same_value(results, loaded)
+
+
+def test_non_string_dict_keys_round_trip():
+    results = {
+        'by_year': {2020: 0.1, 2021: -0.05},
+        'by_date': {pd.Timestamp('2021-01-29'): pd.Series([1.0, 2.0], name='w'), date(2021, 2, 26): 3},
+        'mixed': {'a': 1, 2: 'b', 1.5: None},
+    }
+
+    loaded = load_result_bytes(dump_result_bytes(results))
+
+    assert_same_value(results, loaded)
+
+
+def test_unsupported_dict_keys_are_rejected():
+    with pytest.raises(TypeError):
+        dump_result_bytes({'grid': {('top_n', 2): 0.1}})
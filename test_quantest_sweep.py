@@ -0,0 +1,20 @@
+"""
+파라미터 스윕 검사 (합성 가격, 작업 프로세스 2개)
+
+    python -m pytest -q test_quantest_sweep.py
+"""
+import pandas as pd
+
+from quantest_sweep import run_sweep
+
+
+def test_worker_processes_keep_the_price_index_unit(prices, config_for):
+    # 날짜 단위가 ns가 아닌 (초 단위) 인덱스도 공유 메모리를 거쳐 같은 날짜로 복원되어야 합니다.
+    prices = prices.set_axis(prices.index.as_unit('s'))
+    grid = {'top_n_aggressive': [1, 2], 'momentum_type': ['13612U', '상대 모멘텀']}
+
+    sequential = run_sweep(config_for(prices), grid, prices, max_workers=1)
+    parallel = run_sweep(config_for(prices), grid, prices, max_workers=2)
+
+    assert sequential['error'].isna().all()
+    pd.testing.assert_frame_equal(sequential, parallel)
@@ -0,0 +1,28 @@
+"""
+워크포워드 최적화 검사 (합성 가격, 현재 프로세스에서 순서대로 실행)
+
+    python -m pytest -q test_quantest_walkforward.py
+"""
+import pandas as pd
+import pytest
+
+from quantest_engine import BacktestError, calculate_portfolio_returns
+from quantest_walkforward import run_walk_forward
+
+
+def test_transaction_cost_in_grid_prices_stitched_weights(prices, config_for):
+    base_config = config_for(prices)
+    grid = {'top_n_aggressive': [1, 2], 'transaction_cost': [0.01]}
+
+    results = run_walk_forward(base_config, grid, prices, 12, 6, max_workers=1)
+
+    assert results['config']['transaction_cost'] == 0.01
+    expected, _ = calculate_portfolio_returns(results['prices'], results['target_weights'], results['config'])
+    pd.testing.assert_series_equal(results['portfolio_returns'], expected)
+
+
+def test_multiple_transaction_costs_are_rejected(prices, config_for):
+    grid = {'top_n_aggressive': [1, 2], 'transaction_cost': [0.001, 0.01]}
+
+    with pytest.raises(BacktestError):
+        run_walk_forward(config_for(prices), grid, prices, 12, 6, max_workers=1)